@@ -0,0 +1,80 @@
+"""AudioByteStream throughput for the chunk sizes sent by TTS providers.
+
+Pushes 60s of 24kHz mono audio in chunks of 100ms to 5s and reports the time spent
+per second of audio, for the previous implementation (which reallocated the remaining
+buffer for every frame) and the current one.
+
+    python benchmarks/audio_byte_stream.py
+"""
+
+from __future__ import annotations
+
+import ctypes
+import time
+
+from livekit import rtc
+from livekit.agents.utils.audio import AudioByteStream
+
+SAMPLE_RATE = 24000
+DURATION = 60.0  # seconds of audio pushed per run
+REPEAT = 5  # the best run is reported
+
+
+class _ReallocatingByteStream:
+    """the previous AudioByteStream.push"""
+
+    def __init__(self, sample_rate: int, num_channels: int, samples_per_channel: int) -> None:
+        self._sample_rate = sample_rate
+        self._num_channels = num_channels
+        self._bytes_per_sample = num_channels * ctypes.sizeof(ctypes.c_int16)
+        self._bytes_per_frame = samples_per_channel * self._bytes_per_sample
+        self._buf = bytearray()
+
+    def push(self, data: bytes) -> list[rtc.AudioFrame]:
+        self._buf.extend(data)
+
+        frames = []
+        while len(self._buf) >= self._bytes_per_frame:
+            frame_data = self._buf[: self._bytes_per_frame]
+            self._buf = self._buf[self._bytes_per_frame :]
+
+            frames.append(
+                rtc.AudioFrame(
+                    data=frame_data,
+                    sample_rate=self._sample_rate,
+                    num_channels=self._num_channels,
+                    samples_per_channel=len(frame_data) // self._bytes_per_sample,
+                )
+            )
+
+        return frames
+
+
+def _run(stream: AudioByteStream | _ReallocatingByteStream, chunk: bytes) -> float:
+    num_chunks = int(DURATION * SAMPLE_RATE * 2 / len(chunk))
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(num_chunks):
+            stream.push(chunk)
+        best = min(best, time.perf_counter() - start)
+    return best / DURATION
+
+
+def main() -> None:
+    print(f"{'chunk':>8} {'frame':>6} {'previous':>14} {'current':>14}")
+    for chunk_ms in (100, 500, 1000, 5000):
+        # not a multiple of the frame size, so frames straddle the chunks
+        chunk = b"\x01" * (SAMPLE_RATE * 2 * chunk_ms // 1000 + 2)
+        for frame_ms in (10, 20):
+            samples_per_channel = SAMPLE_RATE * frame_ms // 1000
+            previous = _run(_ReallocatingByteStream(SAMPLE_RATE, 1, samples_per_channel), chunk)
+            current = _run(AudioByteStream(SAMPLE_RATE, 1, samples_per_channel), chunk)
+            print(
+                f"{chunk_ms:>6}ms {frame_ms:>4}ms "
+                f"{previous * 1e6:>8.1f} us/s {current * 1e6:>8.1f} us/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""IPC message throughput over duplex_unix, io.BytesIO framing vs MessageWriter/MessageReader.
+
+Sends InferenceRequests of different payload sizes between the two ends of a socketpair
+and reports the messages/s and payload bytes/s including encoding and decoding.
+
+    python benchmarks/ipc_framing.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import socket
+import time
+from typing import Callable
+
+from livekit.agents.ipc import channel, proto
+from livekit.agents.utils.aio import duplex_unix
+
+DURATION = 1.0  # seconds per run
+
+
+def _bytesio_write(msg: channel.Message) -> bytes:
+    bio = io.BytesIO()
+    channel.write_int(bio, msg.MSG_ID)
+    if isinstance(msg, channel.DataMessage):
+        msg.write(bio)
+    return bio.getvalue()
+
+
+def _bytesio_read(data: bytes) -> channel.Message:
+    bio = io.BytesIO(data)
+    msg = proto.IPC_MESSAGES[channel.read_int(bio)]()
+    if isinstance(msg, channel.DataMessage):
+        msg.read(bio)
+    return msg
+
+
+async def _bytesio_send(dplx: duplex_unix._AsyncDuplex, msg: channel.Message) -> None:
+    await dplx.send_bytes(_bytesio_write(msg))
+
+
+async def _bytesio_recv(dplx: duplex_unix._AsyncDuplex) -> channel.Message:
+    return _bytesio_read(await dplx.recv_bytes())
+
+
+async def _channel_recv(dplx: duplex_unix._AsyncDuplex) -> channel.Message:
+    return await channel.arecv_message(dplx, proto.IPC_MESSAGES)
+
+
+async def _run(
+    payload_size: int,
+    send: Callable[[duplex_unix._AsyncDuplex, channel.Message], asyncio.Future | object],
+    recv: Callable[[duplex_unix._AsyncDuplex], asyncio.Future | object],
+) -> tuple[float, float]:
+    a, b = socket.socketpair()
+    pch = await duplex_unix._AsyncDuplex.open(a)
+    cch = await duplex_unix._AsyncDuplex.open(b)
+
+    msg = proto.InferenceRequest(
+        method="lk_end_of_utterance_en", request_id="inference_req_abcdef", data=b"x" * payload_size
+    )
+
+    sent = 0
+    received = 0
+    done = False
+
+    async def _sender() -> None:
+        nonlocal sent
+        while not done:
+            await send(pch, msg)  # type: ignore
+            sent += 1
+
+    async def _receiver() -> None:
+        nonlocal received
+        # drain everything that was sent, closing with unread data in the socket would block
+        while not done or received < sent:
+            await recv(cch)  # type: ignore
+            received += 1
+
+    sender = asyncio.create_task(_sender())
+    receiver = asyncio.create_task(_receiver())
+
+    start = time.perf_counter()
+    await asyncio.sleep(DURATION)
+    done = True
+    await sender
+    await receiver
+    elapsed = time.perf_counter() - start
+
+    await pch.aclose()
+    await cch.aclose()
+
+    return received / elapsed, received * payload_size / elapsed
+
+
+async def main() -> None:
+    print(f"{'payload':>10} {'encoding':>14} {'msgs/s':>12} {'MiB/s':>10}")
+    for payload_size in (64, 4 * 1024, 64 * 1024, 1024 * 1024):
+        for name, send, recv in (
+            ("BytesIO", _bytesio_send, _bytesio_recv),
+            ("MessageWriter", channel.asend_message, _channel_recv),
+        ):
+            msgs, nbytes = await _run(payload_size, send, recv)
+            print(f"{payload_size:>10} {name:>14} {msgs:>12.0f} {nbytes / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
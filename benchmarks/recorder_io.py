@@ -0,0 +1,86 @@
+"""RecorderIO encoding cost and memory for long sessions.
+
+Simulates sessions of 10 to 60 minutes: 48kHz mono input in 10ms frames, and an agent
+speaking 24kHz TTS for 20s out of every 30s (captured ahead of its playback, like a TTS
+faster than realtime). Every other utterance is interrupted halfway. The events are
+pushed as fast as the recorder encodes them, and the time spent per minute of audio and
+the peak of the memory allocated while recording are reported, which shouldn't depend
+on the length of the session.
+
+    python benchmarks/recorder_io.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from livekit import rtc
+from livekit.agents.voice.recorder_io import RecorderIO
+
+INPUT_RATE = 48000
+OUTPUT_RATE = 24000
+SPEECH = 20.0  # seconds of speech every CYCLE
+CYCLE = 30.0
+
+
+def _frame(sample_rate: int, duration: float) -> rtc.AudioFrame:
+    samples = int(sample_rate * duration)
+    data = (np.random.default_rng(0).standard_normal(samples) * 3000).astype(np.int16)
+    return rtc.AudioFrame(
+        data=data.tobytes(), sample_rate=sample_rate, num_channels=1, samples_per_channel=samples
+    )
+
+
+async def _run(minutes: int, output_path: str) -> tuple[float, int]:
+    recorder = RecorderIO(agent_session=None)  # type: ignore[arg-type]
+    # the recording side of the IO is driven directly, without an AgentSession
+    recorder._in_record = recorder._out_record = object()  # type: ignore[assignment]
+    await recorder.start(output_path=output_path)
+
+    input_frame = _frame(INPUT_RATE, 0.01)
+    output_frame = _frame(OUTPUT_RATE, 0.1)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for cycle in range(int(minutes * 60 / CYCLE)):
+        interrupted = cycle % 2 == 1
+        for _ in range(int(SPEECH / 0.1)):
+            recorder._push_event(("output", output_frame))
+
+        for i in range(int(CYCLE / 0.01)):
+            recorder._push_event(("input", input_frame))
+            if i == int(SPEECH / 0.01 / (2 if interrupted else 1)):
+                recorder._push_event(("playback_finished", SPEECH / (2 if interrupted else 1)))
+
+            if i % 1000 == 0:
+                # let the encoder keep up, like a realtime session
+                while recorder._events.qsize() > 100:
+                    await asyncio.sleep(0.001)
+
+    await recorder.aclose()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / minutes, peak
+
+
+async def main() -> None:
+    print(f"{'session':>8} {'time':>14} {'peak memory':>12} {'file':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in (10, 30, 60):
+            path = os.path.join(tmp, f"{minutes}.ogg")
+            per_minute, peak = await _run(minutes, path)
+            print(
+                f"{minutes:>6}min {per_minute * 1e3:>8.1f} ms/min {peak / 1e6:>9.2f} MB "
+                f"{os.path.getsize(path) / 1e6:>6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
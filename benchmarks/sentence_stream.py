@@ -0,0 +1,86 @@
+"""BufferedSentenceStream cost for text pushed token by token, like the output of a LLM.
+
+Feeds tests/long_synthesize.txt (repeated to ~50KB) in chunks of ~4 characters, as is and
+as a single run-on paragraph (the sentence ends replaced by commas), and reports the time
+per KB of text and the number of tokenizer calls, when the text is tokenized again on every
+push (previous) and only around the sentence ends (current).
+
+    python benchmarks/sentence_stream.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+
+from livekit.agents.tokenize import basic, blingfire, token_stream, tokenizer
+
+TEXT_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "long_synthesize.txt")
+TEXT_SIZE = 20_000
+REPEAT = 3  # the best run is reported
+
+
+def _llm_tokens(text: str) -> list[str]:
+    return re.findall(r"\s*\S{1,4}", text)
+
+
+async def _run(
+    tok: tokenizer.SentenceTokenizer, tokens: list[str], boundary_chars: str | None
+) -> tuple[float, int]:
+    base = tok.stream()
+    assert isinstance(base, token_stream.BufferedSentenceStream)
+    await base.aclose()
+
+    calls = 0
+    tokenize_fnc = base._tokenize_fnc
+
+    def _counting_tokenize(text: str) -> list:  # type: ignore[type-arg]
+        nonlocal calls
+        calls += 1
+        return tokenize_fnc(text)
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        calls = 0
+        stream = token_stream.BufferedSentenceStream(
+            tokenizer=_counting_tokenize,
+            min_token_len=base._min_token_len,
+            min_ctx_len=base._min_ctx_len,
+            boundary_chars=boundary_chars,
+        )
+        start = time.perf_counter()
+        for t in tokens:
+            stream.push_text(t)
+        stream.end_input()
+        async for _ in stream:
+            pass
+        best = min(best, time.perf_counter() - start)
+
+    return best, calls
+
+
+async def main() -> None:
+    with open(TEXT_PATH) as f:
+        text = f.read()
+    text = (text + " ") * (TEXT_SIZE // len(text) + 1)
+    texts = {"sentences": text, "run-on": re.sub(r"[.;]\s", ", ", text).replace("\n", " ")}
+    tokenizers = {"basic": basic.SentenceTokenizer(), "blingfire": blingfire.SentenceTokenizer()}
+
+    print(f"{'tokenizer':>10} {'text':>10} {'previous':>22} {'current':>22}")
+    for tok_name, tok in tokenizers.items():
+        for text_name, t in texts.items():
+            tokens = _llm_tokens(t)
+            kb = len(t) / 1000
+            previous, previous_calls = await _run(tok, tokens, None)
+            current, current_calls = await _run(tok, tokens, token_stream.SENTENCE_END_CHARS)
+            print(
+                f"{tok_name:>10} {text_name:>10} "
+                f"{previous / kb * 1e3:>7.2f} ms/KB {previous_calls:>7} calls "
+                f"{current / kb * 1e3:>7.2f} ms/KB {current_calls:>7} calls"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Buffer allocations made by the silero VADStream while accumulating audio.
+
+Pushes 10ms frames into a VADStream and counts every `rtc.AudioFrame` (and its buffer)
+created by the stream while it runs, reported per second of pushed audio. The input
+frames are created before the measurement and aren't counted.
+
+    python benchmarks/silero_vad_frames.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import numpy as np
+
+from livekit import rtc
+from livekit.plugins import silero
+
+DURATION = 30.0  # seconds of audio pushed per run
+FRAME_MS = 10
+
+
+def _make_frames(sample_rate: int) -> list[rtc.AudioFrame]:
+    rng = np.random.default_rng(0)
+    samples_per_frame = sample_rate * FRAME_MS // 1000
+    data = rng.normal(0, 2000, int(DURATION * sample_rate)).astype(np.int16)
+    return [
+        rtc.AudioFrame(
+            data=data[i : i + samples_per_frame].tobytes(),
+            sample_rate=sample_rate,
+            num_channels=1,
+            samples_per_channel=samples_per_frame,
+        )
+        for i in range(0, len(data) - samples_per_frame + 1, samples_per_frame)
+    ]
+
+
+async def _run(vad: silero.VAD, sample_rate: int) -> None:
+    frames = _make_frames(sample_rate)
+
+    allocs = 0
+    alloc_bytes = 0
+    frame_init = rtc.AudioFrame.__init__
+
+    def _counting_init(self: rtc.AudioFrame, data, *args, **kwargs) -> None:  # type: ignore
+        nonlocal allocs, alloc_bytes
+        allocs += 1
+        alloc_bytes += memoryview(data).nbytes
+        frame_init(self, data, *args, **kwargs)
+
+    rtc.AudioFrame.__init__ = _counting_init  # type: ignore
+    try:
+        stream = vad.stream()
+        start = time.process_time()
+        for frame in frames:
+            stream.push_frame(frame)
+        stream.end_input()
+
+        async for _ in stream:
+            pass
+
+        cpu = time.process_time() - start
+    finally:
+        rtc.AudioFrame.__init__ = frame_init  # type: ignore
+
+    print(
+        f"input {sample_rate:>5}Hz: "
+        f"{allocs / DURATION:8.1f} frames/s  "
+        f"{alloc_bytes / DURATION / 1024:8.1f} KiB/s  "
+        f"{cpu / DURATION * 1000:6.2f} ms cpu/s of audio"
+    )
+
+
+async def main() -> None:
+    vad = silero.VAD.load()
+    for sample_rate in (16000, 24000, 48000):
+        await _run(vad, sample_rate)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""SpeakingRateStream CPU time per second of audio.
+
+Pushes 30s of 24kHz speech-like audio in 20ms frames, and reports the time spent per
+second of audio by the previous implementation (a STFT of the whole 1s window computed
+frame by frame on every 0.1s step) and the current one (only the STFT frames entering
+the window are computed).
+
+    python benchmarks/speaking_rate.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import numpy as np
+
+from livekit import rtc
+from livekit.agents.voice.transcription._speaking_rate import SpeakingRateDetector
+
+DURATION = 30.0  # seconds of audio pushed per run
+REPEAT = 3  # the best run is reported
+
+
+def _previous_spectral_flux(audio: np.ndarray, sample_rate: int) -> float:
+    """the previous SpeakingRateStream._spectral_flux, run on every window"""
+    frame_length = int(sample_rate * 0.025)
+    hop_length = frame_length // 2
+
+    num_frames = (len(audio) - frame_length) // hop_length + 1
+    result = np.zeros((frame_length // 2 + 1, num_frames), dtype=np.complex128)
+    window = np.hanning(frame_length)
+    scale_factor = 1.0 / np.sqrt(np.sum(window**2))
+    for i in range(num_frames):
+        frame = audio[i * hop_length : i * hop_length + frame_length]
+        result[:, i] = np.fft.rfft(frame * window) * scale_factor
+
+    spectral_magnitudes = np.abs(result)
+    spectral_flux_values = []
+    for i in range(1, spectral_magnitudes.shape[1]):
+        flux = np.sum(np.abs(spectral_magnitudes[:, i] - spectral_magnitudes[:, i - 1]))
+        spectral_flux_values.append(flux)
+
+    return float(np.mean(spectral_flux_values))
+
+
+def _speech_like(sample_rate: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sample_rate * DURATION)) / sample_rate
+    envelope = 0.2 + np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    return (rng.standard_normal(len(t)) * envelope * 4000).astype(np.int16)
+
+
+def _run_previous(pcm: np.ndarray, sample_rate: int) -> float:
+    audio = pcm.astype(np.float32) / np.iinfo(np.int16).max
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for s in range(0, len(audio) - sample_rate + 1, sample_rate // 10):
+            _previous_spectral_flux(audio[s : s + sample_rate], sample_rate)
+        best = min(best, time.perf_counter() - start)
+    return best / DURATION
+
+
+async def _run_current(pcm: np.ndarray, sample_rate: int) -> float:
+    chunk = sample_rate // 50
+    frames = [
+        rtc.AudioFrame(
+            data=pcm[i : i + chunk].tobytes(),
+            sample_rate=sample_rate,
+            num_channels=1,
+            samples_per_channel=chunk,
+        )
+        for i in range(0, len(pcm) - chunk + 1, chunk)
+    ]
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        stream = SpeakingRateDetector().stream()
+        start = time.perf_counter()
+        for frame in frames:
+            stream.push_frame(frame)
+        stream.end_input()
+        async for _ in stream:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best / DURATION
+
+
+def main() -> None:
+    print(f"{'rate':>6} {'previous':>14} {'current':>14}")
+    for sample_rate in (16000, 24000, 48000):
+        pcm = _speech_like(sample_rate)
+        previous = _run_previous(pcm, sample_rate)
+        current = asyncio.run(_run_current(pcm, sample_rate))
+        print(f"{sample_rate:>6} {previous * 1e3:>8.2f} ms/s {current * 1e3:>8.2f} ms/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""TTS text transforms cost for text streamed in LLM-sized deltas.
+
+Streams tests/long_synthesize.txt (repeated to ~50KB) in deltas of ~4 characters, as is and
+decorated with markdown (headers, list items, bold and inline code), through the default
+transforms ("filter_markdown", "filter_emoji"), and reports the time per KB of text of the
+previous implementation (one async generator per transform, every markdown regex run on each
+complete piece) and the current one (apply_text_transforms).
+
+    python benchmarks/text_transforms.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from collections.abc import AsyncIterable
+
+from livekit.agents.voice.transcription.filters import (
+    COMPLETE_IMAGES_PATTERN,
+    COMPLETE_LINKS_PATTERN,
+    EMOJI_PATTERN,
+    INLINE_PATTERNS,
+    INLINE_SPLIT_TOKENS,
+    LINE_PATTERNS,
+    apply_text_transforms,
+)
+
+TEXT_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "long_synthesize.txt")
+TEXT_SIZE = 50_000
+REPEAT = 3  # the best run is reported
+
+
+def _previous_has_incomplete_pattern(buffer: str) -> bool:
+    if buffer.endswith(("#", "-", "+", "*", ">", "!", "`", "~", " ")):
+        return True
+    double_asterisks = buffer.count("**")
+    if double_asterisks % 2 == 1:
+        return True
+    if (buffer.count("*") - double_asterisks * 2) % 2 == 1:
+        return True
+    double_underscores = buffer.count("__")
+    if double_underscores % 2 == 1:
+        return True
+    if (buffer.count("_") - double_underscores * 2) % 2 == 1:
+        return True
+    if buffer.count("`") % 2 == 1:
+        return True
+    if buffer.count("~~") % 2 == 1:
+        return True
+    open_brackets = buffer.count("[")
+    complete_links = len(COMPLETE_LINKS_PATTERN.findall(buffer))
+    complete_images = len(COMPLETE_IMAGES_PATTERN.findall(buffer))
+    return open_brackets - complete_links - complete_images > 0
+
+
+def _previous_process_complete_text(text: str, is_newline: bool = False) -> str:
+    if is_newline:
+        for pattern, replacement in LINE_PATTERNS:
+            text = pattern.sub(replacement, text)
+    for pattern, replacement in INLINE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+async def _previous_filter_markdown(text: AsyncIterable[str]) -> AsyncIterable[str]:
+    buffer = ""
+    buffer_is_newline = True
+    async for chunk in text:
+        buffer += chunk
+        if "\n" in buffer:
+            lines = buffer.split("\n")
+            buffer = lines[-1]
+            for i, line in enumerate(lines[:-1]):
+                is_newline = buffer_is_newline if i == 0 else True
+                yield _previous_process_complete_text(line, is_newline=is_newline) + "\n"
+            buffer_is_newline = True
+            continue
+
+        last_split_pos = 0
+        for token in INLINE_SPLIT_TOKENS:
+            last_split_pos = max(last_split_pos, buffer.rfind(token, last_split_pos))
+            if last_split_pos >= len(buffer) - 1:
+                break
+
+        if last_split_pos >= 1:
+            processable = buffer[:last_split_pos]
+            if not _previous_has_incomplete_pattern(processable):
+                yield _previous_process_complete_text(processable, is_newline=buffer_is_newline)
+                buffer = buffer[last_split_pos:]
+                buffer_is_newline = False
+
+    if buffer:
+        yield _previous_process_complete_text(buffer, is_newline=buffer_is_newline)
+
+
+async def _previous_filter_emoji(text: AsyncIterable[str]) -> AsyncIterable[str]:
+    async for chunk in text:
+        yield EMOJI_PATTERN.sub("", chunk)
+
+
+def _markdown(text: str) -> str:
+    lines = []
+    for i, line in enumerate(text.split(". ")):
+        words = line.split(" ")
+        if len(words) > 4:
+            words[1] = f"**{words[1]}**"
+            words[3] = f"`{words[3]}`"
+        prefix = ("## ", "- ", "", "")[i % 4]
+        lines.append(prefix + " ".join(words) + ".")
+    return "\n".join(lines)
+
+
+async def _run(transform, deltas: list[str]) -> float:  # type: ignore[no-untyped-def]
+    async def _stream() -> AsyncIterable[str]:
+        for delta in deltas:
+            yield delta
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        async for _ in transform(_stream()):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def main() -> None:
+    with open(TEXT_PATH) as f:
+        text = f.read()
+    text = (text + " ") * (TEXT_SIZE // len(text) + 1)
+    texts = {"plain": text, "markdown": _markdown(text)}
+
+    def previous(stream: AsyncIterable[str]) -> AsyncIterable[str]:
+        return _previous_filter_emoji(_previous_filter_markdown(stream))
+
+    def current(stream: AsyncIterable[str]) -> AsyncIterable[str]:
+        return apply_text_transforms(stream, ["filter_markdown", "filter_emoji"])
+
+    print(f"{'text':>10} {'previous':>14} {'current':>14}")
+    for name, t in texts.items():
+        deltas = re.findall(r"\s*\S{1,4}", t)
+        kb = len(t) / 1000
+        previous_time = await _run(previous, deltas)
+        current_time = await _run(current, deltas)
+        print(
+            f"{name:>10} {previous_time / kb * 1e3:>8.3f} ms/KB {current_time / kb * 1e3:>8.3f} ms/KB"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
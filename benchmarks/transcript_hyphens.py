@@ -0,0 +1,132 @@
+"""Hyphen counting cost of the transcript synchronization, per word.
+
+Replays the word steps of _SegmentSynchronizerImpl._main_task over tests/long_transcript.txt,
+with the annotated speaking rate ~40 chars ahead of the forwarded text, and reports the time
+per word of the previous implementation (the word and the text slice between the forwarded
+and the target positions tokenized and hyphenated on every step, the tree of the patterns
+walked from each char) and the current one (memoized word counts, prefix sums of the pushed
+text, and an automaton read once per word).
+
+    python benchmarks/transcript_hyphens.py
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import re
+import time
+from typing import Any
+
+from livekit.agents import tokenize
+from livekit.agents.tokenize import _basic_hyphenator
+from livekit.agents.voice.transcription.synchronizer import HYPHEN_CACHE_SIZE, _TextData
+
+TEXT_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "long_transcript.txt")
+LOOKAHEAD = 40  # chars between the forwarded text and the target position
+CHUNK_SIZE = 8  # chars of text pushed at once
+REPEAT = 3  # the best run is reported
+
+
+class _TreeHyphenator:
+    """the previous Hyphenator, walking nested dicts from each char of the word"""
+
+    def __init__(self, patterns: str) -> None:
+        self.tree: dict[str | None, Any] = {}
+        for pattern in patterns.split():
+            chars = re.sub("[0-9]", "", pattern)
+            t = self.tree
+            for c in chars:
+                t = t.setdefault(c, {})
+            t[None] = [int(d or 0) for d in re.split("[.a-z]", pattern)]
+
+    def hyphenate_word(self, word: str) -> list[str]:
+        if len(word) <= 4:
+            return [word]
+        work = "." + word.lower() + "."
+        points = [0] * (len(work) + 1)
+        for i in range(len(work)):
+            t = self.tree
+            for c in work[i:]:
+                if c not in t:
+                    break
+                t = t[c]
+                if None in t:
+                    for j, p_j in enumerate(t[None]):
+                        points[i + j] = max(points[i + j], p_j)
+        points[1] = points[2] = points[-2] = points[-3] = 0
+
+        pieces = [""]
+        for c, p in zip(word, points[2:]):
+            pieces[-1] += c
+            if p % 2:
+                pieces.append("")
+        return pieces
+
+
+def _run_previous(text: str, word_tokenizer: tokenize.WordTokenizer) -> tuple[float, int]:
+    hyphenator = _TreeHyphenator(_basic_hyphenator.PATTERNS)
+
+    def _calc_hyphens(text: str) -> int:
+        return sum(len(hyphenator.hyphenate_word(w)) for w in word_tokenizer.tokenize(text))
+
+    words = word_tokenizer.tokenize(text)
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        forwarded_len = 0
+        for word in words:
+            len(hyphenator.hyphenate_word(word))
+            _calc_hyphens(text[forwarded_len : forwarded_len + LOOKAHEAD])
+            forwarded_len += len(word)
+        _calc_hyphens(text)
+        best = min(best, time.perf_counter() - start)
+
+    return best, len(words)
+
+
+def _run_current(text: str, word_tokenizer: tokenize.WordTokenizer) -> tuple[float, int]:
+    hyphenator = _basic_hyphenator.Hyphenator(_basic_hyphenator.PATTERNS)
+
+    words = word_tokenizer.tokenize(text)
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        hyphen_count = functools.lru_cache(maxsize=HYPHEN_CACHE_SIZE)(
+            lambda word: len(hyphenator.hyphenate_word(word))
+        )
+        text_data = _TextData(
+            word_stream=word_tokenizer.stream(),
+            word_tokenizer=word_tokenizer,
+            hyphen_count=hyphen_count,
+        )
+        for i in range(0, len(text), CHUNK_SIZE):
+            text_data.push_text(text[i : i + CHUNK_SIZE])
+
+        forwarded_len = 0
+        for word in words:
+            hyphen_count(word)
+            text_data.count_hyphens(forwarded_len, forwarded_len + LOOKAHEAD)
+            forwarded_len += len(word)
+        text_data.pushed_hyphens[-1]
+        best = min(best, time.perf_counter() - start)
+
+    return best, len(words)
+
+
+def main() -> None:
+    with open(TEXT_PATH) as f:
+        text = f.read()
+    word_tokenizer = tokenize.basic.WordTokenizer(
+        retain_format=True, ignore_punctuation=False, split_character=True
+    )
+
+    previous, n_words = _run_previous(text, word_tokenizer)
+    current, _ = _run_current(text, word_tokenizer)
+    print(f"{n_words} words")
+    print(f"previous {previous / n_words * 1e6:>8.1f} us/word")
+    print(f"current  {current / n_words * 1e6:>8.1f} us/word")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,15 @@ _RunnersDict = dict[str, type["_InferenceRunner"]]
 class _InferenceRunner(ABC, _RunnerMeta):
     registered_runners: _RunnersDict = {}
 
+    BATCH_WINDOW: ClassVar[float] = 0.0
+    """Time to wait for concurrent requests to coalesce them into one `run_batch` call.
+    0 disables batching, every request is run on its own"""
+    MAX_BATCH_SIZE: ClassVar[int] = 16
+    THREADS: ClassVar[int] = 0
+    """Run the requests in a dedicated pool of this many threads, without waiting for them in
+    the message loop of the inference process. For the slow requests that must not hold up
+    the others, `run` is then called concurrently. 0 uses the shared executor"""
+
     @classmethod
     def register_runner(cls, runner_class: type[_InferenceRunner]) -> None:
         if threading.current_thread() != threading.main_thread():
@@ -35,3 +44,10 @@ class _InferenceRunner(ABC, _RunnerMeta):
     def run(self, data: bytes) -> bytes | None:
         """Run inference on the given data."""
         ...
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        """Run inference on requests coalesced by the inference process (see `BATCH_WINDOW`).
+
+        Results must be returned in the same order as the requests. If this raises, each
+        request of the batch is retried individually with `run`."""
+        return [self.run(d) for d in data]
@@ -3,6 +3,7 @@ from . import (
     inference_proc_executor,
     job_executor,
     job_proc_executor,
+    job_shared_proc_executor,
     job_thread_executor,
     proc_pool,
     proto,
@@ -13,6 +14,7 @@ __all__ = [
     "inference_proc_executor",
     "job_executor",
     "job_proc_executor",
+    "job_shared_proc_executor",
     "job_thread_executor",
     "proc_pool",
     "proto",
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 import io
 import struct
-from typing import ClassVar, Protocol, cast, runtime_checkable
+from collections.abc import Iterable
+from typing import ClassVar, Protocol, Union, cast, runtime_checkable
 
 from .. import utils
 
+Buffer = Union[bytes, bytearray, memoryview]
+
+# payloads at least this big are referenced by the frame instead of being copied into it
+ZERO_COPY_THRESHOLD = 4096
+
 
 class Message(Protocol):
     MSG_ID: ClassVar[int]
@@ -21,24 +27,150 @@ class DataMessage(Message, Protocol):
 MessagesDict = dict[int, type[Message]]
 
 
-def _read_message(data: bytes, messages: MessagesDict) -> Message:
-    bio = io.BytesIO(data)
-    msg_id = read_int(bio)
+class MessageWriter(io.BytesIO):
+    """Serializes a message into a list of buffers sent with a single scatter/gather write.
+
+    The fields are written to the underlying io.BytesIO, payloads of at least
+    `ZERO_COPY_THRESHOLD` bytes written with `write_bytes` are referenced instead of copied.
+    They must not be modified until the message is sent.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffers: list[Buffer] = []
+
+    def write_buffer(self, buf: Buffer) -> None:
+        """Append buf to the message without copying it"""
+        if self.tell():
+            self._buffers.append(self.getvalue())
+            self.seek(0)
+            self.truncate()
+
+        self._buffers.append(buf)
+
+    def getbuffers(self) -> list[Buffer]:
+        if self.tell():
+            self._buffers.append(self.getvalue())
+            self.seek(0)
+            self.truncate()
+
+        return self._buffers
+
+
+class MessageReader(io.BytesIO):
+    """Reads a received message without copying it, payloads can be read as views with
+    `read_bytes_view`.
+
+    io.BytesIO copies the initial data unless it's bytes, the message is read from a view of
+    the received data instead: the read methods of io.BytesIO are overridden to read from
+    it, and the reader is read-only. The views stay valid as long as they're referenced.
+    """
+
+    def __init__(self, data: Buffer) -> None:
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def read(self, size: int | None = -1, /) -> bytes:
+        return self.read_view(len(self._view) if size is None or size < 0 else size).tobytes()
+
+    def read1(self, size: int | None = -1, /) -> bytes:
+        return self.read(size)
+
+    def read_view(self, size: int) -> memoryview:
+        view = self._view[self._pos : self._pos + size]
+        self._pos += len(view)
+        return view
+
+    def readinto(self, buffer: Buffer, /) -> int:  # type: ignore[override]
+        out = memoryview(buffer).cast("B")
+        view = self.read_view(len(out))
+        out[: len(view)] = view
+        return len(view)
+
+    def readline(self, size: int | None = -1, /) -> bytes:
+        rest = self._view[self._pos :]
+        if size is not None and size >= 0:
+            rest = rest[:size]
+        return self.read(rest.tobytes().find(b"\n") + 1 or len(rest))
+
+    def readlines(self, hint: int | None = -1, /) -> list[bytes]:
+        lines: list[bytes] = []
+        total = 0
+        while line := self.readline():
+            lines.append(line)
+            total += len(line)
+            if hint is not None and 0 < hint <= total:
+                break
+        return lines
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def getvalue(self) -> bytes:
+        return self._view.tobytes()
+
+    def getbuffer(self) -> memoryview:
+        return self._view
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = io.SEEK_SET, /) -> int:
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._view)
+
+        self._pos = max(pos, 0)
+        return self._pos
+
+    def writable(self) -> bool:
+        return False
+
+    def write(self, buffer: Buffer, /) -> int:  # type: ignore[override]
+        raise io.UnsupportedOperation("MessageReader is read-only")
+
+    def writelines(self, lines: Iterable[Buffer], /) -> None:  # type: ignore[override]
+        raise io.UnsupportedOperation("MessageReader is read-only")
+
+    def truncate(self, size: int | None = None, /) -> int:
+        raise io.UnsupportedOperation("MessageReader is read-only")
+
+
+_data_message_types: dict[type, bool] = {}
+
+
+def _is_data_message(msg: Message) -> bool:
+    # isinstance checks against a runtime_checkable Protocol are slow, cache them per type
+    is_data = _data_message_types.get(type(msg))
+    if is_data is None:
+        is_data = _data_message_types[type(msg)] = isinstance(msg, DataMessage)
+
+    return is_data
+
+
+def _read_message(data: Buffer, messages: MessagesDict) -> Message:
+    reader = MessageReader(data)
+    msg_id = read_int(reader)
     msg = messages[msg_id]()
-    if isinstance(msg, DataMessage):
-        msg.read(bio)
+    if _is_data_message(msg):
+        cast(DataMessage, msg).read(reader)
 
     return msg
 
 
-def _write_message(msg: Message) -> bytes:
-    bio = io.BytesIO()
-    write_int(bio, msg.MSG_ID)
+def _write_message(msg: Message) -> list[Buffer]:
+    writer = MessageWriter()
+    write_int(writer, msg.MSG_ID)
 
-    if isinstance(msg, DataMessage):
-        msg.write(bio)
+    if _is_data_message(msg):
+        cast(DataMessage, msg).write(writer)
 
-    return bio.getvalue()
+    return writer.getbuffers()
 
 
 async def arecv_message(
@@ -48,20 +180,24 @@ async def arecv_message(
 
 
 async def asend_message(dplx: utils.aio.duplex_unix._AsyncDuplex, msg: Message) -> None:
-    await dplx.send_bytes(_write_message(msg))
+    await dplx.send_buffers(_write_message(msg))
 
 
 def recv_message(dplx: utils.aio.duplex_unix._Duplex, messages: MessagesDict) -> Message:
-    return _read_message(dplx.recv_bytes(), messages)
+    return _read_message(dplx.recv_buffer(), messages)
 
 
 def send_message(dplx: utils.aio.duplex_unix._Duplex, msg: Message) -> None:
-    dplx.send_bytes(_write_message(msg))
+    dplx.send_buffers(_write_message(msg))
 
 
-def write_bytes(b: io.BytesIO, buf: bytes) -> None:
-    b.write(len(buf).to_bytes(4, "big"))
-    b.write(buf)
+def write_bytes(b: io.BytesIO, buf: Buffer) -> None:
+    length = memoryview(buf).nbytes
+    b.write(length.to_bytes(4, "big"))
+    if length >= ZERO_COPY_THRESHOLD and isinstance(b, MessageWriter):
+        b.write_buffer(buf)
+    else:
+        b.write(buf)
 
 
 def read_bytes(b: io.BytesIO) -> bytes:
@@ -69,6 +205,15 @@ def read_bytes(b: io.BytesIO) -> bytes:
     return b.read(length)
 
 
+def read_bytes_view(b: io.BytesIO) -> memoryview:
+    """Same as read_bytes, but returns a view of the received message instead of a copy"""
+    length = int.from_bytes(b.read(4), "big")
+    if isinstance(b, MessageReader):
+        return b.read_view(length)
+
+    return memoryview(b.read(length))
+
+
 def write_string(b: io.BytesIO, s: str) -> None:
     encoded = s.encode("utf-8")
     b.write(len(encoded).to_bytes(4, "big"))
@@ -0,0 +1,21 @@
+"""Imported last by the forkserver (after the plugins, see Worker.run).
+
+Loads the resources of the registered plugins before any job process is forked, so the
+processes share them copy-on-write instead of each loading its own copy.
+"""
+
+from __future__ import annotations
+
+from ..log import logger
+from ..plugin import Plugin
+
+
+def _preload_resources() -> None:
+    for plugin in Plugin.registered_plugins:
+        try:
+            plugin.preload_resources()
+        except Exception:
+            logger.exception("failed to preload resources", extra={"plugin": plugin.title})
+
+
+_preload_resources()
@@ -9,9 +9,10 @@ from typing import Any
 
 from ..inference_runner import _RunnersDict
 from ..log import logger
-from ..utils import aio, log_exceptions, shortuuid
+from ..utils import aio, hw, log_exceptions, shortuuid
 from . import channel, proto
 from .inference_proc_lazy_main import ProcStartArgs, proc_main
+from .shared_memory import DEFAULT_SLOT_SIZE, SlabAllocator
 from .supervised_proc import SupervisedProc
 
 
@@ -30,6 +31,8 @@ class InferenceProcExecutor(SupervisedProc):
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
         http_proxy: str | None,
+        shared_memory_mb: float = 0,
+        memory_metric: hw.MemoryMetric = "rss",
     ) -> None:
         super().__init__(
             initialize_timeout=initialize_timeout,
@@ -42,16 +45,30 @@ class InferenceProcExecutor(SupervisedProc):
             mp_ctx=mp_ctx,
             loop=loop,
             http_proxy=http_proxy,
+            memory_metric=memory_metric,
         )
 
         self._runners = runners
         self._active_requests: dict[str, asyncio.Future[proto.InferenceResponse]] = {}
 
+        # opt-in, large payloads are exchanged through shared memory and only their offset and
+        # length are sent over the socket
+        self._shared_memory_mb = shared_memory_mb
+        self._shm: SlabAllocator | None = None
+        self._shm_requests: dict[str, int] = {}  # request_id -> offset of the allocated slot
+
     def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process:
+        if self._shared_memory_mb > 0 and self._shm is None:
+            self._shm = SlabAllocator.create(
+                size=int(self._shared_memory_mb * 1024 * 1024), slot_size=DEFAULT_SLOT_SIZE
+            )
+
         proc_args = ProcStartArgs(
             log_cch=log_cch,
             mp_cch=cch,
             runners=self._runners,
+            shm_name=self._shm.name if self._shm else None,
+            shm_slot_size=self._shm.slot_size if self._shm else 0,
         )
 
         return self._mp_ctx.Process(  # type: ignore
@@ -62,38 +79,70 @@ class InferenceProcExecutor(SupervisedProc):
 
     @log_exceptions(logger=logger)
     async def _main_task(self, ipc_ch: aio.ChanReceiver[channel.Message]) -> None:
-        async for msg in ipc_ch:
-            if isinstance(msg, proto.InferenceResponse):
-                fut = self._active_requests.pop(msg.request_id, None)
-                if fut is None:
-                    logger.warning(
-                        "received unexpected inference response",
-                        extra={"request_id": msg.request_id},
-                    )
-                    return
-
-                with contextlib.suppress(asyncio.InvalidStateError):
-                    fut.set_result(msg)
-
-    async def do_inference(self, method: str, data: bytes) -> bytes | None:
+        try:
+            async for msg in ipc_ch:
+                if isinstance(msg, proto.InferenceResponse):
+                    self._handle_inference_response(msg)
+        finally:
+            # the process exited, the slots can't be in use anymore
+            self._shm_requests.clear()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm = None
+
+    def _handle_inference_response(self, msg: proto.InferenceResponse) -> None:
+        # the slot is freed even if the request was cancelled, the process was using it
+        shm_offset = self._shm_requests.pop(msg.request_id, None)
+        if shm_offset is not None and self._shm is not None:
+            if msg.shm_offset >= 0:
+                msg.data = self._shm.read(msg.shm_offset, msg.shm_length)
+            self._shm.free(shm_offset)
+
+        fut = self._active_requests.pop(msg.request_id, None)
+        if fut is None:
+            logger.warning(
+                "received unexpected inference response",
+                extra={"request_id": msg.request_id},
+            )
+            return
+
+        with contextlib.suppress(asyncio.InvalidStateError):
+            fut.set_result(msg)
+
+    async def do_inference(self, method: str, data: bytes | memoryview) -> bytes | None:
         if not self.started:
             raise RuntimeError("process not started")
 
         request_id = shortuuid("inference_req_")
         fut = asyncio.Future[proto.InferenceResponse]()
 
-        await channel.asend_message(
-            self._pch,
-            proto.InferenceRequest(request_id=request_id, method=method, data=data),
-        )
+        req = proto.InferenceRequest(request_id=request_id, method=method, data=data)
+        if self._shm is not None and self._shm.should_use(len(data)):
+            shm_offset = self._shm.alloc()
+            if shm_offset is not None:
+                # the slot is reused by the inference process for the response
+                self._shm_requests[request_id] = shm_offset
+                req.data = b""
+                req.shm_offset = shm_offset
+                req.shm_length = self._shm.write(shm_offset, data)
 
         self._active_requests[request_id] = fut
+        try:
+            await channel.asend_message(self._pch, req)
+        except Exception:
+            # the process never receives the request, nothing else would free its slot. (when
+            # cancelled, the request is already buffered and the slot is freed by its response)
+            self._active_requests.pop(request_id, None)
+            shm_offset = self._shm_requests.pop(request_id, None)
+            if shm_offset is not None and self._shm is not None:
+                self._shm.free(shm_offset)
+            raise
 
         inf_resp = await fut
         if inf_resp.error:
             raise RuntimeError(f"inference of {method} failed: {inf_resp.error}")
 
-        return inf_resp.data
+        return bytes(inf_resp.data) if inf_resp.data is not None else None
 
     def logging_extra(self) -> dict[str, Any]:
         extra = super().logging_extra()
@@ -28,12 +28,13 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
-from ..inference_runner import _RunnersDict
+from ..inference_runner import _InferenceRunner, _RunnersDict
 from ..log import logger
 from ..utils import aio, hw, log_exceptions
 from . import proto
 from .channel import Message
 from .proc_client import _ProcClient
+from .shared_memory import SlabAllocator
 
 
 @dataclass
@@ -41,12 +42,18 @@ class ProcStartArgs:
     log_cch: socket.socket
     mp_cch: socket.socket
     runners: _RunnersDict
+    shm_name: str | None = None
+    shm_slot_size: int = 0
 
 
 def proc_main(args: ProcStartArgs) -> None:
     from .proc_client import _ProcClient
 
-    inf_proc = _InferenceProc(args.runners)
+    shm = None
+    if args.shm_name is not None:
+        shm = SlabAllocator.attach(args.shm_name, slot_size=args.shm_slot_size)
+
+    inf_proc = _InferenceProc(args.runners, shm=shm)
 
     client = _ProcClient(
         args.mp_cch,
@@ -62,12 +69,24 @@ def proc_main(args: ProcStartArgs) -> None:
         return  # initialization failed, exit (initialize will send an error to the worker)
     client.run()
 
+    if shm is not None:
+        shm.close()
+
 
 class _InferenceProc:
-    def __init__(self, runners: _RunnersDict) -> None:
+    def __init__(self, runners: _RunnersDict, *, shm: SlabAllocator | None = None) -> None:
         # create an instance of each runner (the ctor must not requires any argument)
         self._runners = {name: runner() for name, runner in runners.items()}
+        self._shm = shm
         self._executor = ThreadPoolExecutor(max_workers=math.ceil(hw.get_cpu_monitor().cpu_count()))
+        self._pending_batches: dict[str, list[proto.InferenceRequest]] = {}
+        self._batch_tasks: dict[str, asyncio.Task[None]] = {}
+        self._runner_executors = {
+            name: ThreadPoolExecutor(max_workers=runner.THREADS, thread_name_prefix=name)
+            for name, runner in self._runners.items()
+            if runner.THREADS > 0
+        }
+        self._inference_tasks: set[asyncio.Task[None]] = set()
 
     def initialize(self, init_req: proto.InitializeRequest, client: _ProcClient) -> None:
         self._client = client
@@ -95,33 +114,121 @@ class _InferenceProc:
 
     @log_exceptions(logger=logger)
     async def entrypoint(self, cch: aio.ChanReceiver[Message]) -> None:
-        async for msg in cch:
-            if isinstance(msg, proto.InferenceRequest):
-                await self._handle_inference_request(msg)
-
-            if isinstance(msg, proto.ShutdownRequest):
-                await self._client.send(proto.Exiting(reason=msg.reason))
-                break
-
-    async def _handle_inference_request(self, msg: proto.InferenceRequest) -> None:
+        try:
+            async for msg in cch:
+                if isinstance(msg, proto.InferenceRequest):
+                    if msg.shm_offset >= 0 and self._shm is not None:
+                        msg.data = self._shm.read(msg.shm_offset, msg.shm_length)
+
+                    runner = self._runners.get(msg.method)
+                    if runner is not None and runner.BATCH_WINDOW > 0:
+                        self._enqueue_inference_request(msg)
+                    elif (executor := self._runner_executors.get(msg.method)) is not None:
+                        task = asyncio.create_task(self._handle_inference_request(msg, executor))
+                        self._inference_tasks.add(task)
+                        task.add_done_callback(self._inference_tasks.discard)
+                    else:
+                        await self._handle_inference_request(msg, self._executor)
+
+                if isinstance(msg, proto.ShutdownRequest):
+                    # let the pending batches and the requests running in the runner executors
+                    # finish, their responses are sent before exiting
+                    await asyncio.gather(
+                        *self._batch_tasks.values(), *self._inference_tasks, return_exceptions=True
+                    )
+                    for executor in self._runner_executors.values():
+                        executor.shutdown(wait=False)
+
+                    await self._client.send(proto.Exiting(reason=msg.reason))
+                    break
+        finally:
+            # the channel is closed or the process is exiting, the remaining responses can't
+            # be sent
+            await aio.cancel_and_wait(*self._batch_tasks.values(), *self._inference_tasks)
+
+    async def _handle_inference_request(
+        self, msg: proto.InferenceRequest, executor: ThreadPoolExecutor
+    ) -> None:
         loop = asyncio.get_running_loop()
 
         if msg.method not in self._runners:
             logger.warning("unknown inference method", extra={"method": msg.method})
 
         try:
+            # the runners get bytes, the payload is copied out of the received message
             data = await loop.run_in_executor(
-                self._executor, self._runners[msg.method].run, msg.data
-            )
-            await self._client.send(
-                proto.InferenceResponse(
-                    request_id=msg.request_id,
-                    data=data,
-                )
+                executor, self._runners[msg.method].run, bytes(msg.data)
             )
+            await self._client.send(self._inference_response(msg, data))
 
         except Exception as e:
             logger.exception("error running inference")
             await self._client.send(
                 proto.InferenceResponse(request_id=msg.request_id, error=str(e))
             )
+
+    def _enqueue_inference_request(self, msg: proto.InferenceRequest) -> None:
+        self._pending_batches.setdefault(msg.method, []).append(msg)
+
+        task = self._batch_tasks.get(msg.method)
+        if task is None or task.done():
+            self._batch_tasks[msg.method] = asyncio.create_task(self._batch_task(msg.method))
+
+    @log_exceptions(logger=logger)
+    async def _batch_task(self, method: str) -> None:
+        loop = asyncio.get_running_loop()
+        runner = self._runners[method]
+        pending = self._pending_batches[method]
+
+        if len(pending) < runner.MAX_BATCH_SIZE:
+            # wait for the concurrent requests, the requests queued while a batch is running
+            # are run right after it
+            await asyncio.sleep(runner.BATCH_WINDOW)
+
+        while pending:
+            batch = pending[: runner.MAX_BATCH_SIZE]
+            del pending[: runner.MAX_BATCH_SIZE]
+
+            responses = await loop.run_in_executor(self._executor, self._run_batch, runner, batch)
+            for resp in responses:
+                await self._client.send(resp)
+
+    def _run_batch(
+        self, runner: _InferenceRunner, batch: list[proto.InferenceRequest]
+    ) -> list[proto.InferenceResponse]:
+        try:
+            results = runner.run_batch([bytes(msg.data) for msg in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"run_batch returned {len(results)} results")
+
+            return [self._inference_response(msg, data) for msg, data in zip(batch, results)]
+        except Exception:
+            logger.exception(
+                "error running batched inference, retrying requests individually",
+                extra={"method": batch[0].method, "batch_size": len(batch)},
+            )
+
+        responses = []
+        for msg in batch:
+            try:
+                responses.append(self._inference_response(msg, runner.run(bytes(msg.data))))
+            except Exception as e:
+                logger.exception("error running inference")
+                responses.append(proto.InferenceResponse(request_id=msg.request_id, error=str(e)))
+
+        return responses
+
+    def _inference_response(
+        self, msg: proto.InferenceRequest, data: bytes | None
+    ) -> proto.InferenceResponse:
+        if self._shm is not None and msg.shm_offset >= 0 and data is not None:
+            if self._shm.should_use(len(data)):
+                # reuse the slot of the request, the main process frees it once it
+                # receives the response
+                return proto.InferenceResponse(
+                    request_id=msg.request_id,
+                    shm_offset=msg.shm_offset,
+                    shm_length=self._shm.write(msg.shm_offset, data),
+                )
+
+        return proto.InferenceResponse(request_id=msg.request_id, data=data)
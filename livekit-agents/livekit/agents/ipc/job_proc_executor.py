@@ -10,7 +10,7 @@ from typing import Any, Callable
 from ..job import JobContext, JobProcess, RunningJobInfo
 from ..log import logger
 from ..telemetry import metrics
-from ..utils import aio, log_exceptions, shortuuid
+from ..utils import aio, hw, log_exceptions, shortuuid
 from . import channel, proto
 from .inference_executor import InferenceExecutor
 from .job_executor import JobStatus
@@ -35,6 +35,7 @@ class ProcJobExecutor(SupervisedProc):
         http_proxy: str | None,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        memory_metric: hw.MemoryMetric = "rss",
     ) -> None:
         super().__init__(
             initialize_timeout=initialize_timeout,
@@ -47,6 +48,7 @@ class ProcJobExecutor(SupervisedProc):
             mp_ctx=mp_ctx,
             loop=loop,
             http_proxy=http_proxy,
+            memory_metric=memory_metric,
         )
 
         self._user_args: Any | None = None
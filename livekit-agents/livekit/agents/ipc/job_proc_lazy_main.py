@@ -23,7 +23,10 @@ if current_process().name == "job_proc":
 
 import asyncio
 import contextlib
+import contextvars
 import socket
+import time
+from collections.abc import Coroutine, Generator
 from dataclasses import dataclass
 from typing import Any, Callable, cast
 
@@ -44,10 +47,14 @@ from .proto import (
     InferenceRequest,
     InferenceResponse,
     InitializeRequest,
+    JobEnded,
+    JobUsage,
     ShutdownRequest,
     StartJobRequest,
 )
 
+JOB_USAGE_INTERVAL = 5.0
+
 
 @dataclass
 class ProcStartArgs:
@@ -56,6 +63,8 @@ class ProcStartArgs:
     mp_cch: socket.socket
     log_cch: socket.socket
     user_arguments: Any | None = None
+    executor_type: JobExecutorType = JobExecutorType.PROCESS
+    max_jobs: int = 1
 
 
 def proc_main(args: ProcStartArgs) -> None:
@@ -64,8 +73,9 @@ def proc_main(args: ProcStartArgs) -> None:
     job_proc = _JobProc(
         args.initialize_process_fnc,
         args.job_entrypoint_fnc,
-        JobExecutorType.PROCESS,
+        args.executor_type,
         args.user_arguments,
+        max_jobs=args.max_jobs,
     )
 
     client = _ProcClient(
@@ -88,7 +98,7 @@ class _InfClient(InferenceExecutor):
         self._client = proc_client
         self._active_requests: dict[str, asyncio.Future[InferenceResponse]] = {}
 
-    async def do_inference(self, method: str, data: bytes) -> bytes | None:
+    async def do_inference(self, method: str, data: bytes | memoryview) -> bytes | None:
         request_id = shortuuid("inference_job_")
         fut = asyncio.Future[InferenceResponse]()
 
@@ -102,7 +112,7 @@ class _InfClient(InferenceExecutor):
         if inf_resp.error:
             raise RuntimeError(f"inference of {method} failed: {inf_resp.error}")
 
-        return inf_resp.data
+        return bytes(inf_resp.data) if inf_resp.data is not None else None
 
     def _on_inference_response(self, resp: InferenceResponse) -> None:
         fut = self._active_requests.pop(resp.request_id, None)
@@ -120,6 +130,68 @@ class _ShutdownInfo:
     reason: str
 
 
+_RunningJobVar = contextvars.ContextVar["_RunningJob | None"]("agents_running_job", default=None)
+
+
+class _CpuTimedCoroutine(Coroutine[Any, Any, Any]):
+    """Wraps the coroutine of a task created by a job, the CPU time of each of its steps is
+    added to the job"""
+
+    def __init__(self, coro: Coroutine[Any, Any, Any], job: _RunningJob) -> None:
+        self._coro = coro
+        self._job = job
+
+    def send(self, value: Any) -> Any:
+        start = time.thread_time()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._job.cpu_time += time.thread_time() - start
+
+    def throw(self, *args: Any) -> Any:
+        start = time.thread_time()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._job.cpu_time += time.thread_time() - start
+
+    def close(self) -> None:
+        self._coro.close()
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self._coro.__await__()
+
+    def __getattr__(self, name: str) -> Any:
+        # cr_frame, cr_code, __qualname__... used by the repr and the stack of the task
+        return getattr(self._coro, name)
+
+
+def _install_cpu_accounting(loop: asyncio.AbstractEventLoop) -> None:
+    """Attribute the CPU time of the tasks of each job to it, using a task factory.
+
+    The tasks created by a job inherit the context of its job task (where _RunningJobVar is
+    set). Only the steps of the tasks are measured: the plain callbacks (call_soon, call_later,
+    transports and FFI events) run outside of any task and aren't attributed. It's an estimate
+    of the relative usage of the jobs of a shared process, not an exact accounting.
+    """
+    task_factory = loop.get_task_factory()
+
+    def _task_factory(
+        loop: asyncio.AbstractEventLoop, coro: Coroutine[Any, Any, Any], **kwargs: Any
+    ) -> asyncio.Future[Any]:
+        context = kwargs.get("context")
+        job = context.get(_RunningJobVar) if context is not None else _RunningJobVar.get()
+        if job is not None:
+            coro = _CpuTimedCoroutine(coro, job)
+
+        if task_factory is not None:
+            return task_factory(loop, coro, **kwargs)
+
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    loop.set_task_factory(_task_factory)  # type: ignore[arg-type]
+
+
 class _JobProc:
     def __init__(
         self,
@@ -127,20 +199,25 @@ class _JobProc:
         job_entrypoint_fnc: Callable[[JobContext], Any],
         executor_type: JobExecutorType,
         user_arguments: Any | None = None,
+        *,
+        max_jobs: int = 1,
     ) -> None:
         self._executor_type = executor_type
         self._user_arguments = user_arguments
         self._initialize_process_fnc = initialize_process_fnc
         self._job_entrypoint_fnc = job_entrypoint_fnc
-        self._job_task: asyncio.Task[None] | None = None
-
-        # used to warn users if both connect and shutdown are not called inside the job_entry
-        self._ctx_connect_called = False
-        self._ctx_shutdown_called = False
+        self._max_jobs = max_jobs
+        self._jobs: dict[str, _RunningJob] = {}
+        self._closing = False
 
     @property
     def has_running_job(self) -> bool:
-        return self._job_task is not None
+        return bool(self._jobs)
+
+    @property
+    def _shared(self) -> bool:
+        # a shared process runs several jobs and outlives them
+        return self._executor_type == JobExecutorType.SHARED_PROCESS
 
     def initialize(self, init_req: InitializeRequest, client: _ProcClient) -> None:
         self._client = client
@@ -155,36 +232,121 @@ class _JobProc:
     @log_exceptions(logger=logger)
     async def entrypoint(self, cch: aio.ChanReceiver[Message]) -> None:
         self._exit_proc_flag = asyncio.Event()
-        self._shutdown_fut: asyncio.Future[_ShutdownInfo] = asyncio.Future()
+        if self._shared:
+            _install_cpu_accounting(asyncio.get_running_loop())
 
         @log_exceptions(logger=logger)
         async def _read_ipc_task() -> None:
             async for msg in cch:
                 if isinstance(msg, StartJobRequest):
-                    if self.has_running_job:
-                        logger.warning("trying to start a new job while one is already running")
+                    if len(self._jobs) >= self._max_jobs:
+                        logger.warning(
+                            "trying to start a new job while one is already running"
+                            if self._max_jobs == 1
+                            else "trying to start a new job while the process is full",
+                            extra={"max_jobs": self._max_jobs},
+                        )
                         continue
 
                     self._start_job(msg)
                 if isinstance(msg, ShutdownRequest):
+                    shutdown_info = _ShutdownInfo(reason=msg.reason, user_initiated=False)
+                    if msg.job_id:
+                        if job := self._jobs.get(msg.job_id):
+                            job.shutdown(shutdown_info)
+                        continue
+
+                    self._closing = True
                     if not self.has_running_job:
                         self._exit_proc_flag.set()
                         break  # exit immediately
 
-                    with contextlib.suppress(asyncio.InvalidStateError):
-                        self._shutdown_fut.set_result(
-                            _ShutdownInfo(reason=msg.reason, user_initiated=False)
-                        )
+                    for job in self._jobs.values():
+                        job.shutdown(shutdown_info)
 
                 if isinstance(msg, InferenceResponse):
                     self._inf_client._on_inference_response(msg)
 
-        read_task = asyncio.create_task(_read_ipc_task(), name="job_ipc_read")
+        @log_exceptions(logger=logger)
+        async def _job_usage_task() -> None:
+            interval = aio.interval(JOB_USAGE_INTERVAL)
+            while True:
+                await interval.tick()
+                if self._jobs:
+                    await self._client.send(
+                        JobUsage(
+                            cpu_times={job_id: job.cpu_time for job_id, job in self._jobs.items()}
+                        )
+                    )
+
+        tasks = [asyncio.create_task(_read_ipc_task(), name="job_ipc_read")]
+        if self._shared:
+            tasks.append(asyncio.create_task(_job_usage_task(), name="job_usage"))
 
         await self._exit_proc_flag.wait()
-        await aio.cancel_and_wait(read_task)
+        await aio.cancel_and_wait(*tasks)
 
     def _start_job(self, msg: StartJobRequest) -> None:
+        job = _RunningJob(
+            job_proc=self._job_proc,
+            info=msg,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            client=self._client,
+            inf_client=self._inf_client,
+            notify_exiting=not self._shared,
+        )
+        self._jobs[job.id] = job
+
+        def _job_done_cb(task: asyncio.Task[None]) -> None:
+            self._jobs.pop(job.id, None)
+            if not task.cancelled() and (exc := task.exception()):
+                logger.error("error while running the job", exc_info=exc)
+                job.error = job.error or repr(exc)
+
+            if not self._shared:
+                self._exit_proc_flag.set()
+                return
+
+            ended_task = asyncio.create_task(self._send_job_ended(job))
+            if self._closing and not self._jobs:
+                ended_task.add_done_callback(lambda _: self._exit_proc_flag.set())
+
+        job.task.add_done_callback(_job_done_cb)
+
+    @log_exceptions(logger=logger)
+    async def _send_job_ended(self, job: _RunningJob) -> None:
+        await self._client.send(
+            JobEnded(
+                job_id=job.id, reason=job.shutdown_reason, cpu_time=job.cpu_time, error=job.error
+            )
+        )
+
+
+class _RunningJob:
+    """a job running in the current process, a shared process runs several of them"""
+
+    def __init__(
+        self,
+        *,
+        job_proc: JobProcess,
+        info: StartJobRequest,
+        job_entrypoint_fnc: Callable[[JobContext], Any],
+        client: _ProcClient,
+        inf_client: _InfClient,
+        notify_exiting: bool,
+    ) -> None:
+        self._client = client
+        self._job_entrypoint_fnc = job_entrypoint_fnc
+        self._notify_exiting = notify_exiting
+        self._shutdown_fut: asyncio.Future[_ShutdownInfo] = asyncio.Future()
+        self.shutdown_reason = ""
+        self.cpu_time = 0.0
+        self.error = ""  # set when the entrypoint or the job task raised
+
+        # used to warn users if both connect and shutdown are not called inside the job_entry
+        self._ctx_connect_called = False
+        self._ctx_shutdown_called = False
+
         if cli.CLI_ARGUMENTS is not None and cli.CLI_ARGUMENTS.console:
             from .mock_room import create_mock_room
 
@@ -194,37 +356,35 @@ class _JobProc:
 
         @self._room.on("disconnected")
         def _on_room_disconnected(*args: Any) -> None:
-            with contextlib.suppress(asyncio.InvalidStateError):
-                self._shutdown_fut.set_result(
-                    _ShutdownInfo(user_initiated=False, reason="room disconnected")
-                )
+            self.shutdown(_ShutdownInfo(user_initiated=False, reason="room disconnected"))
 
         def _on_ctx_connect() -> None:
             self._ctx_connect_called = True
 
         def _on_ctx_shutdown(reason: str) -> None:
             self._ctx_shutdown_called = True
+            self.shutdown(_ShutdownInfo(user_initiated=True, reason=reason))
 
-            with contextlib.suppress(asyncio.InvalidStateError):
-                self._shutdown_fut.set_result(_ShutdownInfo(user_initiated=True, reason=reason))
-
-        self._room._info.name = msg.running_job.job.room.name
+        self._room._info.name = info.running_job.job.room.name
 
         self._job_ctx = JobContext(
-            proc=self._job_proc,
-            info=msg.running_job,
+            proc=job_proc,
+            info=info.running_job,
             room=self._room,
             on_connect=_on_ctx_connect,
             on_shutdown=_on_ctx_shutdown,
-            inference_executor=self._inf_client,
+            inference_executor=inf_client,
         )
 
-        self._job_task = asyncio.create_task(self._run_job_task(), name="job_task")
+        self.id = info.running_job.job.id
+        # the tasks created by the job inherit the context of its task
+        ctx = contextvars.copy_context()
+        ctx.run(_RunningJobVar.set, self)
+        self.task = ctx.run(asyncio.create_task, self._run_job_task(), name="job_task")
 
-        def _exit_proc_cb(_: asyncio.Task[None]) -> None:
-            self._exit_proc_flag.set()
-
-        self._job_task.add_done_callback(_exit_proc_cb)
+    def shutdown(self, info: _ShutdownInfo) -> None:
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._shutdown_fut.set_result(info)
 
     async def _run_job_task(self) -> None:
         job_ctx_token = _JobContextVar.set(self._job_ctx)
@@ -263,6 +423,7 @@ class _JobProc:
                     "unhandled exception while running the job task",
                     exc_info=t.exception(),
                 )
+                self.error = repr(t.exception())
             elif not self._ctx_connect_called and not self._ctx_shutdown_called:
                 if cli.CLI_ARGUMENTS is not None and cli.CLI_ARGUMENTS.console:
                     return
@@ -275,6 +436,7 @@ class _JobProc:
         job_entry_task.add_done_callback(log_exception)
 
         shutdown_info = await self._shutdown_fut
+        self.shutdown_reason = shutdown_info.reason
         logger.debug(
             "shutting down job task",
             extra={
@@ -283,7 +445,8 @@ class _JobProc:
             },
         )
 
-        await self._client.send(Exiting(reason=shutdown_info.reason))
+        if self._notify_exiting:
+            await self._client.send(Exiting(reason=shutdown_info.reason))
         await self._room.disconnect()
 
         try:
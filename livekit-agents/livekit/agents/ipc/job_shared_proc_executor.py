@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing as mp
+import socket
+from collections.abc import Awaitable
+from multiprocessing.context import BaseContext
+from typing import Any, Callable
+
+from ..job import JobContext, JobExecutorType, JobProcess, RunningJobInfo
+from ..log import logger
+from ..telemetry import metrics
+from ..utils import aio, hw, log_exceptions, shortuuid
+from . import channel, proto
+from .inference_executor import InferenceExecutor
+from .job_executor import JobStatus
+from .job_proc_lazy_main import ProcStartArgs, proc_main
+from .supervised_proc import SupervisedProc
+
+
+class SharedJobProc(SupervisedProc):
+    """A job process running up to max_jobs jobs concurrently, as independent asyncio tasks.
+
+    Each job slot is reserved by a SharedProcJobExecutor, the process is closed once all the
+    slots are released.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_jobs: int,
+        initialize_process_fnc: Callable[[JobProcess], Any],
+        job_entrypoint_fnc: Callable[[JobContext], Awaitable[None]],
+        inference_executor: InferenceExecutor | None,
+        initialize_timeout: float,
+        close_timeout: float,
+        memory_warn_mb: float,
+        memory_limit_mb: float,
+        ping_interval: float,
+        ping_timeout: float,
+        high_ping_threshold: float,
+        http_proxy: str | None,
+        mp_ctx: BaseContext,
+        loop: asyncio.AbstractEventLoop,
+        memory_metric: hw.MemoryMetric = "rss",
+    ) -> None:
+        super().__init__(
+            initialize_timeout=initialize_timeout,
+            close_timeout=close_timeout,
+            memory_warn_mb=memory_warn_mb,
+            memory_limit_mb=memory_limit_mb,
+            ping_interval=ping_interval,
+            ping_timeout=ping_timeout,
+            high_ping_threshold=high_ping_threshold,
+            mp_ctx=mp_ctx,
+            loop=loop,
+            http_proxy=http_proxy,
+            memory_metric=memory_metric,
+        )
+
+        self._max_jobs = max_jobs
+        self._initialize_process_fnc = initialize_process_fnc
+        self._job_entrypoint_fnc = job_entrypoint_fnc
+        self._inference_executor = inference_executor
+        self._inference_tasks: set[asyncio.Task[None]] = set()
+        self._user_args: Any | None = None
+
+        self._slots: set[SharedProcJobExecutor] = set()
+        self._running_jobs: dict[str, SharedProcJobExecutor] = {}
+        self._initialize_atask: asyncio.Task[None] | None = None
+
+    @property
+    def available_slots(self) -> int:
+        return self._max_jobs - len(self._slots)
+
+    @property
+    def closing(self) -> bool:
+        return self._closing
+
+    def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process:
+        proc_args = ProcStartArgs(
+            initialize_process_fnc=self._initialize_process_fnc,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            log_cch=log_cch,
+            mp_cch=cch,
+            user_arguments=self._user_args,
+            executor_type=JobExecutorType.SHARED_PROCESS,
+            max_jobs=self._max_jobs,
+        )
+
+        return self._mp_ctx.Process(  # type: ignore
+            target=proc_main, args=(proc_args,), name="job_proc"
+        )
+
+    async def wait_initialized(self) -> None:
+        if self._initialize_atask is None:
+            self._initialize_atask = asyncio.create_task(self.initialize())
+
+        await asyncio.shield(self._initialize_atask)
+
+    async def launch_job(self, executor: SharedProcJobExecutor, info: RunningJobInfo) -> None:
+        self._running_jobs[info.job.id] = executor
+
+        start_req = proto.StartJobRequest()
+        start_req.running_job = info
+        await channel.asend_message(self._pch, start_req)
+
+    async def shutdown_job(self, job_id: str) -> None:
+        await channel.asend_message(self._pch, proto.ShutdownRequest(job_id=job_id))
+
+    @log_exceptions(logger=logger)
+    async def _main_task(self, ipc_ch: aio.ChanReceiver[channel.Message]) -> None:
+        try:
+            async for msg in ipc_ch:
+                if isinstance(msg, proto.InferenceRequest):
+                    task = asyncio.create_task(self._do_inference_task(msg))
+                    self._inference_tasks.add(task)
+                    task.add_done_callback(self._inference_tasks.discard)
+
+                if isinstance(msg, proto.JobUsage):
+                    for job_id, cpu_time in msg.cpu_times.items():
+                        if executor := self._running_jobs.get(job_id):
+                            executor._cpu_time = cpu_time
+
+                if isinstance(msg, proto.JobEnded):
+                    if executor := self._running_jobs.pop(msg.job_id, None):
+                        executor._on_job_ended(msg)
+        finally:
+            await aio.cancel_and_wait(*self._inference_tasks)
+
+    @log_exceptions(logger=logger)
+    async def _supervise_task(self) -> None:
+        try:
+            await super()._supervise_task()
+        finally:
+            # the jobs still running crashed with the process
+            self._closing = True
+            for executor in list(self._slots):
+                executor._on_proc_closed()
+
+    async def _do_inference_task(self, inf_req: proto.InferenceRequest) -> None:
+        if self._inference_executor is None:
+            logger.warning("inference request received but no inference executor")
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(
+                    request_id=inf_req.request_id, error="no inference executor"
+                ),
+            )
+            return
+
+        try:
+            inf_res = await self._inference_executor.do_inference(inf_req.method, inf_req.data)
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(request_id=inf_req.request_id, data=inf_res),
+            )
+        except Exception as e:
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(request_id=inf_req.request_id, error=str(e)),
+            )
+
+    def _on_memory_usage(self, usage: hw.MemoryUsage) -> None:
+        # the jobs can't be measured separately, each one keeps the peak of the process
+        # while it was running
+        for executor in self._running_jobs.values():
+            executor._update_memory_peak(usage)
+
+    def logging_extra(self) -> dict[str, Any]:
+        extra = super().logging_extra()
+        extra["shared"] = True
+        extra["jobs"] = len(self._running_jobs)
+        return extra
+
+
+class SharedJobProcs:
+    """The shared processes used by a ProcPool, a new one is started when the others are full"""
+
+    def __init__(self, create_proc: Callable[[], SharedJobProc]) -> None:
+        self._create_proc = create_proc
+        self._procs: list[SharedJobProc] = []
+        self._close_tasks: set[asyncio.Task[None]] = set()
+        self._lock = asyncio.Lock()
+
+    @property
+    def processes(self) -> list[SharedJobProc]:
+        return self._procs
+
+    async def acquire(self, executor: SharedProcJobExecutor) -> SharedJobProc:
+        """reserve a job slot for the executor"""
+        async with self._lock:
+            proc = next(
+                (p for p in self._procs if p.available_slots > 0 and not p.closing),
+                None,
+            )
+            if proc is None:
+                proc = self._create_proc()
+                proc._user_args = executor.user_arguments
+                await proc.start()
+                self._procs.append(proc)
+
+            proc._slots.add(executor)
+            return proc
+
+    def release(self, proc: SharedJobProc, executor: SharedProcJobExecutor) -> None:
+        proc._slots.discard(executor)
+        if proc._slots or proc not in self._procs:
+            return
+
+        self._procs.remove(proc)
+        task = asyncio.create_task(proc.aclose())
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def aclose(self) -> None:
+        """wait for the processes being closed"""
+        await asyncio.gather(*self._close_tasks)
+
+
+class SharedProcJobExecutor:
+    """Runs a job inside a SharedJobProc (JobExecutorType.SHARED_PROCESS)"""
+
+    def __init__(self, *, procs: SharedJobProcs, close_timeout: float) -> None:
+        self._procs = procs
+        self._close_timeout = close_timeout
+        self._proc: SharedJobProc | None = None
+
+        self._user_args: Any | None = None
+        self._job_status: JobStatus | None = None
+        self._running_job: RunningJobInfo | None = None
+        self._cpu_time = 0.0
+        self._memory_peak: hw.MemoryUsage | None = None
+        self._join_fut = asyncio.Future[None]()
+        self._id = shortuuid("SHEXEC_")
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def started(self) -> bool:
+        return self._proc is not None
+
+    @property
+    def pid(self) -> int | None:
+        """pid of the process running the job, shared with the other jobs of the process"""
+        return self._proc.pid if self._proc else None
+
+    @property
+    def status(self) -> JobStatus:
+        if self._job_status is None:
+            raise RuntimeError("job status not available")
+
+        return self._job_status
+
+    @property
+    def user_arguments(self) -> Any | None:
+        return self._user_args
+
+    @user_arguments.setter
+    def user_arguments(self, value: Any | None) -> None:
+        self._user_args = value
+
+    @property
+    def running_job(self) -> RunningJobInfo | None:
+        return self._running_job
+
+    @property
+    def cpu_time(self) -> float:
+        """CPU time used by the tasks of the job so far (updated every few seconds by the
+        process), an estimate: the callbacks running outside of the tasks aren't counted"""
+        return self._cpu_time
+
+    @property
+    def memory_peak(self) -> hw.MemoryUsage | None:
+        """high-water mark of the memory used by the process while the job was running,
+        including the other jobs of the process"""
+        return self._memory_peak
+
+    def _update_memory_peak(self, usage: hw.MemoryUsage) -> None:
+        self._memory_peak = usage if self._memory_peak is None else self._memory_peak.max(usage)
+
+    async def start(self) -> None:
+        if self.started:
+            raise RuntimeError("executor already started")
+
+        self._proc = await self._procs.acquire(self)
+
+    async def initialize(self) -> None:
+        if self._proc is None:
+            raise RuntimeError("executor not started")
+
+        await self._proc.wait_initialized()
+
+    async def join(self) -> None:
+        if not self.started:
+            raise RuntimeError("executor not started")
+
+        await asyncio.shield(self._join_fut)
+
+    async def aclose(self) -> None:
+        """shut down the job, unlike the process executor, the job can't be killed without
+        killing the other jobs of the process"""
+        if self._proc is None or self._join_fut.done():
+            return
+
+        if self._running_job is None:
+            self._release()
+            return
+
+        with contextlib.suppress(aio.duplex_unix.DuplexClosed):
+            await self._proc.shutdown_job(self._running_job.job.id)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(self._join_fut), timeout=self._close_timeout)
+        except asyncio.TimeoutError:
+            logger.error("job shutdown is taking too much time..", extra=self.logging_extra())
+            await asyncio.shield(self._join_fut)
+
+    async def launch_job(self, info: RunningJobInfo) -> None:
+        """start/assign a job to the executor"""
+        if self._running_job is not None:
+            raise RuntimeError("executor already has a running job")
+
+        if self._proc is None or not self._proc._initialize_fut.done():
+            raise RuntimeError("executor not initialized")
+
+        metrics.job_started()
+        self._job_status = JobStatus.RUNNING
+        self._running_job = info
+        await self._proc.launch_job(self, info)
+
+    def _on_job_ended(self, msg: proto.JobEnded) -> None:
+        metrics.job_ended()
+        self._job_status = JobStatus.FAILED if msg.error else JobStatus.SUCCESS
+        self._cpu_time = msg.cpu_time
+        logger.debug(
+            "job ended",
+            extra={
+                "reason": msg.reason,
+                "error": msg.error,
+                "cpu_time": round(msg.cpu_time, 2),
+                **self.logging_extra(),
+            },
+        )
+        self._release()
+
+    def _on_proc_closed(self) -> None:
+        if self._job_status == JobStatus.RUNNING:
+            metrics.job_ended()
+            self._job_status = JobStatus.FAILED
+
+        self._release()
+
+    def _release(self) -> None:
+        if self._proc is not None:
+            self._procs.release(self._proc, self)
+
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._join_fut.set_result(None)
+
+    def logging_extra(self) -> dict[str, Any]:
+        extra: dict[str, Any] = {"pid": self.pid}
+        if self._running_job:
+            extra["job_id"] = self._running_job.job.id
+
+        return extra
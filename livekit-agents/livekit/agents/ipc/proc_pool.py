@@ -2,16 +2,23 @@ from __future__ import annotations
 
 import asyncio
 import math
+import time
 from collections.abc import Awaitable
 from multiprocessing.context import BaseContext
-from typing import Any, Callable, Literal
+from typing import Any, Callable, Literal, Protocol
 
 from .. import utils
 from ..job import JobContext, JobExecutorType, JobProcess, RunningJobInfo
 from ..log import logger
-from ..utils import aio
+from ..telemetry import metrics
+from ..utils import aio, hw
 from ..utils.hw.cpu import get_cpu_monitor
-from . import inference_executor, job_proc_executor, job_thread_executor
+from . import (
+    inference_executor,
+    job_proc_executor,
+    job_shared_proc_executor,
+    job_thread_executor,
+)
 from .job_executor import JobExecutor
 
 EventTypes = Literal[
@@ -25,6 +32,102 @@ EventTypes = Literal[
 MAX_CONCURRENT_INITIALIZATIONS = min(math.ceil(get_cpu_monitor().cpu_count()), 4)
 
 
+class IdleProcessPolicy(Protocol):
+    """Decides how many idle processes the ProcPool keeps warm.
+
+    The timestamps are from time.monotonic(), passing them explicitly allows to replay an
+    arrival trace.
+    """
+
+    def on_job_launched(self, now: float) -> None: ...
+
+    def on_process_initialized(self, elapsed: float) -> None:
+        """Called with the time it took to start and initialize a new process"""
+        ...
+
+    def target_idle_processes(self, now: float, *, max_idle_processes: int) -> int:
+        """max_idle_processes is the limit set by the worker based on its available load"""
+        ...
+
+
+class FixedIdlePolicy:
+    """Always keep the maximum number of idle processes allowed by the worker"""
+
+    def on_job_launched(self, now: float) -> None:
+        pass
+
+    def on_process_initialized(self, elapsed: float) -> None:
+        pass
+
+    def target_idle_processes(self, now: float, *, max_idle_processes: int) -> int:
+        return max_idle_processes
+
+
+class PredictiveIdlePolicy:
+    """Keep enough idle processes to absorb the jobs arriving while a new process initializes.
+
+    The job arrival rate is an exponentially weighted moving average with a time constant of
+    `rate_time_constant` seconds, the initialization time is an EWMA of the measured
+    durations. The arrivals are treated as a Poisson process: the target covers the expected
+    number of jobs during an initialization plus `safety_factor` standard deviations.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_idle_processes: int = 1,
+        rate_time_constant: float = 60.0,
+        init_duration_smoothing: float = 0.2,
+        initial_init_duration: float = 2.0,
+        safety_factor: float = 1.0,
+    ) -> None:
+        self._min_idle_processes = min_idle_processes
+        self._rate_time_constant = rate_time_constant
+        self._init_duration_smoothing = init_duration_smoothing
+        self._init_duration = initial_init_duration
+        self._init_measured = False
+        self._safety_factor = safety_factor
+
+        self._rate = 0.0
+        self._rate_updated_at: float | None = None
+
+    @property
+    def init_duration(self) -> float:
+        return self._init_duration
+
+    def arrival_rate(self, now: float) -> float:
+        """Estimated job arrival rate in jobs/s"""
+        if self._rate_updated_at is None:
+            return 0.0
+
+        elapsed = max(now - self._rate_updated_at, 0.0)
+        return self._rate * math.exp(-elapsed / self._rate_time_constant)
+
+    def on_job_launched(self, now: float) -> None:
+        # each arrival adds an impulse that decays exponentially, the sum is the rate estimate
+        self._rate = self.arrival_rate(now) + 1.0 / self._rate_time_constant
+        self._rate_updated_at = now
+
+    def on_process_initialized(self, elapsed: float) -> None:
+        if not self._init_measured:
+            self._init_duration = elapsed
+            self._init_measured = True
+            return
+
+        alpha = self._init_duration_smoothing
+        self._init_duration = alpha * elapsed + (1 - alpha) * self._init_duration
+
+    def target_idle_processes(self, now: float, *, max_idle_processes: int) -> int:
+        rate = self.arrival_rate(now)
+        metrics.proc_pool_estimates_updated(arrival_rate=rate, init_duration=self._init_duration)
+
+        expected = rate * self._init_duration
+        demand = expected + self._safety_factor * math.sqrt(expected)
+        # ignore the residual demand of a decayed rate
+        target = max(math.ceil(demand - 0.01), self._min_idle_processes)
+        return min(target, max_idle_processes)
+
+
 class ProcPool(utils.EventEmitter[EventTypes]):
     def __init__(
         self,
@@ -41,6 +144,9 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         memory_limit_mb: float,
         http_proxy: str | None,
         loop: asyncio.AbstractEventLoop,
+        idle_process_policy: IdleProcessPolicy | None = None,
+        max_jobs_per_process: int = 1,
+        memory_metric: hw.MemoryMetric = "rss",
     ) -> None:
         super().__init__()
         self._job_executor_type = job_executor_type
@@ -53,9 +159,12 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         self._loop = loop
         self._memory_limit_mb = memory_limit_mb
         self._memory_warn_mb = memory_warn_mb
+        self._memory_metric = memory_metric
         self._default_num_idle_processes = num_idle_processes
         self._http_proxy = http_proxy
         self._target_idle_processes = num_idle_processes
+        self._idle_policy = idle_process_policy or FixedIdlePolicy()
+        self._idle_target = 0
 
         self._init_sem = asyncio.Semaphore(MAX_CONCURRENT_INITIALIZATIONS)
         self._warmed_proc_queue = asyncio.Queue[JobExecutor]()
@@ -68,6 +177,29 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         self._idle_ready = asyncio.Event()
         self._jobs_waiting_for_process = 0
 
+        self._shared_procs: job_shared_proc_executor.SharedJobProcs | None = None
+        if job_executor_type == JobExecutorType.SHARED_PROCESS:
+            self._shared_procs = job_shared_proc_executor.SharedJobProcs(
+                lambda: job_shared_proc_executor.SharedJobProc(
+                    max_jobs=max_jobs_per_process,
+                    initialize_process_fnc=self._initialize_process_fnc,
+                    job_entrypoint_fnc=self._job_entrypoint_fnc,
+                    initialize_timeout=self._initialize_timeout,
+                    close_timeout=self._close_timeout,
+                    inference_executor=self._inf_executor,
+                    mp_ctx=self._mp_ctx,
+                    loop=self._loop,
+                    ping_interval=2.5,
+                    ping_timeout=60,
+                    high_ping_threshold=0.5,
+                    # the jobs share the memory of the process
+                    memory_warn_mb=self._memory_warn_mb * max_jobs_per_process,
+                    memory_limit_mb=self._memory_limit_mb * max_jobs_per_process,
+                    http_proxy=self._http_proxy,
+                    memory_metric=self._memory_metric,
+                )
+            )
+
     @property
     def processes(self) -> list[JobExecutor]:
         return self._executors
@@ -83,9 +215,10 @@ class ProcPool(utils.EventEmitter[EventTypes]):
             return
 
         self._started = True
+        self._update_idle_target()
         self._main_atask = asyncio.create_task(self._main_task())
 
-        if self._default_num_idle_processes > 0:
+        if self._idle_target > 0:
             # wait for the idle processes to be warmed up (by the main task)
             await self._idle_ready.wait()
 
@@ -97,6 +230,7 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         await aio.cancel_and_wait(self._main_atask)
 
     async def launch_job(self, info: RunningJobInfo) -> None:
+        self._idle_policy.on_job_launched(time.monotonic())
         self._jobs_waiting_for_process += 1
         if (
             self._warmed_proc_queue.empty()
@@ -120,6 +254,19 @@ class ProcPool(utils.EventEmitter[EventTypes]):
     def target_idle_processes(self) -> int:
         return self._target_idle_processes
 
+    def _update_idle_target(self) -> None:
+        idle_target = self._idle_policy.target_idle_processes(
+            time.monotonic(),
+            max_idle_processes=min(self._target_idle_processes, self._default_num_idle_processes),
+        )
+        if idle_target != self._idle_target:
+            logger.debug(
+                "updating the number of idle processes",
+                extra={"previous": self._idle_target, "target": idle_target},
+            )
+            metrics.proc_pool_target_updated(target_idle=idle_target)
+            self._idle_target = idle_target
+
     @utils.log_exceptions(logger=logger)
     async def _proc_spawn_task(self) -> None:
         proc: JobExecutor
@@ -150,6 +297,11 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 memory_warn_mb=self._memory_warn_mb,
                 memory_limit_mb=self._memory_limit_mb,
                 http_proxy=self._http_proxy,
+                memory_metric=self._memory_metric,
+            )
+        elif self._shared_procs is not None:
+            proc = job_shared_proc_executor.SharedProcJobExecutor(
+                procs=self._shared_procs, close_timeout=self._close_timeout
             )
         else:
             raise ValueError(f"unsupported job executor: {self._job_executor_type}")
@@ -161,16 +313,18 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 return
 
             self.emit("process_created", proc)
+            start_time = time.perf_counter()
             await proc.start()
             self.emit("process_started", proc)
             try:
                 await proc.initialize()
                 # process where initialization times out will never fire "process_ready"
                 # neither be used to launch jobs
+                self._idle_policy.on_process_initialized(time.perf_counter() - start_time)
 
                 self.emit("process_ready", proc)
                 self._warmed_proc_queue.put_nowait(proc)
-                if self._warmed_proc_queue.qsize() >= self._default_num_idle_processes:
+                if self._warmed_proc_queue.qsize() >= self._idle_target:
                     self._idle_ready.set()
             except Exception:
                 logger.exception("error initializing process", extra=proc.logging_extra())
@@ -191,11 +345,9 @@ class ProcPool(utils.EventEmitter[EventTypes]):
     async def _main_task(self) -> None:
         try:
             while not self._closed:
+                self._update_idle_target()
                 current_pending = self._warmed_proc_queue.qsize() + len(self._spawn_tasks)
-                to_spawn = (
-                    min(self._target_idle_processes, self._default_num_idle_processes)
-                    - current_pending
-                )
+                to_spawn = self._idle_target - current_pending
 
                 for _ in range(to_spawn):
                     task = asyncio.create_task(self._proc_spawn_task())
@@ -207,3 +359,5 @@ class ProcPool(utils.EventEmitter[EventTypes]):
             await asyncio.gather(*[proc.aclose() for proc in self._executors])
             await asyncio.gather(*self._spawn_tasks)
             await asyncio.gather(*self._monitor_tasks)
+            if self._shared_procs is not None:
+                await self._shared_procs.aclose()
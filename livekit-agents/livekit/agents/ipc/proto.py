@@ -124,12 +124,15 @@ class ShutdownRequest:
 
     MSG_ID: ClassVar[int] = 5
     reason: str = ""
+    job_id: str = ""  # only shut down this job (shared job processes), empty = the whole process
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.reason)
+        channel.write_string(b, self.job_id)
 
     def read(self, b: io.BytesIO) -> None:
         self.reason = channel.read_string(b)
+        self.job_id = channel.read_string(b)
 
 
 @dataclass
@@ -153,17 +156,24 @@ class InferenceRequest:
     MSG_ID: ClassVar[int] = 7
     method: str = ""
     request_id: str = ""
-    data: bytes = b""
+    data: bytes | memoryview = b""
+    """a view of the received message once read, relayed to the inference process uncopied"""
+    shm_offset: int = -1
+    """offset of the data in the shared memory of the inference process, -1 when the data is
+    sent inline"""
+    shm_length: int = 0
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.method)
         channel.write_string(b, self.request_id)
         channel.write_bytes(b, self.data)
+        _write_shm_ref(b, self.shm_offset, self.shm_length)
 
     def read(self, b: io.BytesIO) -> None:
         self.method = channel.read_string(b)
         self.request_id = channel.read_string(b)
-        self.data = channel.read_bytes(b)
+        self.data = channel.read_bytes_view(b)
+        self.shm_offset, self.shm_length = _read_shm_ref(b)
 
 
 @dataclass
@@ -172,8 +182,12 @@ class InferenceResponse:
 
     MSG_ID: ClassVar[int] = 8
     request_id: str = ""
-    data: bytes | None = None
+    data: bytes | memoryview | None = None
+    """a view of the received message once read"""
     error: str = ""
+    shm_offset: int = -1
+    """the response data was written to the shared memory slot of the request"""
+    shm_length: int = 0
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.request_id)
@@ -181,13 +195,73 @@ class InferenceResponse:
         if self.data is not None:
             channel.write_bytes(b, self.data)
         channel.write_string(b, self.error)
+        _write_shm_ref(b, self.shm_offset, self.shm_length)
 
     def read(self, b: io.BytesIO) -> None:
         self.request_id = channel.read_string(b)
         has_data = channel.read_bool(b)
         if has_data:
-            self.data = channel.read_bytes(b)
+            self.data = channel.read_bytes_view(b)
         self.error = channel.read_string(b)
+        self.shm_offset, self.shm_length = _read_shm_ref(b)
+
+
+def _write_shm_ref(b: io.BytesIO, offset: int, length: int) -> None:
+    channel.write_bool(b, offset >= 0)
+    if offset >= 0:
+        channel.write_long(b, offset)
+        channel.write_long(b, length)
+
+
+def _read_shm_ref(b: io.BytesIO) -> tuple[int, int]:
+    if not channel.read_bool(b):
+        return -1, 0
+
+    return channel.read_long(b), channel.read_long(b)
+
+
+@dataclass
+class JobEnded:
+    """sent by a shared job process to the main process when one of its jobs is done, the
+    process keeps running the other jobs"""
+
+    MSG_ID: ClassVar[int] = 9
+    job_id: str = ""
+    reason: str = ""
+    cpu_time: float = 0.0  # seconds of CPU time spent by the tasks of this job
+    error: str = ""  # the exception raised by the job, empty if it succeeded
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.job_id)
+        channel.write_string(b, self.reason)
+        channel.write_double(b, self.cpu_time)
+        channel.write_string(b, self.error)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.job_id = channel.read_string(b)
+        self.reason = channel.read_string(b)
+        self.cpu_time = channel.read_double(b)
+        self.error = channel.read_string(b)
+
+
+@dataclass
+class JobUsage:
+    """periodically sent by a shared job process with the CPU time used by each of its jobs"""
+
+    MSG_ID: ClassVar[int] = 10
+    cpu_times: dict[str, float] = field(default_factory=dict)
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_int(b, len(self.cpu_times))
+        for job_id, cpu_time in self.cpu_times.items():
+            channel.write_string(b, job_id)
+            channel.write_double(b, cpu_time)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.cpu_times = {}
+        for _ in range(channel.read_int(b)):
+            job_id = channel.read_string(b)
+            self.cpu_times[job_id] = channel.read_double(b)
 
 
 IPC_MESSAGES = {
@@ -200,4 +274,6 @@ IPC_MESSAGES = {
     Exiting.MSG_ID: Exiting,
     InferenceRequest.MSG_ID: InferenceRequest,
     InferenceResponse.MSG_ID: InferenceResponse,
+    JobEnded.MSG_ID: JobEnded,
+    JobUsage.MSG_ID: JobUsage,
 }
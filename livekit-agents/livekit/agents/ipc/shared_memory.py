@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+from .channel import ZERO_COPY_THRESHOLD, Buffer
+
+DEFAULT_SLOT_SIZE = 256 * 1024
+
+
+class SlabAllocator:
+    """Fixed-size slots in a shared memory segment used to exchange inference payloads.
+
+    Only the process that created the segment allocates and frees slots, the other process
+    reads and writes the slot it was given, so no synchronization is needed besides the
+    messages sent over the IPC socket (which only carry the offsets and lengths).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, *, slot_size: int, owner: bool) -> None:
+        if shm.buf is None:
+            raise ValueError("the shared memory segment is closed")
+
+        self._shm = shm
+        self._buf = shm.buf
+        self._slot_size = slot_size
+        self._owner = owner
+        self._num_slots = shm.size // slot_size
+        # reversed so the first slots are allocated first
+        self._free_slots = list(reversed(range(self._num_slots)))
+
+    @classmethod
+    def create(cls, *, size: int, slot_size: int) -> SlabAllocator:
+        if size < slot_size:
+            raise ValueError("size must be at least slot_size")
+
+        shm = shared_memory.SharedMemory(create=True, size=size - size % slot_size)
+        return cls(shm, slot_size=slot_size, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, *, slot_size: int) -> SlabAllocator:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = _attach_untracked(name)
+
+        return cls(shm, slot_size=slot_size, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def slot_size(self) -> int:
+        return self._slot_size
+
+    def should_use(self, size: int) -> bool:
+        """Whether a payload of this size should be sent through shared memory, small payloads
+        are cheaper to send through the socket"""
+        return ZERO_COPY_THRESHOLD <= size <= self._slot_size
+
+    def alloc(self) -> int | None:
+        """Allocate a slot and return its offset, None if all the slots are in use"""
+        if not self._free_slots:
+            return None
+
+        return self._free_slots.pop() * self._slot_size
+
+    def free(self, offset: int) -> None:
+        self._free_slots.append(offset // self._slot_size)
+
+    def write(self, offset: int, data: Buffer) -> int:
+        view = memoryview(data).cast("B")
+        if view.nbytes > self._slot_size:
+            raise ValueError("data doesn't fit in a slot")
+
+        self._buf[offset : offset + view.nbytes] = view
+        return view.nbytes
+
+    def read(self, offset: int, length: int) -> bytes:
+        return bytes(self._buf[offset : offset + length])
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    # before 3.13 the attaching process registers the segment to its resource tracker like the
+    # creator did. with its own tracker, the segment is unlinked a second time when it exits (and
+    # reported as leaked), unregistering it would instead drop the registration of the creator
+    # when the tracker is shared. the registration is skipped, attach runs at the startup of the
+    # process before any other thread uses the resource tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
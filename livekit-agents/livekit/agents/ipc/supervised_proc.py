@@ -17,11 +17,27 @@ import psutil
 
 from ..log import logger
 from ..telemetry import metrics
-from ..utils import aio, log_exceptions, time_ms
+from ..utils import aio, hw, log_exceptions, time_ms
 from ..utils.aio import duplex_unix
 from . import channel, proto
 from .log_queue import LogQueueListener
 
+# the memory is sampled more often when it grows toward the warn/limit thresholds
+MEMORY_MIN_INTERVAL = 0.5
+MEMORY_MAX_INTERVAL = 5.0
+
+
+def _next_memory_check(memory_mb: float, growth_mb_s: float, thresholds: list[float]) -> float:
+    """Delay until the next memory sample, short enough to take a few samples before the
+    memory reaches the next threshold at the current growth rate."""
+    interval = MEMORY_MAX_INTERVAL
+    if growth_mb_s > 0:
+        for threshold in thresholds:
+            if threshold > memory_mb:
+                interval = min(interval, (threshold - memory_mb) / growth_mb_s / 4)
+
+    return max(interval, MEMORY_MIN_INTERVAL)
+
 
 @dataclass
 class _ProcOpts:
@@ -29,6 +45,7 @@ class _ProcOpts:
     close_timeout: float
     memory_warn_mb: float
     memory_limit_mb: float
+    memory_metric: hw.MemoryMetric
     ping_interval: float
     ping_timeout: float
     high_ping_threshold: float
@@ -49,6 +66,7 @@ class SupervisedProc(ABC):
         http_proxy: str | None,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        memory_metric: hw.MemoryMetric = "rss",
     ) -> None:
         self._loop = loop
         self._mp_ctx = mp_ctx
@@ -57,6 +75,7 @@ class SupervisedProc(ABC):
             close_timeout=close_timeout,
             memory_warn_mb=memory_warn_mb,
             memory_limit_mb=memory_limit_mb,
+            memory_metric=memory_metric,
             ping_interval=ping_interval,
             ping_timeout=ping_timeout,
             high_ping_threshold=high_ping_threshold,
@@ -65,6 +84,7 @@ class SupervisedProc(ABC):
 
         self._exitcode: int | None = None
         self._pid: int | None = None
+        self._memory_peak: hw.MemoryUsage | None = None
 
         self._supervise_atask: asyncio.Task[None] | None = None
         self._closing = False
@@ -94,6 +114,11 @@ class SupervisedProc(ABC):
     def started(self) -> bool:
         return self._supervise_atask is not None
 
+    @property
+    def memory_peak(self) -> hw.MemoryUsage | None:
+        """high-water mark of the memory used by the process (sampled by the memory monitor)"""
+        return self._memory_peak
+
     async def start(self) -> None:
         """start the supervised process"""
         if self.started:
@@ -272,17 +297,13 @@ class SupervisedProc(ABC):
         ping_task = asyncio.create_task(self._ping_pong_task(pong_timeout))
         read_ipc_task.add_done_callback(lambda _: ipc_ch.close())
 
-        memory_monitor_task: asyncio.Task[None] | None = None
-        if self._opts.memory_limit_mb > 0 or self._opts.memory_warn_mb > 0:
-            memory_monitor_task = asyncio.create_task(self._memory_monitor_task())
+        # always monitored to keep track of the memory peak, even without thresholds
+        memory_monitor_task = asyncio.create_task(self._memory_monitor_task())
 
         await self._join_fut
         self._exitcode = self._proc.exitcode
         self._proc.close()
-        await aio.cancel_and_wait(ping_task, read_ipc_task, main_task)
-
-        if memory_monitor_task is not None:
-            await aio.cancel_and_wait(memory_monitor_task)
+        await aio.cancel_and_wait(ping_task, read_ipc_task, main_task, memory_monitor_task)
 
         with contextlib.suppress(duplex_unix.DuplexClosed):
             await self._pch.aclose()
@@ -348,19 +369,39 @@ class SupervisedProc(ABC):
         finally:
             await aio.cancel_and_wait(*tasks)
 
+    def _on_memory_usage(self, usage: hw.MemoryUsage) -> None:  # noqa: B027
+        """called by the memory monitor after each sample"""
+        pass
+
     @log_exceptions(logger=logger)
     async def _memory_monitor_task(self) -> None:
         """Monitor memory usage and kill the process if it exceeds the limit."""
+        metric = self._opts.memory_metric
+        thresholds = [t for t in (self._opts.memory_warn_mb, self._opts.memory_limit_mb) if t > 0]
+        last_sample: tuple[float, float] | None = None  # (time, memory_mb)
+        # start fast and back off while the memory is stable, so the growth rate is known
+        # early in the life of the process
+        last_interval = MEMORY_MIN_INTERVAL / 2
+
         while not self._closing and not self._kill_sent:
+            interval = MEMORY_MAX_INTERVAL
             try:
                 if not self._pid:
-                    await asyncio.sleep(5)
+                    await asyncio.sleep(interval)
                     continue
 
-                # get process memory info
-                process = psutil.Process(self._pid)
-                memory_info = process.memory_info()
-                memory_mb = memory_info.rss / (1024 * 1024)  # Convert to MB
+                usage = hw.get_memory_usage(self._pid)
+                self._memory_peak = (
+                    usage if self._memory_peak is None else self._memory_peak.max(usage)
+                )
+                self._on_memory_usage(usage)
+
+                now = time.monotonic()
+                memory_mb = usage.get(metric) / (1024 * 1024)  # Convert to MB
+                growth_mb_s = 0.0
+                if last_sample is not None and now > last_sample[0]:
+                    growth_mb_s = (memory_mb - last_sample[1]) / (now - last_sample[0])
+                last_sample = (now, memory_mb)
 
                 if self._opts.memory_limit_mb > 0 and memory_mb > self._opts.memory_limit_mb:
                     logger.error(
@@ -368,6 +409,7 @@ class SupervisedProc(ABC):
                         extra={
                             "memory_usage_mb": memory_mb,
                             "memory_limit_mb": self._opts.memory_limit_mb,
+                            "memory_metric": metric,
                             **self.logging_extra(),
                         },
                     )
@@ -379,10 +421,15 @@ class SupervisedProc(ABC):
                             "memory_usage_mb": memory_mb,
                             "memory_warn_mb": self._opts.memory_warn_mb,
                             "memory_limit_mb": self._opts.memory_limit_mb,
+                            "memory_metric": metric,
                             **self.logging_extra(),
                         },
                     )
 
+                interval = min(
+                    _next_memory_check(memory_mb, growth_mb_s, thresholds), last_interval * 2
+                )
+                last_interval = interval
             except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
                 if self._closing or self._kill_sent:
                     return
@@ -403,7 +450,7 @@ class SupervisedProc(ABC):
                     extra=self.logging_extra(),
                 )
 
-            await asyncio.sleep(5)  # check every 5 seconds
+            await asyncio.sleep(interval)
 
     def logging_extra(self) -> dict[str, Any]:
         extra: dict[str, Any] = {
@@ -55,6 +55,9 @@ get_current_job_context = get_job_context
 class JobExecutorType(Enum):
     PROCESS = "process"
     THREAD = "thread"
+    SHARED_PROCESS = "shared_process"
+    """several jobs run as asyncio tasks inside the same process (see
+    WorkerOptions.max_jobs_per_process), for agents using little CPU and memory"""
 
 
 class AutoSubscribe(str, Enum):
@@ -39,6 +39,12 @@ class Plugin(ABC):  # noqa: B024
     def download_files(self) -> None:  # noqa: B027
         pass
 
+    # plugin can implement an optional preload_resources method, it is called inside the
+    # forkserver so the resources loaded with utils.shared_resource are shared copy-on-write
+    # by all the job processes
+    def preload_resources(self) -> None:  # noqa: B027
+        pass
+
     @property
     def package(self) -> str:
         return self._package
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import os
 
 import prometheus_client
@@ -20,6 +22,36 @@ CHILD_PROC_GAUGE = prometheus_client.Gauge(
     "lk_agents_child_process_count", "Total number of child processes", ["nodename"]
 )
 
+PROC_POOL_TARGET_IDLE_GAUGE = prometheus_client.Gauge(
+    "lk_agents_proc_pool_target_idle_processes",
+    "Number of idle processes the pool is keeping warm",
+    ["nodename"],
+)
+
+PROC_POOL_ARRIVAL_RATE_GAUGE = prometheus_client.Gauge(
+    "lk_agents_proc_pool_job_arrival_rate",
+    "Estimated job arrival rate (jobs/s) used to predict the idle processes needed",
+    ["nodename"],
+)
+
+PROC_POOL_INIT_DURATION_GAUGE = prometheus_client.Gauge(
+    "lk_agents_proc_pool_initialize_duration_seconds",
+    "Estimated time to initialize a process used to predict the idle processes needed",
+    ["nodename"],
+)
+
+DECODER_POOL_BUSY_GAUGE = prometheus_client.Gauge(
+    "lk_agents_decoder_pool_busy_workers",
+    "Number of audio decoder pool workers currently decoding",
+    ["nodename"],
+)
+
+DECODER_POOL_QUEUE_DELAY = prometheus_client.Histogram(
+    "lk_agents_decoder_pool_queue_delay_seconds",
+    "Time audio waits for a free decoder pool worker",
+    ["nodename"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1],
+)
 
 CHILD_PROC_GAUGE.labels(nodename=utils.nodename()).set_function(
     lambda: len(psutil.Process(os.getpid()).children(recursive=True))
@@ -36,3 +68,21 @@ def job_ended() -> None:
 
 def proc_initialized(*, time_elapsed: float) -> None:
     PROC_INITIALIZE_TIME.labels(nodename=utils.nodename()).observe(time_elapsed)
+
+
+def proc_pool_target_updated(*, target_idle: int) -> None:
+    PROC_POOL_TARGET_IDLE_GAUGE.labels(nodename=utils.nodename()).set(target_idle)
+
+
+def proc_pool_estimates_updated(*, arrival_rate: float, init_duration: float) -> None:
+    PROC_POOL_ARRIVAL_RATE_GAUGE.labels(nodename=utils.nodename()).set(arrival_rate)
+    PROC_POOL_INIT_DURATION_GAUGE.labels(nodename=utils.nodename()).set(init_duration)
+
+
+def decoder_task_started(*, queue_delay: float) -> None:
+    DECODER_POOL_QUEUE_DELAY.labels(nodename=utils.nodename()).observe(queue_delay)
+    DECODER_POOL_BUSY_GAUGE.labels(nodename=utils.nodename()).inc()
+
+
+def decoder_task_ended() -> None:
+    DECODER_POOL_BUSY_GAUGE.labels(nodename=utils.nodename()).dec()
@@ -2,7 +2,14 @@ from __future__ import annotations
 
 import re
 from functools import cache
-from typing import Any
+
+# the characters of the patterns, the other characters never match
+_SYMBOLS = ".abcdefghijklmnopqrstuvwxyz"
+_CODES = {c: i for i, c in enumerate(_SYMBOLS)}
+_SUFFIX = len(_SYMBOLS)  # the node of the longest suffix in the tree
+_OUTPUT = _SUFFIX + 1  # the index + 1 of the points of the node, 0 if none
+_STRIDE = _OUTPUT + 1
+_NO_DIGITS = str.maketrans("", "", "0123456789")
 
 
 # Frank Liang hyphenator. impl from https://github.com/jfinkels/hyphenate
@@ -10,9 +17,16 @@ from typing import Any
 # Users that want different languages or more advanced hyphenation should use the livekit-plugins-*
 class Hyphenator:
     def __init__(self, patterns: str, exceptions: str = "") -> None:
-        self.tree: dict[str | None, Any] = {}
+        # The tree of the patterns is flattened into a single list, each node is a slice of
+        # _STRIDE entries starting at its offset: the offsets of its children for each symbol
+        # (0 if none, the root is never a child), the offset of its suffix node, and the index
+        # of the points of the patterns ending at the node.
+        self._nodes = [0] * _STRIDE
+        self._points: list[dict[int, int]] = []
+        new_nodes: list[tuple[int, int, int, int]] = []
         for pattern in patterns.split():
-            self._insert_pattern(pattern)
+            self._insert_pattern(pattern, new_nodes)
+        self._link_nodes(sorted(new_nodes))
 
         self.exceptions = {}
         for ex in exceptions.split():
@@ -20,21 +34,55 @@ class Hyphenator:
             points = [0] + [int(h == "-") for h in re.split(r"[a-z]", ex)]
             self.exceptions[ex.replace("-", "")] = points
 
-    def _insert_pattern(self, pattern: str) -> None:
+    def _insert_pattern(self, pattern: str, new_nodes: list[tuple[int, int, int, int]]) -> None:
         # Convert the a pattern like 'a1bc3d4' into a string of chars 'abcd'
         # and a list of points [ 0, 1, 0, 3, 4 ].
-        chars = re.sub("[0-9]", "", pattern)
-        points = [int(d or 0) for d in re.split("[.a-z]", pattern)]
+        chars = pattern.translate(_NO_DIGITS)
+        points = [0]
+        for c in pattern:
+            if c in _CODES:
+                points.append(0)
+            else:
+                points[-1] = int(c)
+
+        # Insert the pattern into the tree, the new nodes are (depth, node, parent, code)
+        nodes = self._nodes
+        node = 0
+        for depth, c in enumerate(chars, 1):
+            child = nodes[node + _CODES[c]]
+            if not child:
+                child = len(nodes)
+                nodes.extend([0] * _STRIDE)
+                nodes[node + _CODES[c]] = child
+                new_nodes.append((depth, child, node, _CODES[c]))
+            node = child
+
+        # the points are relative to the position after the last char
+        self._points.append({j - len(chars): p for j, p in enumerate(points) if p})
+        nodes[node + _OUTPUT] = len(self._points)
 
-        # Insert the pattern into the tree. Each character finds a dict
-        # another level down in the tree, and leaf nodes have the list of
-        # points.
-        t = self.tree
-        for c in chars:
-            if c not in t:
-                t[c] = {}
-            t = t[c]
-        t[None] = points
+    def _link_nodes(self, new_nodes: list[tuple[int, int, int, int]]) -> None:
+        # Turn the tree into an Aho-Corasick automaton: each node links to the node of its
+        # longest suffix in the tree, and the points of the patterns ending at the suffixes are
+        # merged into the node. The word is then read only once instead of walking the tree
+        # from each of its chars. The suffixes are shorter, the nodes are linked by depth.
+        nodes, all_points = self._nodes, self._points
+        for _, node, parent, code in new_nodes:
+            suffix = 0
+            if parent:
+                suffix = nodes[parent + _SUFFIX]
+                while suffix and not nodes[suffix + code]:
+                    suffix = nodes[suffix + _SUFFIX]
+                suffix = nodes[suffix + code]
+            nodes[node + _SUFFIX] = suffix
+
+            if suffix_output := nodes[suffix + _OUTPUT]:
+                if output := nodes[node + _OUTPUT]:
+                    points = all_points[output - 1]
+                    for j, p in all_points[suffix_output - 1].items():
+                        points[j] = max(points.get(j, 0), p)
+                else:
+                    nodes[node + _OUTPUT] = suffix_output
 
     def hyphenate_word(self, word: str) -> list[str]:
         """Given a word, returns a list of pieces, broken at the possible
@@ -49,17 +97,21 @@ class Hyphenator:
         else:
             work = "." + word.lower() + "."
             points = [0] * (len(work) + 1)
-            for i in range(len(work)):
-                t = self.tree
-                for c in work[i:]:
-                    if c in t:
-                        t = t[c]
-                        if None in t:
-                            p = t[None]
-                            for j, p_j in enumerate(p):
-                                points[i + j] = max(points[i + j], p_j)
-                    else:
-                        break
+            nodes, all_points = self._nodes, self._points
+            node = 0
+            for i, c in enumerate(work, 1):
+                code = _CODES.get(c)
+                if code is None:
+                    node = 0  # no pattern goes over it
+                    continue
+
+                while node and not nodes[node + code]:
+                    node = nodes[node + _SUFFIX]
+                node = nodes[node + code]
+                if output := nodes[node + _OUTPUT]:
+                    for j, p in all_points[output - 1].items():
+                        if p > points[i + j]:
+                            points[i + j] = p
             # No hyphens in the first two chars or the last two.
             points[1] = points[2] = points[-2] = points[-3] = 0
 
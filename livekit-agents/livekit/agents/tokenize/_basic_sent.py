@@ -1,56 +1,115 @@
-import re
+from __future__ import annotations
 
+import re
+from typing import Callable
 
 # rule based segmentation based on https://stackoverflow.com/a/31505798, works surprisingly well
+#
+# The rules mark some periods as not ending a sentence (<prd>), the remaining periods and the
+# other punctuations end the sentences (<stop>). A rule only looks at a few characters around
+# a period, so the text is scanned once for the punctuations and most periods are classified
+# by _classify_period. The periods close to another one (acronyms, ellipses, "Ph.D.", "1.2.3")
+# or after a suffix ("Apple Inc. He") depend on the order of the rules, which are applied on a
+# small window around them by _apply_rules.
+
+_alphabets = r"([A-Za-z])"
+_prefixes = r"(Mr|St|Mrs|Ms|Dr)[.]"
+_suffixes = r"(Inc|Ltd|Jr|Sr|Co)"
+_starters = r"(Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever)"  # noqa: E501
+_acronyms = r"([A-Z][.][A-Z][.](?:[A-Z][.])?)"
+_websites = r"[.](com|net|org|io|gov|edu|me)"
+_digits = r"([0-9])"
+_multiple_dots = r"\.{2,}"
+
+# fmt: off
+_RULES: list[tuple[re.Pattern[str], str | Callable[[re.Match[str]], str]]] = [
+    (re.compile(_prefixes), "\\1<prd>"),
+    (re.compile(_websites), "<prd>\\1"),
+    (re.compile(_digits + "[.]" + _digits), "\\1<prd>\\2"),
+    # TODO(theomonnom): need improvement for ""..." dots", check capital + next sentence should not be  # noqa: E501
+    # small
+    (re.compile(_multiple_dots), lambda match: "<prd>" * len(match.group(0))),
+    (re.compile(r"Ph[.]D[.]"), "Ph<prd>D<prd>"),
+    (re.compile(r"\s" + _alphabets + "[.] "), " \\1<prd> "),
+    (re.compile(_acronyms + " " + _starters), "\\1<stop> \\2"),
+    (re.compile(_alphabets + "[.]" + _alphabets + "[.]" + _alphabets + "[.]"), "\\1<prd>\\2<prd>\\3<prd>"),  # noqa: E501
+    (re.compile(_alphabets + "[.]" + _alphabets + "[.]"), "\\1<prd>\\2<prd>"),
+    (re.compile(r" " + _suffixes + "[.] " + _starters), " \\1<stop> \\2"),  # removes the period
+    (re.compile(r" " + _suffixes + "[.]"), " \\1<prd>"),
+    (re.compile(r" " + _alphabets + "[.]"), " \\1<prd>"),
+]
+# fmt: on
+
+_punctuations = re.compile(r"[.!?。！？]")
+_punctuations_and_newlines = re.compile(r"[.!?。！？\n]")
+
+_LETTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+_DIGITS = frozenset("0123456789")
+_PREFIXES = frozenset(("Mr", "St", "Ms", "Dr"))
+_WEBSITES = frozenset(("com", "net", "org", "gov", "edu"))
+_SUFFIXES = frozenset((" Jr", " Sr", " Co"))
+_LONG_SUFFIXES = frozenset((" Inc", " Ltd"))
+
+# more than the characters a rule matches around a period
+_WINDOW_MARGIN = 16
+
+# states of the periods
+_STOP = 0
+_PRD = 1
+_REMOVED = 2
+_APPLY_RULES = 3  # the state depends on other periods
+
+
 def split_sentences(
     text: str, min_sentence_len: int = 20, retain_format: bool = False
 ) -> list[tuple[str, int, int]]:
     """
     the text may not contain substrings "<prd>" or "<stop>"
     """
-    alphabets = r"([A-Za-z])"
-    prefixes = r"(Mr|St|Mrs|Ms|Dr)[.]"
-    suffixes = r"(Inc|Ltd|Jr|Sr|Co)"
-    starters = r"(Mr|Mrs|Ms|Dr|Prof|Capt|Cpt|Lt|He\s|She\s|It\s|They\s|Their\s|Our\s|We\s|But\s|However\s|That\s|This\s|Wherever)"  # noqa: E501
-    acronyms = r"([A-Z][.][A-Z][.](?:[A-Z][.])?)"
-    websites = r"[.](com|net|org|io|gov|edu|me)"
-    digits = r"([0-9])"
-    multiple_dots = r"\.{2,}"
-
-    # fmt: off
-    if retain_format:
-        text = text.replace("\n","<nel><stop>")
-    else:
-        text = text.replace("\n"," ")
+    if not retain_format:
+        text = text.replace("\n", " ")
 
-    text = re.sub(prefixes,"\\1<prd>", text)
-    text = re.sub(websites,"<prd>\\1", text)
-    text = re.sub(digits + "[.]" + digits,"\\1<prd>\\2",text)
-    # text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)) + "<stop>", text)
-    # TODO(theomonnom): need improvement for ""..." dots", check capital + next sentence should not be  # noqa: E501
-    # small
-    text = re.sub(multiple_dots, lambda match: "<prd>" * len(match.group(0)), text)
-    if "Ph.D" in text:
-        text = text.replace("Ph.D.","Ph<prd>D<prd>")
-    text = re.sub(r"\s" + alphabets + "[.] "," \\1<prd> ",text)
-    text = re.sub(acronyms+" "+starters,"\\1<stop> \\2",text)
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>\\3<prd>",text)  # noqa: E501
-    text = re.sub(alphabets + "[.]" + alphabets + "[.]","\\1<prd>\\2<prd>",text)
-    text = re.sub(r" "+suffixes+"[.] "+starters," \\1<stop> \\2",text)
-    text = re.sub(r" "+suffixes+"[.]"," \\1<prd>",text)
-    text = re.sub(r" " + alphabets + "[.]"," \\1<prd>",text)
-
-    # mark end of sentence punctuations with <stop>
-    text = re.sub(r"([.!?。！？])([\"”])", "\\1\\2<stop>", text)
-    text = re.sub(r"([.!?。！？])(?![\"”])", "\\1<stop>", text)
-
-    text = text.replace("<prd>",".")
-    # fmt: on
+    stops: list[int] = []  # the sentences end before these indices
+    edits: dict[int, str] = {}  # removed periods, and whitespaces replaced by a space
 
-    if retain_format:
-        text = text.replace("<nel>", "\n")
-    splitted_sentences = text.split("<stop>")
-    text = text.replace("<stop>", "")
+    window_end = 0
+    window_states: dict[int, int] = {}
+    punctuations = _punctuations_and_newlines if retain_format else _punctuations
+    for m in punctuations.finditer(text):
+        i = m.start()
+        c = text[i]
+        if c == "\n":
+            stops.append(i + 1)
+            continue
+
+        if c == ".":
+            if i < window_end:
+                state = window_states[i]
+            else:
+                state = _classify_period(text, i, edits, retain_format=retain_format)
+                if state == _APPLY_RULES:
+                    window_start, window_end = _window(text, i)
+                    window_states = _apply_rules(
+                        text, window_start, window_end, stops, edits, retain_format=retain_format
+                    )
+                    state = window_states[i]
+
+            if state != _STOP:
+                continue
+
+        # end the sentence after the closing quote if any
+        if text[i + 1 : i + 2] in ('"', "”"):
+            stops.append(i + 2)
+        else:
+            stops.append(i + 1)
+
+    stops.sort()  # the stops of the windows may come before the ones of their punctuations
+    if edits:
+        splitted_sentences = _split_edited(text, stops, edits)
+        text_len = len(text) - sum(1 for e in edits.values() if not e)
+    else:
+        splitted_sentences = _split(text, stops)
+        text_len = len(text)
 
     sentences: list[tuple[str, int, int]] = []
 
@@ -74,6 +133,127 @@ def split_sentences(
             buff = ""
 
     if buff:
-        sentences.append((buff[len(pre_pad) :], start_pos, len(text) - 1))
+        sentences.append((buff[len(pre_pad) :], start_pos, text_len - 1))
 
     return sentences
+
+
+def _classify_period(text: str, i: int, edits: dict[int, str], *, retain_format: bool) -> int:
+    """the rules for a period with no other period close to it, in the order of _RULES"""
+    before = text[max(i - 4, 0) : i]
+    after = text[i + 1 : i + 4]
+    if "." in before[-2:] or "." in after[:2]:
+        return _APPLY_RULES
+
+    if after[:1] == " " and (before[-3:] in _SUFFIXES or before in _LONG_SUFFIXES):
+        return _APPLY_RULES  # "Apple Inc. He", the period is removed
+
+    if before[-2:] in _PREFIXES or before[-3:] == "Mrs":
+        return _PRD
+
+    if after in _WEBSITES or after[:2] in ("io", "me"):
+        return _PRD
+
+    prev_char, next_char = before[-1:], after[:1]
+    if prev_char in _DIGITS and next_char in _DIGITS:
+        return _PRD
+
+    if prev_char in _LETTERS and len(before) >= 2:
+        space = before[-2]
+        if space == " ":
+            return _PRD
+
+        # the newlines are markers when retaining the format
+        if next_char == " " and space.isspace() and not (retain_format and space == "\n"):
+            edits[i - 2] = " "
+            return _PRD
+
+    if before[-3:] in _SUFFIXES or before in _LONG_SUFFIXES:
+        return _PRD
+
+    return _STOP
+
+
+def _window(text: str, i: int) -> tuple[int, int]:
+    """bounds of a window around the period, no rule can match across them"""
+    first, last = i, i
+    while (p := text.rfind(".", max(first - _WINDOW_MARGIN, 0), first)) != -1:
+        first = p
+    while (p := text.find(".", last + 1, last + 1 + _WINDOW_MARGIN)) != -1:
+        last = p
+
+    return max(first - _WINDOW_MARGIN, 0), min(last + 1 + _WINDOW_MARGIN, len(text))
+
+
+def _apply_rules(
+    text: str,
+    start: int,
+    end: int,
+    stops: list[int],
+    edits: dict[int, str],
+    *,
+    retain_format: bool,
+) -> dict[int, int]:
+    """apply all the rules to text[start:end] and return the states of its periods"""
+    window = text[start:end]
+    if retain_format:
+        window = window.replace("\n", "\0")  # no rule matches the newline markers
+
+    marked = window
+    for pattern, repl in _RULES:
+        marked = pattern.sub(repl, marked)
+
+    # find the changes by walking the window and the marked text together
+    states: dict[int, int] = {}
+    j = 0
+    for k, c in enumerate(window):
+        while marked.startswith("<stop>", j):
+            stops.append(start + k)
+            j += 6
+
+        if c == ".":
+            if marked.startswith("<prd>", j):
+                states[start + k] = _PRD
+                j += 5
+            elif marked[j] == ".":
+                states[start + k] = _STOP
+                j += 1
+            else:
+                states[start + k] = _REMOVED
+                edits[start + k] = ""
+        else:
+            if marked[j] != c:
+                edits[start + k] = " "
+            j += 1
+
+    while marked.startswith("<stop>", j):
+        stops.append(end)
+        j += 6
+
+    return states
+
+
+def _split(text: str, stops: list[int]) -> list[str]:
+    pieces: list[str] = []
+    prev = 0
+    for stop in stops:
+        pieces.append(text[prev:stop])
+        prev = stop
+
+    pieces.append(text[prev:])
+    return pieces
+
+
+def _split_edited(text: str, stops: list[int], edits: dict[int, str]) -> list[str]:
+    chars = list(text)
+    for i, e in edits.items():
+        chars[i] = e
+
+    pieces: list[str] = []
+    prev = 0
+    for stop in stops:
+        pieces.append("".join(chars[prev:stop]))
+        prev = stop
+
+    pieces.append("".join(chars[prev:]))
+    return pieces
@@ -83,4 +83,5 @@ class SentenceTokenizer(tokenizer.SentenceTokenizer):
             ),
             min_token_len=self._config.min_sentence_len,
             min_ctx_len=self._config.stream_context_len,
+            boundary_chars=token_stream.SENTENCE_END_CHARS,
         )
@@ -10,6 +10,51 @@ from .tokenizer import SentenceStream, TokenData, WordStream
 # If the start and end indices are not available, we attempt to locate the token within the text using str.find.  # noqa: E501
 TokenizeCallable = Callable[[str], Union[list[str], list[tuple[str, int, int]]]]
 
+# characters that can end a sentence, the sentence tokenizers only split the text around them
+SENTENCE_END_CHARS = ".!?…。！？؟।\n"
+# number of non-whitespace characters after a sentence end that can change how it is split,
+# e.g. "Mr. Theo", "2.54", "U.S. However"
+SENTENCE_LOOKAHEAD = 32
+
+
+class _BoundaryScanner:
+    """Scans the text pushed to a stream for the characters where a tokenizer could split it.
+
+    Only the newly pushed text is examined, the tokenizer has to run again only when the
+    text contains a boundary character, or when it is pushed within the lookahead of the
+    last one. Otherwise the tokens of the buffer can't have changed.
+    """
+
+    def __init__(self, boundary_chars: str, lookahead: int) -> None:
+        self._boundary_chars = boundary_chars
+        self._lookahead = lookahead
+        self._ctx_left = 0  # non-whitespace characters until the last boundary is settled
+
+    def push(self, text: str) -> bool:
+        """whether the tokens may have changed"""
+        changed = self._ctx_left > 0
+        last = max(text.rfind(c) for c in self._boundary_chars)
+        if last >= 0:
+            changed = True
+            self._ctx_left = self._lookahead - _count_non_space(text, last + 1)
+        elif changed:
+            self._ctx_left -= _count_non_space(text, 0)
+
+        return changed
+
+    def settle(self, buf: str) -> None:
+        """the tokens were emitted, nothing is pending if the rest has no boundary character"""
+        buf = buf.lstrip()  # e.g. the newline after the last emitted sentence
+        if self._ctx_left > 0 and not any(c in buf for c in self._boundary_chars):
+            self._ctx_left = 0
+
+    def reset(self) -> None:
+        self._ctx_left = 0
+
+
+def _count_non_space(text: str, start: int) -> int:
+    return sum(not c.isspace() for c in text[start:])
+
 
 class BufferedTokenStream:
     def __init__(
@@ -19,6 +64,7 @@ class BufferedTokenStream:
         min_token_len: int,
         min_ctx_len: int,
         retain_format: bool = False,
+        boundary_chars: str | None = None,
     ) -> None:
         self._event_ch = aio.Chan[TokenData]()
         self._tokenize_fnc = tokenize_fnc
@@ -31,23 +77,37 @@ class BufferedTokenStream:
         self._in_buf = ""
         self._out_buf = ""
 
+        # without boundary characters, the text is tokenized again on every push
+        self._scanner = (
+            _BoundaryScanner(boundary_chars, SENTENCE_LOOKAHEAD) if boundary_chars else None
+        )
+        self._tokenize_pending = False
+
     @typing.no_type_check
     def push_text(self, text: str) -> None:
         self._check_not_closed()
         self._in_buf += text
 
-        if len(self._in_buf) < self._min_ctx_len:
+        if self._scanner is None or self._scanner.push(text):
+            self._tokenize_pending = True
+
+        if len(self._in_buf) < self._min_ctx_len or not self._tokenize_pending:
             return
 
+        self._tokenize_pending = False
+        emitted = False
         while True:
             tokens = self._tokenize_fnc(self._in_buf)
             if len(tokens) <= 1:
+                if self._scanner is not None and emitted:
+                    self._scanner.settle(self._in_buf)
                 break
 
             if self._out_buf:
                 self._out_buf += " "
 
             tok = tokens.pop(0)
+            emitted = True
             tok_text = tok
             if isinstance(tok, tuple):
                 tok_text = tok[0]
@@ -89,6 +149,9 @@ class BufferedTokenStream:
         self._current_segment_id = shortuuid()
         self._in_buf = ""
         self._out_buf = ""
+        self._tokenize_pending = False
+        if self._scanner is not None:
+            self._scanner.reset()
 
     def end_input(self) -> None:
         self.flush()
@@ -116,11 +179,20 @@ class BufferedSentenceStream(BufferedTokenStream, SentenceStream):
         tokenizer: TokenizeCallable,
         min_token_len: int,
         min_ctx_len: int,
+        boundary_chars: str | None = None,
     ) -> None:
+        """
+        Args:
+            boundary_chars: When set, the buffered text is only tokenized again once one of
+                these characters (and a few characters after it) was pushed. The tokenizer must
+                not end a sentence anywhere else, e.g. ``SENTENCE_END_CHARS`` for the built-in
+                tokenizers. By default, the text is tokenized again on every push.
+        """
         super().__init__(
             tokenize_fnc=tokenizer,
             min_token_len=min_token_len,
             min_ctx_len=min_ctx_len,
+            boundary_chars=boundary_chars,
         )
 
 
@@ -3,21 +3,32 @@ from __future__ import annotations
 import asyncio
 import time
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from .. import utils
 from ..log import logger
 from ..tokenize import SentenceStream, TokenData
 from .tts import AudioEmitter
 
+if TYPE_CHECKING:
+    from ..voice.transcription.normalization import TextNormalizer
+
 
 @dataclass
 class StreamPacerOptions:
     min_remaining_audio: float
     max_text_length: int
+    text_normalizer: TextNormalizer | None = None
 
 
 class SentenceStreamPacer:
-    def __init__(self, *, min_remaining_audio: float = 5.0, max_text_length: int = 300) -> None:
+    def __init__(
+        self,
+        *,
+        min_remaining_audio: float = 5.0,
+        max_text_length: int = 300,
+        text_normalizer: TextNormalizer | None = None,
+    ) -> None:
         """
         Controls the pacing of text sent to TTS. It buffers sentences and decides when to flush
         based on remaining audio duration. This may reduce waste from interruptions and improve
@@ -26,10 +37,14 @@ class SentenceStreamPacer:
         Args:
             min_remaining_audio: Minimum remaining audio duration (seconds) before sending next batch.
             max_text_length: Maximum text length sent to TTS at once.
+            text_normalizer: Normalizes each sentence before it is sent to TTS, see
+                ``livekit.agents.voice.transcription.normalization``. The transcripts aligned
+                by the TTS follow the normalized text.
         """
         self._options = StreamPacerOptions(
             min_remaining_audio=min_remaining_audio,
             max_text_length=max_text_length,
+            text_normalizer=text_normalizer,
         )
 
     def wrap(self, sent_stream: SentenceStream, audio_emitter: AudioEmitter) -> StreamPacerWrapper:
@@ -54,6 +69,8 @@ class StreamPacerWrapper(SentenceStream):
         self._closing = False
         self._input_ended = False
         self._sentences: list[str] = []
+        self._characters_saved = 0
+        self._characters_added = 0
         self._wakeup_event = asyncio.Event()
         self._wakeup_timer: asyncio.TimerHandle | None = None
 
@@ -61,6 +78,16 @@ class StreamPacerWrapper(SentenceStream):
         self._send_atask = asyncio.create_task(self._send_task())
         self._send_atask.add_done_callback(lambda _: self._event_ch.close())
 
+    @property
+    def characters_saved(self) -> int:
+        """Characters removed from the sentences by the text normalizer."""
+        return self._characters_saved
+
+    @property
+    def characters_added(self) -> int:
+        """Characters added to the sentences by the text normalizer (expanding rules)."""
+        return self._characters_added
+
     def push_text(self, text: str) -> None:
         self._sent_stream.push_text(text)
 
@@ -88,7 +115,17 @@ class StreamPacerWrapper(SentenceStream):
     async def _recv_task(self) -> None:
         try:
             async for ev in self._sent_stream:
-                self._sentences.append(ev.token)
+                sentence = ev.token
+                if self._options.text_normalizer:
+                    sentence = self._options.text_normalizer.normalize(sentence)
+                    if (saved := len(ev.token) - len(sentence)) >= 0:
+                        self._characters_saved += saved
+                    else:
+                        self._characters_added -= saved
+                    if not sentence:
+                        continue
+
+                self._sentences.append(sentence)
                 self._wakeup_event.set()
         finally:
             self._input_ended = True
@@ -148,7 +185,12 @@ class StreamPacerWrapper(SentenceStream):
                     self._event_ch.send_nowait(TokenData(token=text))
                     logger.debug(
                         "sent text to tts",
-                        extra={"text": text, "remaining_audio": remaining_audio},
+                        extra={
+                            "text": text,
+                            "remaining_audio": remaining_audio,
+                            "characters_saved": self._characters_saved,
+                            "characters_added": self._characters_added,
+                        },
                     )
                     generation_started = False
                     generation_stopped = False
@@ -9,6 +9,7 @@ from .log import log_exceptions
 from .misc import is_given, nodename, shortuuid, time_ms
 from .moving_average import MovingAverage
 from .participant import wait_for_participant, wait_for_track_publication
+from .shared_resource import shared_resource
 
 EventEmitter = rtc.EventEmitter
 
@@ -35,6 +36,7 @@ __all__ = [
     "ConnectionPool",
     "wait_for_participant",
     "wait_for_track_publication",
+    "shared_resource",
 ]
 
 # Cleanup docs of unexported modules
@@ -3,6 +3,10 @@ from __future__ import annotations
 import asyncio
 import socket
 import struct
+from collections.abc import Sequence
+from typing import Union
+
+Buffer = Union[bytes, bytearray, memoryview]
 
 
 class DuplexClosed(Exception):
@@ -51,6 +55,15 @@ class _AsyncDuplex:
         except OSError as e:
             raise DuplexClosed() from e
 
+    async def send_buffers(self, buffers: Sequence[Buffer]) -> None:
+        """Send the concatenation of buffers as a single message without joining them"""
+        try:
+            len_bytes = struct.pack("!I", sum(memoryview(b).nbytes for b in buffers))
+            self._writer.writelines([len_bytes, *buffers])
+            await self._writer.drain()
+        except OSError as e:
+            raise DuplexClosed() from e
+
     async def aclose(self) -> None:
         try:
             self._writer.close()
@@ -70,6 +83,34 @@ def _read_exactly(sock: socket.socket, num_bytes: int) -> bytes:
     return bytes(data)
 
 
+def _read_exactly_into(sock: socket.socket, num_bytes: int) -> bytearray:
+    data = bytearray(num_bytes)
+    view = memoryview(data)
+    offset = 0
+    while offset < num_bytes:
+        n = sock.recv_into(view[offset:])
+        if not n:
+            raise EOFError()
+        offset += n
+    return data
+
+
+def _send_all(sock: socket.socket, buffers: Sequence[Buffer]) -> None:
+    if not hasattr(sock, "sendmsg"):  # Windows
+        for b in buffers:
+            sock.sendall(b)
+        return
+
+    views = [memoryview(b).cast("B") for b in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= views[0].nbytes:
+            sent -= views[0].nbytes
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
+
+
 class _Duplex:
     def __init__(self, sock: socket.socket) -> None:
         self._sock: socket.socket | None = sock
@@ -89,6 +130,19 @@ class _Duplex:
         except (OSError, EOFError) as e:
             raise DuplexClosed() from e
 
+    def recv_buffer(self) -> bytearray:
+        """Like recv_bytes, but the message is read directly into a new bytearray (read it with
+        ipc.channel.MessageReader to keep it uncopied)"""
+        if self._sock is None:
+            raise DuplexClosed()
+
+        try:
+            len_bytes = _read_exactly(self._sock, 4)
+            len = struct.unpack("!I", len_bytes)[0]
+            return _read_exactly_into(self._sock, len)
+        except (OSError, EOFError) as e:
+            raise DuplexClosed() from e
+
     def send_bytes(self, data: bytes) -> None:
         if self._sock is None:
             raise DuplexClosed()
@@ -100,6 +154,17 @@ class _Duplex:
         except OSError as e:
             raise DuplexClosed() from e
 
+    def send_buffers(self, buffers: Sequence[Buffer]) -> None:
+        """Send the concatenation of buffers as a single message without joining them"""
+        if self._sock is None:
+            raise DuplexClosed()
+
+        try:
+            len_bytes = struct.pack("!I", sum(memoryview(b).nbytes for b in buffers))
+            _send_all(self._sock, [len_bytes, *buffers])
+        except OSError as e:
+            raise DuplexClosed() from e
+
     def detach(self) -> socket.socket:
         if self._sock is None:
             raise DuplexClosed()
@@ -101,22 +101,27 @@ class AudioByteStream:
         """
         self._buf.extend(data)
 
+        # the frames are read through an offset and the consumed data is removed once at
+        # the end, removing it after each frame made big pushes quadratic. rtc.AudioFrame
+        # copies sliced memoryviews, so the frames are bytearray slices of the buffer
         frames = []
-        while len(self._buf) >= self._bytes_per_frame:
-            frame_data = self._buf[: self._bytes_per_frame]
-            self._buf = self._buf[self._bytes_per_frame :]
-
-            frames.append(
-                rtc.AudioFrame(
-                    data=frame_data,
-                    sample_rate=self._sample_rate,
-                    num_channels=self._num_channels,
-                    samples_per_channel=len(frame_data) // self._bytes_per_sample,
-                )
-            )
+        offset = 0
+        while len(self._buf) - offset >= self._bytes_per_frame:
+            end = offset + self._bytes_per_frame
+            frames.append(self._new_frame(self._buf[offset:end]))
+            offset = end
 
+        del self._buf[:offset]
         return frames
 
+    def _new_frame(self, data: bytearray) -> rtc.AudioFrame:
+        return rtc.AudioFrame(
+            data=data,
+            sample_rate=self._sample_rate,
+            num_channels=self._num_channels,
+            samples_per_channel=len(data) // self._bytes_per_sample,
+        )
+
     write = push  # Alias for the push method.
 
     def flush(self) -> list[rtc.AudioFrame]:
@@ -138,19 +143,12 @@ class AudioByteStream:
         if len(self._buf) == 0:
             return []
 
-        if len(self._buf) % (2 * self._num_channels) != 0:
+        if len(self._buf) % self._bytes_per_sample != 0:
             logger.warning("AudioByteStream: incomplete frame during flush, dropping")
             return []
 
-        frames = [
-            rtc.AudioFrame(
-                data=self._buf.copy(),
-                sample_rate=self._sample_rate,
-                num_channels=self._num_channels,
-                samples_per_channel=len(self._buf) // 2,
-            )
-        ]
-        self._buf.clear()
+        frames = [self._new_frame(self._buf)]
+        self._buf = bytearray()
         return frames
 
     def clear(self) -> None:
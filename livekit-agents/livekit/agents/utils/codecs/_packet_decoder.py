@@ -0,0 +1,238 @@
+"""Push-based decoding of the compressed formats that don't need a demuxer.
+
+av.open() pulls its input from a blocking file-like object and holds a thread for the whole
+stream. Here the bytes are pushed as they arrive and split into packets by the codec parser
+(or by a minimal Ogg page reader for Opus), so a thread is only needed while there are
+bytes to decode.
+"""
+
+from __future__ import annotations
+
+import struct
+from abc import ABC, abstractmethod
+
+import av
+
+from ...log import logger
+
+# formats decoded with the ffmpeg parser of their codec
+_PARSED_CODECS = {"mp3": "mp3", "aac": "aac"}
+
+# delay added by the mp3 decoder on top of the encoder delay of the LAME/Info header
+_MP3_DECODER_DELAY = 528 + 1
+
+
+def probe(av_format: str | None, head: bytes | bytearray) -> bool | None:
+    """Whether the stream can be decoded by a PacketDecoder, None if more bytes are needed"""
+    if av_format in _PARSED_CODECS:
+        return True
+
+    if av_format != "ogg":
+        return False
+
+    # only Opus is decoded without the demuxer, the first packet identifies the codec
+    if len(head) < 27:
+        return None
+
+    if head[:4] != b"OggS":
+        return False
+
+    header_size = 27 + head[26]
+    if len(head) < header_size or len(head) < header_size + sum(head[27:header_size]):
+        return None
+
+    return head[header_size : header_size + 8] == b"OpusHead"
+
+
+def create(av_format: str) -> PacketDecoder:
+    if av_format == "ogg":
+        return _OggOpusDecoder()
+
+    if av_format == "mp3":
+        return _Mp3Decoder()
+
+    return _ParsedDecoder(_PARSED_CODECS[av_format])
+
+
+class PacketDecoder(ABC):
+    @abstractmethod
+    def decode(self, data: bytes) -> list[av.AudioFrame]: ...
+
+    @abstractmethod
+    def flush(self) -> list[av.AudioFrame]:
+        """decode the remaining data at the end of the stream"""
+        ...
+
+
+class _CodecDecoder(PacketDecoder):
+    def __init__(self, codec: str) -> None:
+        self._ctx = av.CodecContext.create(codec, "r")
+        self._skip_samples = 0
+
+    def _decode_packet(self, packet: av.Packet | None) -> list[av.AudioFrame]:
+        try:
+            frames: list[av.AudioFrame] = self._ctx.decode(packet)  # type: ignore
+        except av.error.InvalidDataError:
+            # like the demuxers, skip the corrupted packets instead of failing the stream
+            logger.debug("skipping invalid audio packet")
+            return []
+
+        while self._skip_samples and frames:
+            frame = frames[0]
+            if frame.samples <= self._skip_samples:
+                self._skip_samples -= frame.samples
+                frames.pop(0)
+                continue
+
+            array = frame.to_ndarray()
+            trimmed = av.AudioFrame.from_ndarray(
+                array[:, self._skip_samples * array.shape[1] // frame.samples :],
+                format=frame.format.name,
+                layout=frame.layout.name,
+            )
+            trimmed.sample_rate = frame.sample_rate
+            frames[0] = trimmed
+            self._skip_samples = 0
+
+        return frames
+
+
+class _ParsedDecoder(_CodecDecoder):
+    def decode(self, data: bytes) -> list[av.AudioFrame]:
+        frames = []
+        for packet in self._ctx.parse(data):
+            frames.extend(self._decode_packet(packet))
+        return frames
+
+    def flush(self) -> list[av.AudioFrame]:
+        frames = self.decode(b"")
+        frames.extend(self._decode_packet(None))
+        return frames
+
+
+class _Mp3Decoder(_ParsedDecoder):
+    def __init__(self) -> None:
+        super().__init__("mp3")
+        self._head = bytearray()  # start of the stream, until the ID3 tag is skipped
+        self._id3_remaining: int | None = None
+        self._first_packet = True
+
+    def decode(self, data: bytes) -> list[av.AudioFrame]:
+        if self._id3_remaining is None:
+            # the demuxer skips the ID3v2 tag, the parser doesn't
+            self._head += data
+            if len(self._head) < 10:
+                return []
+
+            self._id3_remaining = 0
+            if self._head[:3] == b"ID3":
+                size = 0
+                for b in self._head[6:10]:
+                    size = size << 7 | b & 0x7F
+                self._id3_remaining = 10 + size
+
+            data, self._head = bytes(self._head), bytearray()
+
+        if self._id3_remaining:
+            skipped = min(self._id3_remaining, len(data))
+            self._id3_remaining -= skipped
+            data = data[skipped:]
+
+        frames = []
+        for packet in self._ctx.parse(data):
+            if self._first_packet:
+                self._first_packet = False
+                encoder_delay = _mp3_encoder_delay(bytes(packet))
+                if encoder_delay is not None:
+                    # the Xing/Info frame only contains metadata (and decodes to silence)
+                    self._skip_samples = encoder_delay + _MP3_DECODER_DELAY
+                    continue
+
+            frames.extend(self._decode_packet(packet))
+
+        return frames
+
+
+def _mp3_encoder_delay(frame: bytes) -> int | None:
+    """The encoder delay from the LAME tag when the frame is a Xing/Info header, else None"""
+    for tag in (b"Xing", b"Info"):
+        offset = frame.find(tag, 0, 64)
+        if offset != -1:
+            break
+    else:
+        return None
+
+    (flags,) = struct.unpack(">I", frame[offset + 4 : offset + 8])
+    offset += 8
+    offset += 4 * bool(flags & 0x1) + 4 * bool(flags & 0x2)  # frames, bytes
+    offset += 100 * bool(flags & 0x4) + 4 * bool(flags & 0x8)  # toc, quality
+    delay = frame[offset + 21 : offset + 24]
+    if len(delay) < 3:
+        return 0
+
+    return delay[0] << 4 | delay[1] >> 4
+
+
+class _OggOpusDecoder(_CodecDecoder):
+    def __init__(self) -> None:
+        super().__init__("opus")
+        self._reader = _OggPacketReader()
+        self._headers = 0
+
+    def decode(self, data: bytes) -> list[av.AudioFrame]:
+        frames = []
+        for packet in self._reader.push(data):
+            if self._headers == 0:
+                # OpusHead, the decoder reads the channels from it
+                self._ctx.extradata = packet
+                (self._skip_samples,) = struct.unpack("<H", packet[10:12])  # pre-skip
+                self._headers += 1
+            elif self._headers == 1:
+                self._headers += 1  # OpusTags
+            else:
+                frames.extend(self._decode_packet(av.Packet(packet)))
+
+        return frames
+
+    def flush(self) -> list[av.AudioFrame]:
+        if self._headers < 2:
+            return []
+
+        return self._decode_packet(None)
+
+
+class _OggPacketReader:
+    """Extracts the packets of a single logical Ogg stream from the pushed pages"""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._packet = bytearray()  # packets can span several pages
+
+    def push(self, data: bytes) -> list[bytes]:
+        self._buf += data
+        packets = []
+        offset = 0
+        while len(self._buf) - offset >= 27:
+            if self._buf[offset : offset + 4] != b"OggS":
+                raise ValueError("invalid Ogg page")
+
+            header_end = offset + 27 + self._buf[offset + 26]
+            if len(self._buf) < header_end:
+                break
+
+            lacing = self._buf[offset + 27 : header_end]
+            if len(self._buf) < header_end + sum(lacing):
+                break
+
+            pos = header_end
+            for size in lacing:
+                self._packet += self._buf[pos : pos + size]
+                pos += size
+                if size < 255:
+                    packets.append(bytes(self._packet))
+                    self._packet.clear()
+
+            offset = pos
+
+        del self._buf[:offset]
+        return packets
@@ -15,12 +15,13 @@
 from __future__ import annotations
 
 import asyncio
-import io
 import struct
 import threading
+import time
+from collections import deque
 from collections.abc import AsyncIterator
 from concurrent.futures import ThreadPoolExecutor
-from typing import cast
+from typing import Callable, Literal, cast
 
 import av
 import av.container
@@ -30,6 +31,7 @@ from livekit import rtc
 from ...log import logger
 from .. import aio
 from ..audio import AudioByteStream
+from . import _packet_decoder
 
 
 def _mime_to_av_format(mime: str | None) -> str | None:
@@ -66,45 +68,92 @@ class StreamBuffer:
     """
     A thread-safe buffer that behaves like an IO stream.
     Allows writing from one thread and reading from another.
+
+    The written chunks are kept as they are and consumed through a read cursor, so each byte
+    is copied once when read whatever the size of the reads (PyAV reads 256 bytes at a time).
     """
 
     def __init__(self) -> None:
-        self._buffer = io.BytesIO()
+        self._chunks: deque[bytes] = deque()
+        self._offset = 0  # read cursor in the first chunk
+        self._size = 0  # unread bytes
         self._lock = threading.Lock()
         self._data_available = threading.Condition(self._lock)
         self._eof = False
+        self._closed = False
 
     def write(self, data: bytes) -> None:
         """Write data to the buffer from a writer thread."""
         with self._data_available:
-            self._buffer.seek(0, io.SEEK_END)
-            self._buffer.write(data)
-            self._data_available.notify_all()
+            if self._closed:
+                raise ValueError("write to a closed StreamBuffer")
+
+            if data:
+                self._chunks.append(bytes(data))
+                self._size += len(data)
+                self._data_available.notify_all()
 
     def read(self, size: int = -1) -> bytes:
         """Read data from the buffer in a reader thread."""
-
-        if self._buffer.closed:
+        if size == 0:
             return b""
 
         with self._data_available:
-            while True:
-                if self._buffer.closed:
-                    return b""
-                # always read from beginning
-                self._buffer.seek(0)
-                data = self._buffer.read(size)
+            if not self._wait_data():
+                return b""
 
-                if data:
-                    # shrink the buffer to remove already-read data
-                    remaining = self._buffer.read()
-                    self._buffer = io.BytesIO(remaining)
-                    return data
+            if size < 0 or size > self._size:
+                size = self._size
 
-                if self._eof:
-                    return b""
+            first = self._chunks[0]
+            if self._offset == 0 and len(first) == size:
+                self._consume(size)
+                return first  # no copy when the read matches the written chunk
+
+            out = bytearray(size)
+            self._copy_into(memoryview(out))
+            return bytes(out)
+
+    def readinto(self, buf: bytearray | memoryview) -> int:
+        """Read data into a pre-allocated buffer in a reader thread, returns the number of bytes
+        read (0 at the end of the stream)."""
+        with self._data_available:
+            if not self._wait_data():
+                return 0
 
-                self._data_available.wait()
+            view = memoryview(buf).cast("B")
+            return self._copy_into(view[: min(len(view), self._size)])
+
+    def _wait_data(self) -> bool:
+        while True:
+            if self._closed:
+                return False
+
+            if self._size:
+                return True
+
+            if self._eof:
+                return False
+
+            self._data_available.wait()
+
+    def _copy_into(self, out: memoryview) -> int:
+        pos = 0
+        while pos < len(out):
+            chunk = self._chunks[0]
+            n = min(len(chunk) - self._offset, len(out) - pos)
+            out[pos : pos + n] = memoryview(chunk)[self._offset : self._offset + n]
+            pos += n
+            self._consume(n)
+
+        return pos
+
+    def _consume(self, n: int) -> None:
+        self._offset += n
+        self._size -= n
+        if self._offset == len(self._chunks[0]):
+            self._chunks.popleft()
+            self._offset = 0
 
     def end_input(self) -> None:
         """Signal that no more data will be written."""
@@ -113,7 +162,119 @@ class StreamBuffer:
             self._data_available.notify_all()
 
     def close(self) -> None:
-        self._buffer.close()
+        with self._data_available:
+            self._closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._data_available.notify_all()
+
+
+class _WavParser:
+    """Incremental parser of the WAV header, returns the PCM data once the header is parsed"""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._riff_parsed = False
+        self._fmt_parsed = False
+        self._skip = 0  # bytes of the current chunk left to skip
+        self.header_parsed = False
+        self.sample_rate = 0
+        self.num_channels = 0
+
+    def push(self, data: bytes) -> bytes:
+        if self.header_parsed:
+            return data
+
+        self._buf += data
+        while not self.header_parsed:
+            if self._skip:
+                skipped = min(self._skip, len(self._buf))
+                del self._buf[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    return b""
+
+            if not self._riff_parsed:
+                if len(self._buf) < 12:
+                    return b""
+                if self._buf[:4] != b"RIFF" or self._buf[8:12] != b"WAVE":
+                    raise ValueError(
+                        f"Invalid WAV file: missing RIFF/WAVE: {bytes(self._buf[:12])!r}"
+                    )
+                del self._buf[:12]
+                self._riff_parsed = True
+                continue
+
+            if len(self._buf) < 8:
+                return b""
+
+            chunk_id, chunk_size = struct.unpack("<4sI", self._buf[:8])
+            if chunk_id == b"data":
+                if not self._fmt_parsed:
+                    raise ValueError("Invalid WAV file: data chunk before fmt chunk")
+                del self._buf[:8]
+                # the size of the data chunk is ignored, streamed WAVs don't know it
+                self.header_parsed = True
+                break
+
+            if chunk_id == b"fmt ":
+                if len(self._buf) < 8 + chunk_size:
+                    return b""
+                audio_format, channels, rate, _, _, bits_per_sample = struct.unpack(
+                    "<HHIIHH", self._buf[8:24]
+                )
+                if audio_format != 1:
+                    raise ValueError(f"Unsupported WAV audio format: {audio_format}")
+                if bits_per_sample != 16:
+                    raise ValueError(f"Unsupported WAV bits per sample: {bits_per_sample}")
+                self.sample_rate, self.num_channels = rate, channels
+                self._fmt_parsed = True
+
+            del self._buf[:8]
+            # chunks are padded to an even size
+            self._skip = chunk_size + chunk_size % 2
+
+        data, self._buf = bytes(self._buf), bytearray()
+        return data
+
+
+# wav: parsed inline in push(), no decoding needed
+# packet: decoded by tasks submitted to the pool when data is pushed (see _packet_decoder)
+# stream: demuxed by ffmpeg on a dedicated thread
+_DecodeMode = Literal["wav", "packet", "stream"]
+
+
+class _DecoderPool:
+    """Thread pool shared by the decoders of the process.
+
+    The decoders only submit a task when data was pushed, and the task returns once the
+    pushed data is decoded, so the number of concurrent streams isn't limited by the number
+    of workers.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, fnc: Callable[[], None]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="audio_decoder"
+                )
+
+        self._executor.submit(self._run, fnc, time.perf_counter())
+
+    @staticmethod
+    def _run(fnc: Callable[[], None], submitted_at: float) -> None:
+        from ...telemetry import metrics  # telemetry imports utils
+
+        metrics.decoder_task_started(queue_delay=time.perf_counter() - submitted_at)
+        try:
+            fnc()
+        finally:
+            metrics.decoder_task_ended()
 
 
 class AudioStreamDecoder:
@@ -121,10 +282,15 @@ class AudioStreamDecoder:
 
     Decoders are stateful, and it should not be reused across multiple streams. Each decoder
     is designed to decode a single stream.
+
+    WAV (16-bit PCM) is parsed and resampled inline in push(), on the calling event loop.
+    MP3, AAC (ADTS) and Ogg/Opus streams are decoded as the data is pushed by a pool shared
+    by all the decoders. The other formats are demuxed by ffmpeg, which reads its input
+    from a blocking stream and needs a thread for the whole stream.
     """
 
     _max_workers: int = 10
-    _executor: ThreadPoolExecutor | None = None
+    _pool: _DecoderPool | None = None
 
     def __init__(
         self,
@@ -144,26 +310,164 @@ class AudioStreamDecoder:
 
         self._output_ch = aio.Chan[rtc.AudioFrame]()
         self._closed = False
-        self._started = False
+        self._mode: _DecodeMode | None = None
+        self._head = bytearray()  # pushed data until the decoding mode is known
         self._input_buf = StreamBuffer()
         self._loop = asyncio.get_event_loop()
 
-        if self.__class__._executor is None:
-            # each decoder instance will submit jobs to the shared pool
-            self.__class__._executor = ThreadPoolExecutor(max_workers=self.__class__._max_workers)
+        # packet mode, the pushed data is decoded by tasks submitted to the pool
+        self._packet_decoder: _packet_decoder.PacketDecoder | None = None
+        self._resampler: av.AudioResampler | None = None
+        self._pending: list[bytes] = []
+        self._pending_lock = threading.Lock()
+        self._decode_scheduled = False
+        self._input_ended = False
+        self._decode_done = False
+
+        # wav mode
+        self._wav_parser = _WavParser()
+        self._wav_bstream: AudioByteStream | None = None  # rechunks the PCM in 100ms frames
+        self._wav_resampler: rtc.AudioResampler | None = None
+        self._wav_done = False
+
+        if self.__class__._pool is None:
+            self.__class__._pool = _DecoderPool(self.__class__._max_workers)
+
+    @property
+    def _started(self) -> bool:
+        return self._mode is not None
 
     def push(self, chunk: bytes) -> None:
-        self._input_buf.write(chunk)
-        if not self._started:
-            self._started = True
-            target = self._decode_wav_loop if self._av_format == "wav" else self._decode_loop
-            self._loop.run_in_executor(self.__class__._executor, target)
+        if self._mode is None:
+            self._head += chunk
+            mode = self._probe_mode(self._head, eof=False)
+            if mode is None:
+                return
+
+            chunk = bytes(self._head)
+            self._start(mode)
+
+        if self._mode == "wav":
+            self._push_wav(chunk)
+        elif self._mode == "packet":
+            with self._pending_lock:
+                self._pending.append(chunk)
+                self._schedule_decode()
+        else:
+            self._input_buf.write(chunk)
 
     def end_input(self) -> None:
-        self._input_buf.end_input()
-        if not self._started:
-            # if no data was pushed, close the output channel
-            self._output_ch.close()
+        if self._mode is None:
+            if not self._head:
+                # if no data was pushed, close the output channel
+                self._output_ch.close()
+                return
+
+            # the stream ended before the format could be probed
+            data = bytes(self._head)
+            mode = self._probe_mode(data, eof=True)
+            assert mode is not None
+            self._start(mode)
+            self.push(data)
+
+        if self._mode == "wav":
+            self._end_wav()
+        elif self._mode == "packet":
+            with self._pending_lock:
+                self._input_ended = True
+                self._schedule_decode()
+        else:
+            self._input_buf.end_input()
+
+    def _probe_mode(self, head: bytes | bytearray, *, eof: bool) -> _DecodeMode | None:
+        if self._av_format == "wav":
+            return "wav"
+
+        supported = _packet_decoder.probe(self._av_format, head)
+        if supported is None and not eof:
+            return None
+
+        return "packet" if supported else "stream"
+
+    def _start(self, mode: _DecodeMode) -> None:
+        self._head = bytearray()
+        self._mode = mode
+        if mode == "packet":
+            assert self._av_format is not None
+            self._packet_decoder = _packet_decoder.create(self._av_format)
+        elif mode == "stream":
+            threading.Thread(target=self._decode_loop, name="audio_decoder", daemon=True).start()
+
+    def _schedule_decode(self) -> None:
+        # must be called with _pending_lock held, one task at a time per decoder to keep
+        # the frames ordered
+        if self._decode_scheduled:
+            return
+
+        self._decode_scheduled = True
+        assert self.__class__._pool is not None
+        self.__class__._pool.submit(self._decode_pending)
+
+    def _decode_pending(self) -> None:
+        assert self._packet_decoder is not None
+        while True:
+            with self._pending_lock:
+                if self._decode_done or (not self._pending and not self._input_ended):
+                    self._pending.clear()
+                    self._decode_scheduled = False
+                    return
+
+                chunks, self._pending = self._pending, []
+                ended = self._input_ended
+
+            frames: list[rtc.AudioFrame] = []
+            try:
+                if not self._closed:
+                    av_frames = []
+                    for chunk in chunks:
+                        av_frames.extend(self._packet_decoder.decode(chunk))
+                    if ended:
+                        av_frames.extend(self._packet_decoder.flush())
+                    frames = self._resample(av_frames, flush=ended)
+            except Exception:
+                logger.exception("error decoding audio")
+                ended = True
+
+            if frames:
+                self._loop.call_soon_threadsafe(self._send_frames, frames)
+
+            if ended:
+                self._decode_done = True
+                self._loop.call_soon_threadsafe(self._output_ch.close)
+
+    def _resample(self, frames: list[av.AudioFrame], *, flush: bool) -> list[rtc.AudioFrame]:
+        if self._resampler is None:
+            self._resampler = av.AudioResampler(
+                format="s16", layout=self._layout, rate=self._sample_rate
+            )
+
+        resampled = []
+        for frame in frames:
+            resampled.extend(self._resampler.resample(frame))
+        if flush:
+            resampled.extend(self._resampler.resample(None))
+
+        rtc_frames = []
+        for f in resampled:
+            nchannels = len(f.layout.channels)
+            rtc_frames.append(
+                rtc.AudioFrame(
+                    data=f.to_ndarray().tobytes(),
+                    num_channels=nchannels,
+                    sample_rate=int(f.sample_rate),
+                    samples_per_channel=int(f.samples / nchannels),
+                )
+            )
+        return rtc_frames
+
+    def _send_frames(self, frames: list[rtc.AudioFrame]) -> None:
+        for frame in frames:
+            self._output_ch.send_nowait(frame)
 
     def _decode_loop(self) -> None:
         container: av.container.InputContainer | None = None
@@ -229,97 +533,61 @@ class AudioStreamDecoder:
             if container:
                 container.close()
 
-    def _decode_wav_loop(self) -> None:
-        """Decode wav data from the buffer without ffmpeg, parse header and emit PCM frames.
-
-        This can be much faster than using ffmpeg, as we are emitting frames as quickly as possible.
-        """
+    def _push_wav(self, chunk: bytes) -> None:
+        if self._wav_done:
+            return
 
         try:
-            # parse RIFF header
-            header = b""
-            while len(header) < 12:
-                chunk = self._input_buf.read(12 - len(header))
-                if not chunk:
-                    raise ValueError("Invalid WAV file: incomplete header")
-                header += chunk
-            if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
-                raise ValueError(f"Invalid WAV file: missing RIFF/WAVE: {header!r}")
-
-            # parse fmt chunk
-            while True:
-                sub_header = self._input_buf.read(8)
-                if len(sub_header) < 8:
-                    raise ValueError("Invalid WAV file: incomplete fmt chunk header")
-                chunk_id, chunk_size = struct.unpack("<4sI", sub_header)
-                data = b""
-                remaining = chunk_size
-                while remaining > 0:
-                    part = self._input_buf.read(min(1024, remaining))
-                    if not part:
-                        raise ValueError("Invalid WAV file: incomplete fmt chunk data")
-                    data += part
-                    remaining -= len(part)
-                if chunk_id == b"fmt ":
-                    audio_format, wave_channels, wave_rate, _, _, bits_per_sample = struct.unpack(
-                        "<HHIIHH", data[:16]
-                    )
-                    if audio_format != 1:
-                        raise ValueError(f"Unsupported WAV audio format: {audio_format}")
-                    break
-
-            # parse data chunk
-            while True:
-                sub_header = self._input_buf.read(8)
-                if len(sub_header) < 8:
-                    raise ValueError("Invalid WAV file: incomplete data chunk header")
-                chunk_id, chunk_size = struct.unpack("<4sI", sub_header)
-                if chunk_id == b"data":
-                    break
-
-                # skip chunk data
-                to_skip = chunk_size
-                while to_skip > 0:
-                    skipped = self._input_buf.read(min(1024, to_skip))
-                    if not skipped:
-                        raise ValueError("Invalid WAV file: incomplete chunk while seeking data")
-                    to_skip -= len(skipped)
-
-            # now ready to decode
-            bstream = AudioByteStream(sample_rate=wave_rate, num_channels=wave_channels)
-            resampler = (
-                rtc.AudioResampler(
-                    input_rate=wave_rate, output_rate=self._sample_rate, num_channels=wave_channels
+            data = self._wav_parser.push(chunk)
+            if not data:
+                return
+
+            if self._wav_bstream is None:
+                self._wav_bstream = AudioByteStream(
+                    sample_rate=self._wav_parser.sample_rate,
+                    num_channels=self._wav_parser.num_channels,
                 )
-                if self._sample_rate is not None
-                else None
+
+            for frame in self._wav_bstream.push(data):
+                self._send_frames(self._resample_wav(frame))
+        except Exception:
+            logger.exception("error decoding wav")
+            self._wav_done = True
+            self._output_ch.close()
+
+    def _resample_wav(self, frame: rtc.AudioFrame | None) -> list[rtc.AudioFrame]:
+        if self._sample_rate is None:
+            return [frame] if frame else []
+
+        if self._wav_resampler is None:
+            self._wav_resampler = rtc.AudioResampler(
+                input_rate=self._wav_parser.sample_rate,
+                output_rate=self._sample_rate,
+                num_channels=self._wav_parser.num_channels,
             )
 
-            def resample_and_push(frame: rtc.AudioFrame) -> None:
-                if not resampler:
-                    self._loop.call_soon_threadsafe(self._output_ch.send_nowait, frame)
-                    return
+        if frame is None:
+            return self._wav_resampler.flush()
 
-                for resampled_frame in resampler.push(frame):
-                    self._loop.call_soon_threadsafe(
-                        self._output_ch.send_nowait,
-                        resampled_frame,
-                    )
+        return self._wav_resampler.push(frame)
 
-            while True:
-                chunk = self._input_buf.read(1024)
-                if not chunk:
-                    break
-                frames = bstream.push(chunk)
-                for rtc_frame in frames:
-                    resample_and_push(rtc_frame)
+    def _end_wav(self) -> None:
+        if self._wav_done:
+            return
+
+        self._wav_done = True
+        try:
+            if not self._wav_parser.header_parsed:
+                raise ValueError("Invalid WAV file: incomplete header")
 
-            for rtc_frame in bstream.flush():
-                resample_and_push(rtc_frame)
+            if self._wav_bstream is not None:
+                for frame in self._wav_bstream.flush():
+                    self._send_frames(self._resample_wav(frame))
+            self._send_frames(self._resample_wav(None))
         except Exception:
             logger.exception("error decoding wav")
         finally:
-            self._loop.call_soon_threadsafe(self._output_ch.close)
+            self._output_ch.close()
 
     def __aiter__(self) -> AsyncIterator[rtc.AudioFrame]:
         return self
@@ -1,10 +1,14 @@
 from .cpu import CGroupV2CPUMonitor, CPUMonitor, DefaultCPUMonitor, get_cpu_monitor
+from .memory import MemoryMetric, MemoryUsage, get_memory_usage
 
 __all__ = [
     "get_cpu_monitor",
     "CPUMonitor",
     "CGroupV2CPUMonitor",
     "DefaultCPUMonitor",
+    "MemoryMetric",
+    "MemoryUsage",
+    "get_memory_usage",
 ]
 
 # Cleanup docs of unexported modules
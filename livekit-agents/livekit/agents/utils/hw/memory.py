@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import sys
+from dataclasses import dataclass
+from typing import Literal
+
+import psutil
+
+MemoryMetric = Literal["rss", "pss", "uss"]
+"""RSS counts the pages shared with other processes (e.g. inherited copy-on-write from the
+forkserver) in full, PSS splits them between the processes and USS ignores them."""
+
+
+@dataclass
+class MemoryUsage:
+    """Memory used by a process, in bytes.
+
+    `unique` is the memory only mapped by this process (USS), `shared` the memory also mapped
+    by other processes, e.g. the pages inherited copy-on-write from the forkserver. `pss`
+    splits the shared pages evenly between the processes mapping them.
+    """
+
+    rss: int
+    pss: int
+    unique: int
+    shared: int
+
+    def get(self, metric: MemoryMetric) -> int:
+        if metric == "rss":
+            return self.rss
+        if metric == "pss":
+            return self.pss
+        return self.unique
+
+    def max(self, other: MemoryUsage) -> MemoryUsage:
+        """the peak of each field"""
+        return MemoryUsage(
+            rss=max(self.rss, other.rss),
+            pss=max(self.pss, other.pss),
+            unique=max(self.unique, other.unique),
+            shared=max(self.shared, other.shared),
+        )
+
+    def to_dict(self) -> dict[str, float]:
+        """the usage in MB, as reported by the worker"""
+        mb = 1024 * 1024
+        return {
+            "rss_mb": round(self.rss / mb, 2),
+            "pss_mb": round(self.pss / mb, 2),
+            "unique_mb": round(self.unique / mb, 2),
+            "shared_mb": round(self.shared / mb, 2),
+        }
+
+
+def parse_smaps_rollup(content: str) -> MemoryUsage:
+    fields: dict[str, int] = {}
+    for line in content.splitlines():
+        key, sep, value = line.partition(":")
+        parts = value.split()
+        if sep and len(parts) == 2 and parts[1] == "kB":
+            fields[key] = int(parts[0]) * 1024
+
+    return MemoryUsage(
+        rss=fields.get("Rss", 0),
+        pss=fields.get("Pss", 0),
+        unique=fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        shared=fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    )
+
+
+def get_memory_usage(pid: int | None = None) -> MemoryUsage:
+    """Memory usage of a process (the current one by default).
+
+    Reads /proc/<pid>/smaps_rollup on Linux, which is much cheaper than the full smaps used by
+    psutil, and falls back to psutil on the other platforms (where PSS isn't available and is
+    reported as the unique memory). When the unique memory can't be read either, every metric
+    is the RSS.
+
+    Raises psutil.NoSuchProcess if the process doesn't exist anymore and psutil.AccessDenied if
+    it belongs to another user.
+    """
+    if pid is None:
+        pid = os.getpid()
+
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                return parse_smaps_rollup(f.read())
+        except FileNotFoundError:
+            if not psutil.pid_exists(pid):
+                raise psutil.NoSuchProcess(pid) from None
+            # kernel older than 4.14, smaps_rollup isn't available
+        except PermissionError:
+            raise psutil.AccessDenied(pid) from None
+
+    process = psutil.Process(pid)
+    try:
+        info = process.memory_full_info()
+    except psutil.AccessDenied:
+        # e.g. on macOS, the USS of the child processes needs more privileges than their RSS
+        rss = process.memory_info().rss
+        return MemoryUsage(rss=rss, pss=rss, unique=rss, shared=0)
+
+    unique = getattr(info, "uss", info.rss)
+    return MemoryUsage(
+        rss=info.rss,
+        pss=getattr(info, "pss", unique),
+        unique=unique,
+        shared=max(info.rss - unique, 0),
+    )
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+_resources: dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def shared_resource(key: str, loader: Callable[[], T]) -> T:
+    """Load a resource once per process and return the cached value afterwards.
+
+    When loaded inside the forkserver (see Plugin.preload_resources), the resource is
+    inherited by every job process forked from it and its pages are shared copy-on-write
+    between them instead of being loaded again by each process. The value must therefore be
+    treated as read-only.
+    """
+    with _lock:
+        if key not in _resources:
+            _resources[key] = loader()
+
+        return _resources[key]  # type: ignore[no-any-return]
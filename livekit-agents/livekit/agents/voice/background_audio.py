@@ -4,8 +4,11 @@ import asyncio
 import atexit
 import contextlib
 import enum
+import os
 import random
-from collections.abc import AsyncGenerator, AsyncIterator, Generator
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterator, Generator, Iterator
 from importlib.resources import as_file, files
 from typing import Any, NamedTuple, Union, cast
 
@@ -60,6 +63,167 @@ class AudioConfig(NamedTuple):
 # Instead, we remove the sound from the mixer, and it will get removed 400ms later.
 _AUDIO_SOURCE_BUFFER_MS = 400
 
+_SAMPLE_RATE = 48000
+_NUM_CHANNELS = 1
+_CLIP_FRAME_SAMPLES = _SAMPLE_RATE // 10  # the blocksize of the mixer
+_CLIP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _ClipCache:
+    """Process-wide LRU cache of the decoded audio files played by the BackgroundAudioPlayers.
+
+    The clips are stored as 48kHz mono PCM split into frames, for each volume they are played
+    at, so playing (or looping) a cached clip doesn't decode or scale anything. A file is
+    identified by its path, modification time and size, a modified file is decoded again.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._size = 0
+        # (file key, volume) -> frames data
+        self._entries: OrderedDict[tuple[tuple[str, int, int], float], list[bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(path: str) -> tuple[str, int, int]:
+        st = os.stat(path)
+        return os.path.realpath(path), st.st_mtime_ns, st.st_size
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def get(self, key: tuple[str, int, int], volume: float) -> list[bytes] | None:
+        with self._lock:
+            frames = self._entries.get((key, volume))
+            if frames is not None:
+                self._entries.move_to_end((key, volume))
+                return frames
+
+            # the clip was decoded, only the volume differs
+            base = self._entries.get((key, 1.0))
+            if base is None:
+                return None
+
+            self._entries.move_to_end((key, 1.0))
+
+        frames = [_scale_volume(data, volume) for data in base]
+        self._put(key, volume, frames)
+        return frames
+
+    def put(self, key: tuple[str, int, int], pcm: bytes | bytearray) -> None:
+        """cache the decoded PCM of a file, played at full volume"""
+        frame_size = _CLIP_FRAME_SAMPLES * _NUM_CHANNELS * 2
+        self._put(
+            key, 1.0, [bytes(pcm[i : i + frame_size]) for i in range(0, len(pcm), frame_size)]
+        )
+
+    def _put(self, key: tuple[str, int, int], volume: float, frames: list[bytes]) -> None:
+        size = sum(len(data) for data in frames)
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            if (key, volume) in self._entries:
+                return
+
+            self._entries[(key, volume)] = frames
+            self._size += size
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= sum(len(data) for data in evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_clip_cache = _ClipCache(_CLIP_CACHE_MAX_BYTES)
+
+
+def _scale_volume(data: bytes | memoryview, volume: float) -> bytes:
+    scaled = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    scaled *= volume
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16).tobytes()
+
+
+def _add_frames(a: rtc.AudioFrame, b: rtc.AudioFrame) -> rtc.AudioFrame:
+    mixed = np.frombuffer(a.data, dtype=np.int16).astype(np.int32)
+    mixed += np.frombuffer(b.data, dtype=np.int16)
+    np.clip(mixed, -32768, 32767, out=mixed)
+    return rtc.AudioFrame(
+        data=mixed.astype(np.int16).tobytes(),
+        sample_rate=a.sample_rate,
+        num_channels=a.num_channels,
+        samples_per_channel=a.samples_per_channel,
+    )
+
+
+class _AmbientBus:
+    """An ambient loop shared by the BackgroundAudioPlayers of the process (shared_ambient=True)
+    playing the same file at the same volume.
+
+    The clip is decoded and scaled once, each player reads it at its own position, paced by its
+    AudioSource. The bus is kept until the last player using it is closed.
+    """
+
+    _buses: dict[tuple[tuple[str, int, int], float], _AmbientBus] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, key: tuple[tuple[str, int, int], float], pcm: bytes) -> None:
+        self._key = key
+        self._refs = 0
+        self._frame_size = _CLIP_FRAME_SAMPLES * _NUM_CHANNELS * 2
+        self._length = len(pcm)
+        # followed by its beginning, so frames can be read across the end of the loop
+        repeat = -(-self._frame_size // len(pcm))
+        self._pcm = pcm + (pcm * repeat)[: self._frame_size]
+
+    @classmethod
+    async def acquire(cls, file_path: str, volume: float) -> _AmbientBus:
+        file_key = _clip_cache.file_key(file_path)
+        with cls._lock:
+            if bus := cls._buses.get((file_key, volume)):
+                bus._refs += 1
+                return bus
+
+        frames = _clip_cache.get(file_key, volume)
+        if frames is None:
+            frames = [
+                bytes(frame.data.cast("B"))
+                async for frame in _decode_clip(file_path, file_key, volume)
+            ]
+
+        pcm = b"".join(frames)
+        if len(pcm) < 2 * _NUM_CHANNELS:
+            raise ValueError(f"no audio decoded from {file_path}")
+
+        with cls._lock:
+            # another player may have created it while the clip was decoded
+            bus = cls._buses.setdefault((file_key, volume), cls((file_key, volume), pcm))
+            bus._refs += 1
+            return bus
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs == 0:
+                self._buses.pop(self._key, None)
+
+    def frames(self) -> Iterator[rtc.AudioFrame]:
+        """the frames of the loop, from its beginning"""
+        pos = 0
+        while True:
+            yield rtc.AudioFrame(
+                data=self._pcm[pos : pos + self._frame_size],
+                sample_rate=_SAMPLE_RATE,
+                num_channels=_NUM_CHANNELS,
+                samples_per_channel=_CLIP_FRAME_SAMPLES,
+            )
+            pos = (pos + self._frame_size) % self._length
+
 
 class BackgroundAudioPlayer:
     def __init__(
@@ -70,6 +234,7 @@ class BackgroundAudioPlayer:
             AudioSource | AudioConfig | list[AudioConfig] | None
         ] = NOT_GIVEN,
         stream_timeout_ms: int = 200,
+        shared_ambient: bool = False,
     ) -> None:
         """
         Initializes the BackgroundAudio component with optional ambient and thinking sounds.
@@ -93,14 +258,29 @@ class BackgroundAudioPlayer:
                 The sound to be played when the associated agent enters a “thinking” state. This can be a single
                 sound source or a list of AudioConfig objects (with volume and probability settings).
 
+            shared_ambient (bool, optional):
+                Share the ambient sound with the other players of the process playing the same file at the
+                same volume. The ambient loop is prepared once for all of them and sent to the track without
+                going through the mixer of each player, only the other sounds (e.g. thinking) are mixed on
+                top of it. Only applies when the ambient sound is a file path or a BuiltinAudioClip.
+                Defaults to False.
+
         """  # noqa: E501
 
         self._ambient_sound = ambient_sound if is_given(ambient_sound) else None
         self._thinking_sound = thinking_sound if is_given(thinking_sound) else None
+        self._shared_ambient = shared_ambient
+        self._ambient_bus: _AmbientBus | None = None
 
-        self._audio_source = rtc.AudioSource(48000, 1, queue_size_ms=_AUDIO_SOURCE_BUFFER_MS)
+        self._audio_source = rtc.AudioSource(
+            _SAMPLE_RATE, _NUM_CHANNELS, queue_size_ms=_AUDIO_SOURCE_BUFFER_MS
+        )
         self._audio_mixer = rtc.AudioMixer(
-            48000, 1, blocksize=4800, capacity=1, stream_timeout_ms=stream_timeout_ms
+            _SAMPLE_RATE,
+            _NUM_CHANNELS,
+            blocksize=_CLIP_FRAME_SAMPLES,
+            capacity=1,
+            stream_timeout_ms=stream_timeout_ms,
         )
         self.publication: rtc.LocalTrackPublication | None = None
         self._lock = asyncio.Lock()
@@ -253,23 +433,37 @@ class BackgroundAudioPlayer:
 
             await self._publish_track()
 
-            self._mixer_atask = asyncio.create_task(self._run_mixer_task())
-            self._room.on("reconnected", self._on_reconnected)
-
-            if self._agent_session:
-                self._agent_session.on("agent_state_changed", self._agent_state_changed)
-
+            ambient: AudioConfig | None = None
             if self._ambient_sound:
                 normalized = self._normalize_sound_source(
                     cast(Union[AudioSource, AudioConfig, list[AudioConfig]], self._ambient_sound)
                 )
                 if normalized:
                     sound_source, volume = normalized
-                    selected_sound = AudioConfig(sound_source, volume)
-                    if isinstance(sound_source, str):
-                        self._ambient_handle = self.play(selected_sound, loop=True)
-                    else:
-                        self._ambient_handle = self.play(selected_sound)
+                    ambient = AudioConfig(sound_source, volume)
+
+            if ambient and self._shared_ambient and isinstance(ambient.source, str):
+                try:
+                    self._ambient_bus = await _AmbientBus.acquire(ambient.source, ambient.volume)
+                    self._ambient_handle = PlayHandle()
+                except Exception:
+                    # played by this player instead, its play task reports the errors
+                    logger.exception(
+                        "failed to prepare the shared ambient sound",
+                        extra={"source": ambient.source},
+                    )
+
+            self._mixer_atask = asyncio.create_task(self._run_mixer_task())
+            self._room.on("reconnected", self._on_reconnected)
+
+            if self._agent_session:
+                self._agent_session.on("agent_state_changed", self._agent_state_changed)
+
+            if ambient and self._ambient_bus is None:
+                if isinstance(ambient.source, str):
+                    self._ambient_handle = self.play(ambient, loop=True)
+                else:
+                    self._ambient_handle = self.play(ambient)
 
     async def aclose(self) -> None:
         """
@@ -288,6 +482,12 @@ class BackgroundAudioPlayer:
             await cancel_and_wait(self._mixer_atask)
             self._mixer_atask = None
 
+            if self._ambient_bus:
+                self._ambient_bus.release()
+                self._ambient_bus = None
+                if self._ambient_handle:
+                    self._ambient_handle._mark_playout_done()
+
             await self._audio_mixer.aclose()
             await self._audio_source.aclose()
 
@@ -331,19 +531,14 @@ class BackgroundAudioPlayer:
             sound = sound.path()
 
         if isinstance(sound, str):
-            if loop:
-                sound = _loop_audio_frames(sound)
-            else:
-                sound = audio_frames_from_file(sound)
+            sound = _clip_frames(sound, volume, loop)
+            volume = 1.0  # already applied to the cached frames
 
         async def _gen_wrapper() -> AsyncGenerator[rtc.AudioFrame, None]:
             async for frame in sound:
                 if volume != 1.0:
-                    data = np.frombuffer(frame.data, dtype=np.int16).astype(np.float32)
-                    data *= 10 ** (np.log10(volume))
-                    np.clip(data, -32768, 32767, out=data)
                     yield rtc.AudioFrame(
-                        data=data.astype(np.int16).tobytes(),
+                        data=_scale_volume(frame.data, volume),
                         sample_rate=frame.sample_rate,
                         num_channels=frame.num_channels,
                         samples_per_channel=frame.samples_per_channel,
@@ -368,9 +563,36 @@ class BackgroundAudioPlayer:
 
     @log_exceptions(logger=logger)
     async def _run_mixer_task(self) -> None:
+        if self._ambient_bus is not None:
+            await self._run_shared_ambient(self._ambient_bus)
+            return
+
         async for frame in self._audio_mixer:
             await self._audio_source.capture_frame(frame)
 
+    async def _run_shared_ambient(self, bus: _AmbientBus) -> None:
+        # the ambient frames are sent as they are, the mixer only runs for the other sounds
+        mixed = asyncio.Queue[rtc.AudioFrame](maxsize=1)
+
+        async def _forward_mixer() -> None:
+            async for frame in self._audio_mixer:
+                await mixed.put(frame)
+
+        forward_atask = asyncio.create_task(_forward_mixer())
+        try:
+            ambient = bus.frames()
+            while True:
+                if self._ambient_handle and not self._ambient_handle.done():
+                    frame = next(ambient)
+                    with contextlib.suppress(asyncio.QueueEmpty):
+                        frame = _add_frames(frame, mixed.get_nowait())
+                else:
+                    frame = await mixed.get()
+
+                await self._audio_source.capture_frame(frame)
+        finally:
+            await cancel_and_wait(forward_atask)
+
     async def _publish_track(self) -> None:
         if self.publication is not None:
             return
@@ -427,7 +649,49 @@ class PlayHandle:
             self._done_fut.set_result(None)
 
 
-async def _loop_audio_frames(file_path: str) -> AsyncGenerator[rtc.AudioFrame, None]:
+async def _clip_frames(
+    file_path: str, volume: float, loop: bool
+) -> AsyncGenerator[rtc.AudioFrame, None]:
     while True:
-        async for frame in audio_frames_from_file(file_path):
-            yield frame
+        key = _clip_cache.file_key(file_path)
+        frames = _clip_cache.get(key, volume)
+        if frames is None:
+            # first play of the clip in this process, it is decoded while being played
+            async for frame in _decode_clip(file_path, key, volume):
+                yield frame
+        else:
+            for data in frames:
+                yield rtc.AudioFrame(
+                    data=data,
+                    sample_rate=_SAMPLE_RATE,
+                    num_channels=_NUM_CHANNELS,
+                    samples_per_channel=len(data) // (2 * _NUM_CHANNELS),
+                )
+
+        if not loop:
+            break
+
+
+async def _decode_clip(
+    file_path: str, key: tuple[str, int, int], volume: float
+) -> AsyncGenerator[rtc.AudioFrame, None]:
+    pcm: bytearray | None = bytearray()
+    async for frame in audio_frames_from_file(
+        file_path, sample_rate=_SAMPLE_RATE, num_channels=_NUM_CHANNELS
+    ):
+        if pcm is not None:
+            pcm += frame.data.cast("B")
+            if len(pcm) > _clip_cache.max_bytes:
+                pcm = None  # too large to be cached
+
+        if volume != 1.0:
+            frame = rtc.AudioFrame(
+                data=_scale_volume(frame.data, volume),
+                sample_rate=frame.sample_rate,
+                num_channels=frame.num_channels,
+                samples_per_channel=frame.samples_per_channel,
+            )
+        yield frame
+
+    if pcm:
+        _clip_cache.put(key, pcm)
@@ -0,0 +1,284 @@
+"""Encoding of the session recordings in the inference process of the worker.
+
+With `WorkerOptions.recording_encoder_process`, the worker registers _RecorderEncoderRunner
+and the RecorderIOs created with `encoder_process=True` send their audio and playback
+events to it in batches, instead of resampling and encoding them in a thread of the job
+process. The recordings of all the jobs are encoded by a small fixed number of threads,
+dispatched without holding up the other requests of the inference process, and the
+recordings left open by the jobs that crashed are closed once idle.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from livekit import rtc
+
+from ...inference_runner import _InferenceRunner
+from ...ipc.inference_executor import InferenceExecutor
+from ...job import get_job_context
+from ...log import logger
+from ...utils import log_exceptions, shortuuid
+
+if TYPE_CHECKING:
+    from .recorder_io import _RecorderEvent, _RecordingEncoder
+
+INFERENCE_METHOD = "lk_recorder_encoder"
+SEND_INTERVAL = 0.5  # the events are sent to the encoder process in batches
+KEEPALIVE_INTERVAL = 10.0  # a request is sent at least this often, even without events
+ENCODER_THREADS = 2  # number of recordings encoded concurrently by the encoder process
+ENCODER_IDLE_TIMEOUT = 60.0  # the recordings without requests for this long are closed
+
+
+def _encode_request(
+    op: str, recording_id: str, events: list[_RecorderEvent] | None = None, **kwargs: Any
+) -> bytes:
+    header: dict[str, Any] = {"op": op, "id": recording_id, **kwargs}
+    pcm = bytearray()
+    if events is not None:
+        header["events"] = []
+        for kind, value in events:
+            if isinstance(value, rtc.AudioFrame):
+                header["events"].append(
+                    [kind, value.sample_rate, value.num_channels, value.samples_per_channel]
+                )
+                pcm += value.data.cast("B")
+            else:
+                header["events"].append([kind, value])
+
+    header_data = json.dumps(header).encode()
+    return struct.pack("<I", len(header_data)) + header_data + pcm
+
+
+def _decode_request(data: bytes) -> tuple[dict[str, Any], list[_RecorderEvent]]:
+    (header_len,) = struct.unpack_from("<I", data)
+    header = json.loads(data[4 : 4 + header_len])
+    pcm = memoryview(data)[4 + header_len :]
+
+    events: list[_RecorderEvent] = []
+    offset = 0
+    for event in header.pop("events", []):
+        if len(event) == 4:
+            kind, sample_rate, num_channels, samples_per_channel = event
+            size = samples_per_channel * num_channels * 2
+            frame = rtc.AudioFrame(
+                data=bytes(pcm[offset : offset + size]),
+                sample_rate=sample_rate,
+                num_channels=num_channels,
+                samples_per_channel=samples_per_channel,
+            )
+            offset += size
+            events.append((kind, frame))
+        else:
+            events.append((event[0], event[1]))
+
+    return header, events
+
+
+class _OpenRecording:
+    def __init__(self, encoder: _RecordingEncoder) -> None:
+        self.encoder = encoder
+        # held while the events are encoded, so an idle recording isn't closed under them
+        self.lock = threading.Lock()
+        self.last_active = time.monotonic()
+        self.closed = False
+
+
+class _RecorderEncoderRunner(_InferenceRunner):
+    INFERENCE_METHOD = INFERENCE_METHOD
+    # the requests are slow (resampling and Opus), they run in their own threads so they
+    # don't hold up the latency sensitive requests of the other runners
+    THREADS = ENCODER_THREADS
+
+    def __init__(self) -> None:
+        self._recordings: dict[str, _OpenRecording] = {}
+        self._lock = threading.Lock()  # protects the dict
+        self._stop = threading.Event()
+
+    def initialize(self) -> None:
+        # the recordings of the jobs that crashed or were killed are never closed by them
+        threading.Thread(
+            target=self._idle_thread, name="lk_recorder_encoder_idle", daemon=True
+        ).start()
+
+    def run(self, data: bytes) -> bytes | None:
+        from .recorder_io import _RecordingEncoder
+
+        header, events = _decode_request(data)
+        recording_id = header["id"]
+        if header["op"] == "open":
+            encoder = _RecordingEncoder(header["output_path"], header["sample_rate"])
+            with self._lock:
+                self._recordings[recording_id] = _OpenRecording(encoder)
+            return None
+
+        with self._lock:
+            recording = self._recordings.get(recording_id)
+
+        # the requests of a recording are sent one at a time
+        if recording is None:
+            raise RuntimeError(f"unknown recording {recording_id}")
+
+        with recording.lock:
+            if recording.closed:
+                raise RuntimeError(f"recording {recording_id} was closed after being idle")
+
+            recording.last_active = time.monotonic()
+            try:
+                for event in events:
+                    recording.encoder.push(event)
+            except Exception:
+                # the job process encodes the rest of the recording on its side
+                with contextlib.suppress(Exception):
+                    self._close(recording_id, recording)
+                raise
+
+            if header["op"] == "close":
+                self._close(recording_id, recording)
+
+        return None
+
+    def _close(self, recording_id: str, recording: _OpenRecording) -> None:
+        # called with recording.lock held
+        recording.closed = True
+        with self._lock:
+            self._recordings.pop(recording_id, None)
+        recording.encoder.close()
+
+    def _close_idle(self, now: float) -> None:
+        with self._lock:
+            recordings = list(self._recordings.items())
+
+        for recording_id, recording in recordings:
+            with recording.lock:
+                if recording.closed or now - recording.last_active < ENCODER_IDLE_TIMEOUT:
+                    continue
+
+                logger.warning(
+                    "closing an idle recording, its job process is gone",
+                    extra={"recording_id": recording_id},
+                )
+                try:
+                    self._close(recording_id, recording)
+                except Exception:
+                    logger.exception("error closing the idle recording")
+
+    def _idle_thread(self) -> None:
+        while not self._stop.wait(ENCODER_IDLE_TIMEOUT / 4):
+            self._close_idle(time.monotonic())
+
+
+def _continuation_path(output_path: str) -> str:
+    root, ext = os.path.splitext(output_path)
+    i = 1
+    while os.path.exists(f"{root}.{i}{ext}"):
+        i += 1
+    return f"{root}.{i}{ext}"
+
+
+class _RemoteEncoder:
+    """Sends the events of a RecorderIO to the encoder process. If the encoder process loses
+    the recording (restarted, or failed to encode it), the rest of it is encoded in the job
+    process to a continuation file next to the output file ("recording.1.ogg" for
+    "recording.ogg"), the audio already encoded by the encoder process is kept."""
+
+    def __init__(self, executor: InferenceExecutor, *, output_path: str, sample_rate: int) -> None:
+        self._executor = executor
+        self._id = shortuuid("recording_")
+        self._output_path = output_path
+        self._sample_rate = sample_rate
+        self._events: list[_RecorderEvent] = []
+        self._send_atask: asyncio.Task[None] | None = None
+        self._local: _RecordingEncoder | None = None
+        self._local_path: str | None = None
+        self._closed = False
+
+    @classmethod
+    async def open(cls, *, output_path: str, sample_rate: int) -> _RemoteEncoder | None:
+        """start a recording in the encoder process, None if it isn't available"""
+        try:
+            executor = get_job_context().inference_executor
+        except RuntimeError:
+            logger.warning("the recorder encoder process is only available inside a job")
+            return None
+
+        encoder = cls(executor, output_path=output_path, sample_rate=sample_rate)
+        try:
+            await encoder._request("open", output_path=output_path, sample_rate=sample_rate)
+        except Exception:
+            logger.warning(
+                "failed to start the recording in the encoder process, encoding it in the job "
+                "process instead (is WorkerOptions.recording_encoder_process enabled?)",
+                exc_info=True,
+            )
+            return None
+
+        encoder._send_atask = asyncio.create_task(encoder._send_task())
+        return encoder
+
+    def push(self, event: _RecorderEvent) -> None:
+        self._events.append(event)
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._send_atask is not None:
+            # the errors are logged by the task
+            with contextlib.suppress(Exception):
+                await self._send_atask
+
+    @log_exceptions(logger=logger)
+    async def _send_task(self) -> None:
+        # one request at a time to keep the events in order
+        last_sent = time.monotonic()
+        while not self._closed:
+            await asyncio.sleep(SEND_INTERVAL)
+            # the keepalives prevent the encoder process from closing the recording as idle
+            if self._events or time.monotonic() - last_sent >= KEEPALIVE_INTERVAL:
+                events, self._events = self._events, []
+                await self._send("write", events)
+                last_sent = time.monotonic()
+
+        events, self._events = self._events, []
+        await self._send("close", events)
+
+    async def _send(self, op: str, events: list[_RecorderEvent]) -> None:
+        if self._local is None:
+            try:
+                await self._request(op, events=events)
+                return
+            except Exception:
+                local_path = self._local_path = _continuation_path(self._output_path)
+                logger.warning(
+                    "the encoder process lost the recording, encoding the rest of it in the job "
+                    "process",
+                    extra={"output_path": local_path},
+                    exc_info=True,
+                )
+
+            from .recorder_io import _RecordingEncoder
+
+            self._local = await asyncio.to_thread(_RecordingEncoder, local_path, self._sample_rate)
+
+        await asyncio.to_thread(self._encode_local, self._local, op, events)
+
+    @staticmethod
+    def _encode_local(encoder: _RecordingEncoder, op: str, events: list[_RecorderEvent]) -> None:
+        try:
+            for event in events:
+                encoder.push(event)
+        finally:
+            if op == "close":
+                encoder.close()
+
+    async def _request(self, op: str, **kwargs: Any) -> None:
+        await self._executor.do_inference(INFERENCE_METHOD, _encode_request(op, self._id, **kwargs))
@@ -5,7 +5,7 @@ import contextlib
 import queue
 import threading
 from collections.abc import AsyncIterator
-from typing import Any, Callable
+from typing import Literal, Union
 
 import av
 import numpy as np
@@ -15,11 +15,16 @@ from livekit.agents.voice.agent_session import AgentSession
 
 from ...log import logger
 from .. import io
+from .encoder_process import _RemoteEncoder
 
-# the recorder currently assume the input is a continous uninterrupted audio stream
+# the recorder currently assume the input is a continous uninterrupted audio stream, its
+# samples are the clock of the recording
 
-
-WRITE_INTERVAL = 2.5
+PACKET_DURATION = 0.02  # duration of the Opus packets
+ENCODE_INTERVAL = 0.5  # the audio is encoded in batches of packets, each encode has an overhead
+ENCODE_DELAY = 0.5  # the output is encoded this long after it was played, once its
+# truncation (interruptions) and pauses are known
+MAX_BUFFERED = 30.0  # the audio captured ahead of the input clock is bounded to this duration
 
 
 class RecorderIO:
@@ -29,18 +34,28 @@ class RecorderIO:
         agent_session: AgentSession,
         sample_rate: int = 48000,
         loop: asyncio.AbstractEventLoop | None = None,
+        encoder_process: bool = False,
     ) -> None:
+        """
+        Args:
+            encoder_process (bool, optional): Encode the recording in the inference process of
+                the worker, shared by the recordings of all the jobs, instead of a thread of
+                the job process. Requires `WorkerOptions.recording_encoder_process`, the
+                recording is encoded in the job process if it isn't enabled.
+        """
         self._in_record: RecorderAudioInput | None = None
         self._out_record: RecorderAudioOutput | None = None
 
-        self._in_q: queue.Queue[list[rtc.AudioFrame] | None] = queue.Queue()
-        self._out_q: queue.Queue[list[rtc.AudioFrame] | None] = queue.Queue()
+        # the audio and the playback events, in order, for the encoding thread
+        self._events: queue.Queue[_RecorderEvent | None] = queue.Queue()
         self._session = agent_session
         self._sample_rate = sample_rate
         self._started = False
         self._loop = loop or asyncio.get_event_loop()
         self._lock = asyncio.Lock()
         self._close_fut: asyncio.Future[None] = self._loop.create_future()
+        self._encoder_process = encoder_process
+        self._remote: _RemoteEncoder | None = None
 
     async def start(self, *, output_path: str) -> None:
         async with self._lock:
@@ -54,9 +69,16 @@ class RecorderIO:
                 )
 
             self._output_path = output_path
+            if self._encoder_process:
+                self._remote = await _RemoteEncoder.open(
+                    output_path=output_path, sample_rate=self._sample_rate
+                )
             self._started = True
+            if self._remote is not None:
+                return
+
             self._close_fut = self._loop.create_future()
-            self._forward_atask = asyncio.create_task(self._forward_task())
+            self._events = queue.Queue()
 
             thread = threading.Thread(target=self._encode_thread, daemon=True)
             thread.start()
@@ -66,9 +88,11 @@ class RecorderIO:
             if not self._started:
                 return
 
-            self._in_q.put_nowait(None)
-            self._out_q.put_nowait(None)
-            await asyncio.shield(self._close_fut)
+            if self._remote is not None:
+                await self._remote.aclose()
+            else:
+                self._events.put_nowait(None)
+                await asyncio.shield(self._close_fut)
             self._started = False
 
     def record_input(self, audio_input: io.AudioInput) -> RecorderAudioInput:
@@ -76,149 +100,309 @@ class RecorderIO:
         return self._in_record
 
     def record_output(self, audio_output: io.AudioOutput) -> RecorderAudioOutput:
-        self._out_record = RecorderAudioOutput(
-            recording_io=self, audio_output=audio_output, write_fnc=self._write_cb
-        )
+        self._out_record = RecorderAudioOutput(recording_io=self, audio_output=audio_output)
         return self._out_record
 
     @property
     def recording(self) -> bool:
         return self._started
 
-    def _write_cb(self, buf: list[rtc.AudioFrame]) -> None:
-        assert self._in_record is not None
+    def _push_event(self, event: _RecorderEvent) -> None:
+        if not self._started:
+            return
 
-        input_buf = self._in_record.take_buf()
-        self._in_q.put_nowait(input_buf)
-        self._out_q.put_nowait(buf)
+        if self._remote is None and self._close_fut.done():
+            return  # the encoding thread exited on an error, nothing reads the events
 
-    async def _forward_task(self) -> None:
-        assert self._in_record is not None
-        assert self._out_record is not None
+        if self._remote is not None:
+            self._remote.push(event)
+        else:
+            self._events.put_nowait(event)
 
-        # Forward the input audio to the encoder every 5s.
-        while True:
-            await asyncio.sleep(WRITE_INTERVAL)
-            if self._out_record.has_pending_data:
-                # if the output is currenetly playing audio, wait for it to stay in sync
-                continue  # always wait for the complete output
+    def _encode_thread(self) -> None:
+        try:
+            encoder = _RecordingEncoder(self._output_path, self._sample_rate)
+            try:
+                while (event := self._events.get()) is not None:
+                    encoder.push(event)
+            finally:
+                encoder.close()
+        except Exception:
+            logger.exception("error while recording the session")
+        finally:
+            # drop the events pushed until the loop sees the thread exited
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    self._events.get_nowait()
+            with contextlib.suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._close_fut.set_result, None)
+
+
+_RecorderEvent = tuple[
+    Literal["input", "output", "playback_finished", "pause", "resume"],
+    Union[rtc.AudioFrame, float, None],
+]
+
+
+class _RecordingEncoder:
+    """Encodes the events of a recording to an Ogg/Opus file, in the encoding thread of the
+    RecorderIO or in the encoder process (see encoder_process.py)"""
+
+    def __init__(self, output_path: str, sample_rate: int) -> None:
+        self._sample_rate = sample_rate
+        self._timeline = _RecorderTimeline(
+            sample_rate,
+            delay=int(ENCODE_DELAY * sample_rate),
+            max_buffered=int(MAX_BUFFERED * sample_rate),
+        )
+        self._in_resampler = _MonoResampler(sample_rate)
+        self._out_resampler = _MonoResampler(sample_rate)
+        self._packet_size = int(PACKET_DURATION * sample_rate)
+        self._batch_size = self._packet_size * int(ENCODE_INTERVAL / PACKET_DURATION)
+
+        self._container = av.open(output_path, mode="w", format="ogg")
+        self._stream: av.AudioStream = self._container.add_stream(
+            "opus", rate=sample_rate, layout="stereo"
+        )  # type: ignore
 
-            input_buf = self._in_record.take_buf()
-            self._in_q.put_nowait(input_buf)
-            self._out_q.put_nowait([])
+    def push(self, event: _RecorderEvent) -> None:
+        kind, value = event
+        if kind == "input":
+            assert isinstance(value, rtc.AudioFrame)
+            self._timeline.push_input(self._in_resampler.push(value))
+            self._encode(self._timeline.pop(self._batch_size))
+        elif kind == "output":
+            assert isinstance(value, rtc.AudioFrame)
+            self._timeline.push_output(self._out_resampler.push(value))
+        elif kind == "playback_finished":
+            # the position can be an int (e.g. 0 when interrupted before any playout)
+            position = float(value)  # type: ignore[arg-type]
+            # the output is sent per-segment, flush the resampler at its end
+            self._timeline.push_output(self._out_resampler.flush())
+            self._timeline.playback_finished(int(position * self._sample_rate))
+        elif kind == "pause":
+            self._timeline.pause()
+        elif kind == "resume":
+            self._timeline.resume()
+
+    def close(self) -> None:
+        with self._container:
+            self._encode(self._timeline.flush(self._packet_size))
+            for packet in self._stream.encode(None):
+                self._container.mux(packet)
+
+    def _encode(self, samples: np.ndarray) -> None:
+        if not samples.shape[1]:
+            return
 
-    def _encode_thread(self) -> None:
-        GROW_FACTOR = 1.5
-        INV_INT16 = 1.0 / 32768.0
+        av_frame = av.AudioFrame.from_ndarray(samples, format="fltp", layout="stereo")
+        av_frame.sample_rate = self._sample_rate
+        for packet in self._stream.encode(av_frame):
+            self._container.mux(packet)
 
-        container = av.open(self._output_path, mode="w", format="ogg")
-        stream: av.AudioStream = container.add_stream(
-            "opus", rate=self._sample_rate, layout="stereo"
-        )  # type: ignore
 
-        in_resampler: rtc.AudioResampler | None = None
-        out_resampler: rtc.AudioResampler | None = None
+class _MonoResampler:
+    """Converts the frames of one side of the recording to mono float32 at the recorder rate"""
+
+    def __init__(self, sample_rate: int) -> None:
+        self._sample_rate = sample_rate
+        self._resampler: rtc.AudioResampler | None = None
+        self._input_format: tuple[int, int] | None = None
+
+    def push(self, frame: rtc.AudioFrame) -> np.ndarray:
+        frames = []
+        if (frame.sample_rate, frame.num_channels) != self._input_format:
+            frames.extend(self._flush_frames())
+            self._input_format = (frame.sample_rate, frame.num_channels)
+            if frame.sample_rate != self._sample_rate:
+                self._resampler = rtc.AudioResampler(
+                    input_rate=frame.sample_rate,
+                    output_rate=self._sample_rate,
+                    num_channels=frame.num_channels,
+                )
+
+        frames.extend(self._resampler.push(frame) if self._resampler else [frame])
+        return _to_mono(frames)
+
+    def flush(self) -> np.ndarray:
+        return _to_mono(self._flush_frames())
+
+    def _flush_frames(self) -> list[rtc.AudioFrame]:
+        return self._resampler.flush() if self._resampler else []
+
+
+def _to_mono(frames: list[rtc.AudioFrame]) -> np.ndarray:
+    if not frames:
+        return np.zeros(0, dtype=np.float32)
+
+    samples = []
+    for f in frames:
+        data = np.frombuffer(f.data, dtype=np.int16, count=f.samples_per_channel * f.num_channels)
+        mono = data.reshape(-1, f.num_channels).sum(axis=1, dtype=np.float32)
+        mono *= 1.0 / (32768.0 * f.num_channels)
+        samples.append(mono)
+
+    return np.concatenate(samples) if len(samples) > 1 else samples[0]
+
+
+class _Channel:
+    """The samples of one side of the recording, from the next position to encode"""
+
+    def __init__(self, max_samples: int) -> None:
+        self._max_samples = max_samples
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def write(self, offset: int, samples: np.ndarray) -> int:
+        """write the samples at the offset (from the start), returns the number of samples
+        written, the samples exceeding the capacity are dropped"""
+        samples = samples[: max(self._max_samples - offset, 0)]
+        end = offset + len(samples)
+        if self._start + end > len(self._buf):
+            # move the data to the beginning of the buffer, growing it if needed
+            size = max(len(self._buf), end)
+            if size > len(self._buf):
+                size = min(max(size, len(self._buf) * 2), self._max_samples)
+            buf = np.zeros(size, dtype=np.float32)
+            buf[: len(self)] = self._buf[self._start : self._end]
+            self._buf, self._end, self._start = buf, len(self), 0
+
+        start = self._start + offset
+        if start > self._end:
+            self._buf[self._end : start] = 0.0
+        self._buf[start : start + len(samples)] = samples
+        self._end = max(self._end, start + len(samples))
+        return len(samples)
+
+    def read(self, offset: int) -> np.ndarray:
+        return self._buf[self._start + offset : self._end].copy()
+
+    def truncate(self, length: int) -> None:
+        self._end = min(self._end, self._start + max(length, 0))
+
+    def take(self, n: int, out: np.ndarray) -> None:
+        """move the first n samples to out, padded with silence"""
+        count = min(n, len(self))
+        out[:count] = self._buf[self._start : self._start + count]
+        out[count:] = 0.0
+        if count == len(self):
+            self._start = self._end = 0
+        else:
+            self._start += count
+
+
+class _RecorderTimeline:
+    """Places the input (left channel) and the played output (right channel) on the sample
+    clock of the input.
+
+    A playback starts at the current position of the clock and its samples follow, the
+    samples captured ahead of the playback are kept until they are played. The samples after
+    the playback position (interrupted playback) are removed when the playback finishes, and
+    the samples not played yet are moved after the pauses. The stereo samples are returned
+    in fixed size chunks once they are `delay` samples behind the clock, so the memory used
+    doesn't depend on the length of the speech.
+    """
+
+    def __init__(self, sample_rate: int, *, delay: int, max_buffered: int) -> None:
+        self._sample_rate = sample_rate
+        self._delay = delay
+        self._left = _Channel(delay + max_buffered)
+        self._right = _Channel(delay + max_buffered)
+        self._pos = 0  # position of the next sample to encode
+        self._clock = 0  # number of input samples received
+
+        self._out_pos: int | None = None  # position of the next output sample, while playing
+        self._playback_start = 0
+        self._playback_paused = 0  # number of samples the playback was paused
+        self._paused_at: int | None = None
+        self._held: list[np.ndarray] = []  # output captured while paused
+        self._dropped = False
+
+    def push_input(self, samples: np.ndarray) -> None:
+        self._write(self._left, self._clock, samples)
+        self._clock += len(samples)
+
+    def push_output(self, samples: np.ndarray) -> None:
+        if not len(samples):
+            return
+
+        if self._paused_at is not None:
+            self._held.append(samples)
+            return
 
-        capacity = self._sample_rate * 6  # 6s, 1ch
-        stereo_buf = np.zeros((2, capacity), dtype=np.float32)
+        if self._out_pos is None:
+            self._out_pos = max(self._clock, self._pos + len(self._right))
+            self._playback_start = self._out_pos
+            self._playback_paused = 0
 
-        def remix_and_resample(frames: list[rtc.AudioFrame], channel_idx: int) -> int:
-            total_samples = sum(f.samples_per_channel * f.num_channels for f in frames)
+        self._write(self._right, self._out_pos, samples)
+        self._out_pos += len(samples)
 
-            nonlocal capacity, stereo_buf
-            if total_samples > capacity:
-                while capacity < total_samples:
-                    capacity = int(capacity * GROW_FACTOR)
+    def pause(self) -> None:
+        if self._out_pos is None or self._paused_at is not None:
+            return
 
-                stereo_buf.resize((2, capacity), refcheck=False)
+        # hold the samples that weren't played yet until the playback is resumed
+        self._paused_at = self._clock
+        cut = max(self._clock, self._pos)
+        self._held = [self._right.read(cut - self._pos)]
+        self._right.truncate(cut - self._pos)
 
-            pos = 0
-            dest = stereo_buf[channel_idx]
-            for f in frames:
-                count = f.samples_per_channel * f.num_channels
-                arr_i16 = np.frombuffer(f.data, dtype=np.int16, count=count).reshape(
-                    -1, f.num_channels
-                )
-                slice_ = dest[pos : pos + f.samples_per_channel]
-                np.sum(arr_i16, axis=1, dtype=np.float32, out=slice_)
-                slice_ *= INV_INT16 / f.num_channels
-                pos += f.samples_per_channel
-
-            return pos
-
-        with container:
-            while True:
-                input_buf = self._in_q.get()
-                output_buf = self._out_q.get()
-
-                if input_buf is None or output_buf is None:
-                    break
-
-                # lazy creation of the resamplers
-                if in_resampler is None and len(input_buf):
-                    input_rate, num_channels = input_buf[0].sample_rate, input_buf[0].num_channels
-                    in_resampler = rtc.AudioResampler(
-                        input_rate=input_rate,
-                        output_rate=self._sample_rate,
-                        num_channels=num_channels,
-                    )
-
-                if out_resampler is None and len(output_buf):
-                    input_rate, num_channels = output_buf[0].sample_rate, output_buf[0].num_channels
-                    out_resampler = rtc.AudioResampler(
-                        input_rate=input_rate,
-                        output_rate=self._sample_rate,
-                        num_channels=num_channels,
-                    )
-
-                input_resampled = []
-                for frame in input_buf:
-                    assert in_resampler is not None
-                    input_resampled.extend(in_resampler.push(frame))
-
-                output_resampled = []
-                for frame in output_buf:
-                    assert out_resampler is not None
-                    output_resampled.extend(out_resampler.push(frame))
-
-                if output_buf:
-                    assert out_resampler is not None
-                    # the output is sent per-segment. Always flush when the playback is done
-                    output_resampled.extend(out_resampler.flush())
-
-                len_left = remix_and_resample(input_resampled, 0)
-                len_right = remix_and_resample(output_resampled, 1)
-
-                if len_left != len_right:
-                    diff = abs(len_right - len_left)
-                    if len_left < len_right:
-                        logger.warning(
-                            f"Input is shorter by {diff} samples; silence has been prepended to "
-                            "align the input channel. The resulting recording may not accurately "
-                            "reflect the original audio."
-                        )
-                        stereo_buf[0, diff : diff + len_left] = stereo_buf[0, :len_left]
-                        stereo_buf[0, :diff] = 0.0
-                        len_left = len_right
-                    else:
-                        stereo_buf[1, diff : diff + len_right] = stereo_buf[1, :len_right]
-                        stereo_buf[1, :diff] = 0.0
-                        len_right = len_left
-
-                max_len = max(len_left, len_right)
-                stereo_slice = stereo_buf[:, :max_len]
-
-                av_frame = av.AudioFrame.from_ndarray(stereo_slice, format="fltp", layout="stereo")
-                av_frame.sample_rate = self._sample_rate
-
-                for packet in stream.encode(av_frame):
-                    container.mux(packet)
-
-            for packet in stream.encode(None):
-                container.mux(packet)
-
-        with contextlib.suppress(RuntimeError):
-            self._loop.call_soon_threadsafe(self._close_fut.set_result, None)
+    def resume(self) -> None:
+        if self._paused_at is None or self._out_pos is None:
+            return
+
+        self._playback_paused += self._clock - self._paused_at
+        self._paused_at = None
+        self._out_pos = max(self._clock, self._pos)
+        held, self._held = self._held, []
+        for samples in held:
+            self.push_output(samples)
+
+    def playback_finished(self, played: int) -> None:
+        if self._out_pos is not None:
+            # remove what was captured but not played
+            end = self._playback_start + self._playback_paused + played
+            self._right.truncate(end - self._pos)
+
+        self._out_pos = None
+        self._paused_at = None
+        self._held = []
+
+    def pop(self, chunk_size: int) -> np.ndarray:
+        """the stereo samples at least `delay` samples behind the clock, in multiple of
+        chunk_size"""
+        n = max(self._clock - self._delay - self._pos, 0) // chunk_size * chunk_size
+        return self._take(n)
+
+    def flush(self, chunk_size: int) -> np.ndarray:
+        """all the remaining samples, padded to a multiple of chunk_size"""
+        n = max(len(self._left), len(self._right))
+        return self._take(-(-n // chunk_size) * chunk_size)
+
+    def _take(self, n: int) -> np.ndarray:
+        stereo = np.empty((2, n), dtype=np.float32)
+        self._left.take(n, stereo[0])
+        self._right.take(n, stereo[1])
+        self._pos += n
+        return stereo
+
+    def _write(self, channel: _Channel, pos: int, samples: np.ndarray) -> None:
+        offset = pos - self._pos
+        if offset < 0:
+            # already encoded (e.g. the output was captured late), only keep the rest
+            samples, offset = samples[-offset:], 0
+
+        if channel.write(offset, samples) < len(samples) and not self._dropped:
+            self._dropped = True
+            logger.warning(
+                "the recorder buffer is full, the audio captured ahead of the input is dropped "
+                "(is the audio input still running?)"
+            )
 
 
 class RecorderAudioInput(io.AudioInput):
@@ -226,22 +410,13 @@ class RecorderAudioInput(io.AudioInput):
         super().__init__(label="RecorderIO", source=source)
         self.__audio_input = source
         self.__recording_io = recording_io
-        self.__acc_frames: list[rtc.AudioFrame] = []
-
-    def take_buf(self) -> list[rtc.AudioFrame]:
-        frames = self.__acc_frames
-        self.__acc_frames = []
-        return frames
 
     def __aiter__(self) -> AsyncIterator[rtc.AudioFrame]:
         return self
 
     async def __anext__(self) -> rtc.AudioFrame:
         frame = await self.__audio_input.__anext__()
-
-        if self.__recording_io.recording:
-            self.__acc_frames.append(frame)
-
+        self.__recording_io._push_event(("input", frame))
         return frame
 
     def on_attached(self) -> None: ...
@@ -255,7 +430,6 @@ class RecorderAudioOutput(io.AudioOutput):
         *,
         recording_io: RecorderIO,
         audio_output: io.AudioOutput | None = None,
-        write_fnc: Callable[[list[rtc.AudioFrame]], Any],
     ) -> None:
         super().__init__(
             label="RecorderIO",
@@ -264,12 +438,11 @@ class RecorderAudioOutput(io.AudioOutput):
             capabilities=io.AudioOutputCapabilities(pause=True),  # depends on the next_in_chain
         )
         self.__recording_io = recording_io
-        self.__write = write_fnc
-        self.__acc_frames: list[rtc.AudioFrame] = []
+        self.__playing = False
 
     @property
     def has_pending_data(self) -> bool:
-        return len(self.__acc_frames) > 0
+        return self.__playing
 
     def on_playback_finished(
         self,
@@ -284,37 +457,14 @@ class RecorderAudioOutput(io.AudioOutput):
             synchronized_transcript=synchronized_transcript,
         )
 
-        if not self.__recording_io.recording:
-            return
-
-        buf = []
-        acc_dur = 0.0
-        for frame in self.__acc_frames:
-            if frame.duration + acc_dur > playback_position:
-                duration_needed = playback_position - acc_dur
-                samples_needed = int(duration_needed * frame.sample_rate) * frame.num_channels
-                truncated_frame = rtc.AudioFrame(
-                    data=frame.data[:samples_needed],
-                    num_channels=frame.num_channels,
-                    samples_per_channel=samples_needed,
-                    sample_rate=frame.sample_rate,
-                )
-                buf.append(truncated_frame)
-                break
-
-            acc_dur += frame.duration
-            buf.append(frame)
-
-        if buf:
-            self.__write(buf)
-
-        self.__acc_frames = []
+        self.__playing = False
+        self.__recording_io._push_event(("playback_finished", float(playback_position)))
 
     async def capture_frame(self, frame: rtc.AudioFrame) -> None:
         await super().capture_frame(frame)
 
-        if self.__recording_io.recording:
-            self.__acc_frames.append(frame)
+        self.__playing = True
+        self.__recording_io._push_event(("output", frame))
 
         if self.next_in_chain:
             await self.next_in_chain.capture_frame(frame)
@@ -328,3 +478,11 @@ class RecorderAudioOutput(io.AudioOutput):
     def clear_buffer(self) -> None:
         if self.next_in_chain:
             self.next_in_chain.clear_buffer()
+
+    def pause(self) -> None:
+        super().pause()
+        self.__recording_io._push_event(("pause", None))
+
+    def resume(self) -> None:
+        super().resume()
+        self.__recording_io._push_event(("resume", None))
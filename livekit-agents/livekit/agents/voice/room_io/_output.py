@@ -26,6 +26,7 @@ class _ParticipantAudioOutput(io.AudioOutput):
         num_channels: int,
         track_publish_options: rtc.TrackPublishOptions,
         track_name: str = "roomio_audio",
+        queue_size_ms: int = 200,
     ) -> None:
         super().__init__(
             label="RoomIO",
@@ -36,15 +37,21 @@ class _ParticipantAudioOutput(io.AudioOutput):
         self._room = room
         self._track_name = track_name
         self._lock = asyncio.Lock()
-        self._audio_source = rtc.AudioSource(sample_rate, num_channels, queue_size_ms=200)
+        self._audio_source = rtc.AudioSource(sample_rate, num_channels, queue_size_ms=queue_size_ms)
         self._publish_options = track_publish_options
         self._publication: rtc.LocalTrackPublication | None = None
         self._subscribed_fut = asyncio.Future[None]()
 
-        self._audio_buf = utils.aio.Chan[rtc.AudioFrame]()
-        self._audio_bstream = utils.audio.AudioByteStream(
-            sample_rate, num_channels, samples_per_channel=sample_rate // 20
-        )  # chunk the frame into a small, fixed size
+        # the captured audio is sent to the source in batches sized to the free space of its
+        # queue, so capture_frame never waits inside the source and the interruptions can
+        # clear everything that was sent
+        self._num_channels = num_channels
+        self._queue_size = queue_size_ms / 1000
+        self._max_batch = self._queue_size / 2
+        self._audio_buf = bytearray()
+        self._audio_ready = asyncio.Event()
+        self._audio_drained = asyncio.Event()  # the buffer was sent to the source
+        self._audio_drained.set()
 
         # used to republish track on reconnection
         self._republish_task: asyncio.Task[None] | None = None
@@ -96,17 +103,14 @@ class _ParticipantAudioOutput(io.AudioOutput):
             logger.error("capture_frame called while flush is in progress")
             await self._flush_task
 
-        for f in self._audio_bstream.push(frame.data):
-            await self._audio_buf.send(f)
-            self._pushed_duration += f.duration
+        self._audio_buf += frame.data.cast("B")
+        self._pushed_duration += frame.duration
+        self._audio_drained.clear()
+        self._audio_ready.set()
 
     def flush(self) -> None:
         super().flush()
 
-        for f in self._audio_bstream.flush():
-            self._audio_buf.send_nowait(f)
-            self._pushed_duration += f.duration
-
         if not self._pushed_duration:
             return
 
@@ -118,8 +122,6 @@ class _ParticipantAudioOutput(io.AudioOutput):
         self._flush_task = asyncio.create_task(self._wait_for_playout())
 
     def clear_buffer(self) -> None:
-        self._audio_bstream.clear()
-
         if not self._pushed_duration:
             return
         self._interrupted_event.set()
@@ -137,11 +139,14 @@ class _ParticipantAudioOutput(io.AudioOutput):
         wait_for_interruption = asyncio.create_task(self._interrupted_event.wait())
 
         async def _wait_buffered_audio() -> None:
-            while not self._audio_buf.empty():
+            while True:
                 if not self._playback_enabled.is_set():
                     await self._playback_enabled.wait()
 
+                await self._audio_drained.wait()
                 await self._audio_source.wait_for_playout()
+                if self._audio_drained.is_set():
+                    break
 
         wait_for_playout = asyncio.create_task(_wait_buffered_audio())
         await asyncio.wait(
@@ -153,9 +158,8 @@ class _ParticipantAudioOutput(io.AudioOutput):
         pushed_duration = self._pushed_duration
 
         if interrupted:
-            queued_duration = self._audio_source.queued_duration
-            while not self._audio_buf.empty():
-                queued_duration += self._audio_buf.recv_nowait().duration
+            queued_duration = self._audio_source.queued_duration + self._buffered_duration
+            self._clear_audio_buf()
 
             pushed_duration = max(pushed_duration - queued_duration, 0)
             self._audio_source.clear_queue()
@@ -167,8 +171,21 @@ class _ParticipantAudioOutput(io.AudioOutput):
         self._interrupted_event.clear()
         self.on_playback_finished(playback_position=pushed_duration, interrupted=interrupted)
 
+    @property
+    def _buffered_duration(self) -> float:
+        return len(self._audio_buf) / (2 * self._num_channels * self._audio_source.sample_rate)
+
+    def _clear_audio_buf(self) -> None:
+        self._audio_buf.clear()
+        self._audio_ready.clear()
+        self._audio_drained.set()
+
     async def _forward_audio(self) -> None:
-        async for frame in self._audio_buf:
+        bytes_per_sample = 2 * self._num_channels
+        sample_rate = self._audio_source.sample_rate
+        while True:
+            await self._audio_ready.wait()
+
             if not self._playback_enabled.is_set():
                 self._audio_source.clear_queue()
                 await self._playback_enabled.wait()
@@ -180,9 +197,33 @@ class _ParticipantAudioOutput(io.AudioOutput):
                     await self._flush_task
 
                 # ignore frames if interrupted
+                self._clear_audio_buf()
+                continue
+
+            # wait for enough free space in the queue, a batch or what was captured until now
+            free = self._queue_size - self._audio_source.queued_duration
+            wanted = min(self._buffered_duration, self._max_batch)
+            if free < wanted:
+                await asyncio.sleep(wanted - free)
                 continue
 
-            await self._audio_source.capture_frame(frame)
+            samples = int(min(free, self._buffered_duration) * sample_rate)
+            size = max(samples, 1) * bytes_per_sample
+            data = bytes(self._audio_buf[:size])
+            del self._audio_buf[:size]
+            if not self._audio_buf:
+                self._audio_ready.clear()
+
+            await self._audio_source.capture_frame(
+                rtc.AudioFrame(
+                    data=data,
+                    sample_rate=sample_rate,
+                    num_channels=self._num_channels,
+                    samples_per_channel=len(data) // bytes_per_sample,
+                )
+            )
+            if not self._audio_buf:
+                self._audio_drained.set()
 
     def _on_reconnected(self) -> None:
         if self._republish_task:
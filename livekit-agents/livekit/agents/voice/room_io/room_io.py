@@ -100,6 +100,10 @@ class RoomOutputOptions:
     )
     audio_track_name: NotGivenOr[str] = NOT_GIVEN
     """The name of the audio track to publish. If not provided, default to "roomio_audio"."""
+    audio_queue_size_ms: int = 200
+    """Duration of the audio buffered by the audio source of the published track. The audio is
+    sent to it in batches of up to half of it, a larger queue means fewer wakeups per session but
+    more audio to discard on interruption."""
     sync_transcription: NotGivenOr[bool] = NOT_GIVEN
     """False to disable transcription synchronization with audio output.
     Otherwise, transcription is emitted as quickly as available."""
@@ -199,6 +203,7 @@ class RoomIO:
                 track_name=self._output_options.audio_track_name
                 if utils.is_given(self._output_options.audio_track_name)
                 else "roomio_audio",
+                queue_size_ms=self._output_options.audio_queue_size_ms,
             )
 
         if self._output_options.transcription_enabled or not utils.is_given(
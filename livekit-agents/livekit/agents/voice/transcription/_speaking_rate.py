@@ -72,22 +72,23 @@ class SpeakingRateStream:
     @log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         _inference_sample_rate = 0
-        inference_f32_data = np.empty(0, dtype=np.float32)
+        # the audio waiting for inference, the current window starts at `window_start`
+        audio = np.empty(0, dtype=np.float32)
+        window_start = window_end = 0
+        flux: _SlidingSpectralFlux | None = None
 
         pub_timestamp = self._opts.window_duration / 2
-        inference_frames: list[rtc.AudioFrame] = []
         resampler: rtc.AudioResampler | None = None
 
         async for input_frame in self._input_ch:
             if not isinstance(input_frame, rtc.AudioFrame):
                 # estimate the speech rate for the last frame
-                available_samples = sum(frame.samples_per_channel for frame in inference_frames)
-                if available_samples > self._window_size_samples * 0.5:
-                    frame = rtc.combine_audio_frames(inference_frames)
-                    frame_f32_data = np.divide(frame.data, np.iinfo(np.int16).max, dtype=np.float32)
-
-                    sr = self._compute_speaking_rate(frame_f32_data, _inference_sample_rate)
-                    pub_timestamp += frame.duration
+                available_samples = window_end - window_start
+                if flux is not None and available_samples > self._window_size_samples * 0.5:
+                    sr = self._compute_speaking_rate(
+                        audio[window_start:window_end], _inference_sample_rate
+                    )
+                    pub_timestamp += available_samples / _inference_sample_rate
                     self._event_ch.send_nowait(
                         SpeakingRateEvent(
                             timestamp=pub_timestamp,
@@ -95,7 +96,9 @@ class SpeakingRateStream:
                             speaking_rate=sr,
                         )
                     )
-                inference_frames = []
+                window_start = window_end = 0
+                if flux is not None:
+                    flux.reset()
                 continue
 
             # resample the input frame if necessary
@@ -105,7 +108,10 @@ class SpeakingRateStream:
 
                 self._window_size_samples = int(self._opts.window_duration * _inference_sample_rate)
                 self._step_size_samples = int(self._opts.step_size * _inference_sample_rate)
-                inference_f32_data = np.empty(self._window_size_samples, dtype=np.float32)
+                audio = np.empty(self._window_size_samples * 2, dtype=np.float32)
+                flux = _SlidingSpectralFlux(
+                    _inference_sample_rate, self._window_size_samples, self._step_size_samples
+                )
 
                 if self._input_sample_rate != _inference_sample_rate:
                     resampler = rtc.AudioResampler(
@@ -124,26 +130,35 @@ class SpeakingRateStream:
                 )
                 continue
 
-            if resampler is not None:
-                inference_frames.extend(resampler.push(input_frame))
-            else:
-                inference_frames.append(input_frame)
+            assert flux is not None
+            frames = resampler.push(input_frame) if resampler is not None else [input_frame]
+            for frame in frames:
+                samples = np.frombuffer(frame.data, dtype=np.int16)
+                if window_end + len(samples) > len(audio):
+                    # move the current window to the start of the buffer
+                    remaining = window_end - window_start
+                    if remaining + len(samples) > len(audio):
+                        grown = np.empty(remaining + len(samples), dtype=np.float32)
+                        grown[:remaining] = audio[window_start:window_end]
+                        audio = grown
+                    else:
+                        audio[:remaining] = audio[window_start:window_end]
+                    window_start, window_end = 0, remaining
 
-            while True:
-                available_samples = sum(frame.samples_per_channel for frame in inference_frames)
-                if available_samples < self._window_size_samples:
-                    break
-
-                inference_frame = rtc.combine_audio_frames(inference_frames)
                 np.divide(
-                    inference_frame.data[: self._window_size_samples],
+                    samples,
                     np.iinfo(np.int16).max,
-                    out=inference_f32_data,
+                    out=audio[window_end : window_end + len(samples)],
                     dtype=np.float32,
                 )
+                window_end += len(samples)
+
+            while window_end - window_start >= self._window_size_samples:
+                window = audio[window_start : window_start + self._window_size_samples]
+                avg_flux = flux.push_window(window)
 
                 # run the inference
-                sr = self._compute_speaking_rate(inference_f32_data, _inference_sample_rate)
+                sr = avg_flux if not self._is_silent(window) else 0.0
                 self._event_ch.send_nowait(
                     SpeakingRateEvent(
                         timestamp=pub_timestamp,
@@ -154,88 +169,32 @@ class SpeakingRateStream:
 
                 # move the window forward by the hop size
                 pub_timestamp += self._opts.step_size
-                if len(inference_frame.data) - self._step_size_samples > 0:
-                    data = inference_frame.data[self._step_size_samples :]
-                    inference_frames = [
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=inference_frame.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    ]
+                window_start += self._step_size_samples
 
-    def _compute_speaking_rate(
-        self, audio: np.ndarray[tuple[int], np.dtype[np.float32]], sample_rate: int
-    ) -> float:
-        """
-        Compute the speaking rate of the audio using the selected method
-        """
+    def _is_silent(self, audio: np.ndarray[tuple[int], np.dtype[np.float32]]) -> bool:
         silence_threshold = self._opts._silence_threshold
 
-        audio_sq = audio**2
         # check if the audio is silent
-        overall_rms = np.sqrt(np.mean(audio_sq))
-        if overall_rms < silence_threshold:
-            return 0.0
+        if len(audio) == 0 or np.sqrt(np.dot(audio, audio) / len(audio)) < silence_threshold:
+            return True
 
         # or if the tail of the audio is silent
-        tail_audio_sq = audio_sq[int(len(audio_sq) * 0.7) :]
-        if len(tail_audio_sq) > 0 and np.sqrt(np.mean(tail_audio_sq)) < silence_threshold * 0.5:
-            return 0.0
-
-        return self._spectral_flux(audio, sample_rate)
+        tail_audio = audio[int(len(audio) * 0.7) :]
+        return (
+            len(tail_audio) > 0
+            and np.sqrt(np.dot(tail_audio, tail_audio) / len(tail_audio)) < silence_threshold * 0.5
+        )
 
-    def _stft(
-        self,
-        audio: np.ndarray[tuple[int], np.dtype[np.float32]],
-        frame_length: int,
-        hop_length: int,
-    ) -> np.ndarray[tuple[int, int], np.dtype[np.complex128]]:
-        num_frames = (len(audio) - frame_length) // hop_length + 1
-        result = np.zeros((frame_length // 2 + 1, num_frames), dtype=np.complex128)
-
-        window = np.hanning(frame_length)
-        scale_factor = 1.0 / np.sqrt(np.sum(window**2))
-        for i in range(num_frames):
-            start = i * hop_length
-            end = start + frame_length
-            frame = audio[start:end]
-            windowed = frame * window
-
-            # perform fft and scale
-            fft_result = np.fft.rfft(windowed)
-            result[:, i] = fft_result * scale_factor
-
-        return result
-
-    def _spectral_flux(
+    def _compute_speaking_rate(
         self, audio: np.ndarray[tuple[int], np.dtype[np.float32]], sample_rate: int
     ) -> float:
         """
-        Calculate speaking rate based on spectral flux.
-        Higher spectral flux correlates with more rapid speech articulation.
+        Compute the speaking rate of the audio using the selected method
         """
-        # Parameters
-        frame_length = int(sample_rate * 0.025)  # 25ms
-        hop_length = frame_length // 2  # 50% overlap
-
-        Zxx = self._stft(audio, frame_length, hop_length)
-
-        # calculate spectral flux (sum of spectral magnitude changes between frames)
-        spectral_magnitudes = np.abs(Zxx)
-        spectral_flux_values = []
-
-        for i in range(1, spectral_magnitudes.shape[1]):
-            # l1 norm of difference between consecutive spectral frames
-            flux = np.sum(np.abs(spectral_magnitudes[:, i] - spectral_magnitudes[:, i - 1]))
-            spectral_flux_values.append(flux)
-
-        if not spectral_flux_values:
+        if self._is_silent(audio):
             return 0.0
 
-        avg_flux = float(np.mean(spectral_flux_values))
-        return avg_flux
+        return _spectral_flux(audio, sample_rate)
 
     def push_frame(self, frame: rtc.AudioFrame) -> None:
         """Push audio frame for syllable rate detection"""
@@ -258,3 +217,103 @@ class SpeakingRateStream:
 
     def __aiter__(self) -> AsyncIterator[SpeakingRateEvent]:
         return self._event_ch
+
+
+def _stft_magnitudes(
+    audio: np.ndarray[tuple[int], np.dtype[np.float32]],
+    window: np.ndarray[tuple[int], np.dtype[np.float64]],
+    hop_length: int,
+) -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
+    """Magnitudes of the STFT of the audio, one row per frame. The window includes the scale"""
+    frame_length = len(window)
+    if len(audio) < frame_length:
+        return np.empty((0, frame_length // 2 + 1), dtype=np.float64)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_length)[::hop_length]
+    return np.abs(np.fft.rfft(frames * window, axis=1))
+
+
+def _stft_window(frame_length: int) -> np.ndarray[tuple[int], np.dtype[np.float64]]:
+    window = np.hanning(frame_length)
+    scale_factor = 1.0 / float(np.sqrt(np.sum(window**2)))
+    return window * scale_factor
+
+
+def _spectral_flux(audio: np.ndarray[tuple[int], np.dtype[np.float32]], sample_rate: int) -> float:
+    """
+    Calculate speaking rate based on spectral flux.
+    Higher spectral flux correlates with more rapid speech articulation.
+    """
+    # Parameters
+    frame_length = int(sample_rate * 0.025)  # 25ms
+    hop_length = frame_length // 2  # 50% overlap
+
+    magnitudes = _stft_magnitudes(audio, _stft_window(frame_length), hop_length)
+    if len(magnitudes) < 2:
+        return 0.0
+
+    # l1 norm of difference between consecutive spectral frames
+    spectral_flux_values = np.sum(np.abs(np.diff(magnitudes, axis=0)), axis=1)
+    return float(np.mean(spectral_flux_values))
+
+
+class _SlidingSpectralFlux:
+    """Spectral flux of consecutive windows of an audio stream, each starting a step after the
+    previous one.
+
+    When the step is a multiple of the STFT hop, the frames of a window are the frames of the
+    previous one shifted by the step, so only the frames at its end are computed and the flux
+    values of the window are kept in a ring with their rolling sum. Otherwise the whole window
+    is computed.
+    """
+
+    def __init__(self, sample_rate: int, window_size: int, step_size: int) -> None:
+        frame_length = int(sample_rate * 0.025)  # 25ms
+        self._hop_length = frame_length // 2  # 50% overlap
+        self._window = _stft_window(frame_length)
+        self._sample_rate = sample_rate
+
+        num_frames = (window_size - frame_length) // self._hop_length + 1
+        self._step_frames = step_size // self._hop_length if self._hop_length else 0
+        self._incremental = (
+            self._hop_length > 0
+            and step_size % self._hop_length == 0
+            and 0 < self._step_frames < num_frames
+        )
+        self._first_new_frame = (num_frames - self._step_frames) * self._hop_length
+
+        self._flux = np.zeros(max(num_frames - 1, 0), dtype=np.float64)
+        self._flux_pos = 0
+        self._flux_sum = 0.0
+        self._last_magnitudes: np.ndarray[tuple[int], np.dtype[np.float64]] | None = None
+
+    def reset(self) -> None:
+        """the next window doesn't follow the previous one"""
+        self._last_magnitudes = None
+
+    def push_window(self, audio: np.ndarray[tuple[int], np.dtype[np.float32]]) -> float:
+        """average spectral flux of the window following the previous one"""
+        if not self._incremental:
+            return _spectral_flux(audio, self._sample_rate)
+
+        if self._last_magnitudes is None:
+            magnitudes = _stft_magnitudes(audio, self._window, self._hop_length)
+            self._flux[:] = np.sum(np.abs(np.diff(magnitudes, axis=0)), axis=1)
+            self._flux_pos = 0
+            self._flux_sum = float(np.sum(self._flux))
+        else:
+            # the new frames at the end of the window, and the last frame of the previous one
+            magnitudes = _stft_magnitudes(
+                audio[self._first_new_frame :], self._window, self._hop_length
+            )
+            magnitudes = np.concatenate((self._last_magnitudes[np.newaxis], magnitudes))
+            new_flux = np.sum(np.abs(np.diff(magnitudes, axis=0)), axis=1)
+
+            # replace the flux values of the frames that left the window
+            idx = (self._flux_pos + np.arange(self._step_frames)) % len(self._flux)
+            self._flux_sum += float(np.sum(new_flux) - np.sum(self._flux[idx]))
+            self._flux[idx] = new_flux
+            self._flux_pos = (self._flux_pos + self._step_frames) % len(self._flux)
+
+        self._last_magnitudes = magnitudes[-1]
+        return self._flux_sum / len(self._flux)
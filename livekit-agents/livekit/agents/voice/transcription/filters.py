@@ -1,16 +1,24 @@
 import re
 from collections.abc import AsyncIterable, Sequence
-from typing import Literal
+from typing import Callable, Literal, Protocol
 
 TextTransforms = Literal["filter_markdown", "filter_emoji"]
 
 
+class _TextTransform(Protocol):
+    def push(self, text: str) -> str:
+        """Transform the text, part of it may be held until the next push or the flush"""
+        ...
+
+    def flush(self) -> str: ...
+
+
 def apply_text_transforms(
     text: AsyncIterable[str], transforms: Sequence[TextTransforms]
 ) -> AsyncIterable[str]:
-    all_transforms = {
-        "filter_markdown": filter_markdown,
-        "filter_emoji": filter_emoji,
+    all_transforms: dict[str, Callable[[], _TextTransform]] = {
+        "filter_markdown": _MarkdownFilter,
+        "filter_emoji": _EmojiFilter,
     }
 
     for transform in transforms:
@@ -18,8 +26,25 @@ def apply_text_transforms(
             raise ValueError(
                 f"Invalid transform: {transform}, available transforms: {all_transforms.keys()}"
             )
-        text = all_transforms[transform](text)
-    return text
+
+    # the transforms are chained synchronously inside a single async generator
+    return _transform_text(text, [all_transforms[transform]() for transform in transforms])
+
+
+async def _transform_text(
+    text: AsyncIterable[str], transforms: list[_TextTransform]
+) -> AsyncIterable[str]:
+    async for chunk in text:
+        for transform in transforms:
+            chunk = transform.push(chunk)
+        if chunk:
+            yield chunk
+
+    chunk = ""
+    for transform in transforms:
+        chunk = (transform.push(chunk) if chunk else "") + transform.flush()
+    if chunk:
+        yield chunk
 
 
 LINE_PATTERNS = [
@@ -52,6 +77,11 @@ INLINE_PATTERNS = [
     (re.compile(r"~~(?!\s)([^~]*?)(?<!\s)~~"), ""),
 ]
 INLINE_SPLIT_TOKENS = " ,.?!;，。？！；"
+MAX_LOOKAHEAD = 256  # chars held for an incomplete pattern before they are processed anyway
+
+# the characters the patterns need, the text without them is left as is
+_MARKDOWN_CHARS = re.compile(r"[#\-+*>\[_`~]")
+_INCOMPLETE_PATTERN_CHARS = re.compile(r"[*_`~\[]")
 
 COMPLETE_LINKS_PATTERN = re.compile(r"\[[^\]]*\]\([^)]*\)")  # links [text](url)
 COMPLETE_IMAGES_PATTERN = re.compile(r"!\[[^\]]*\]\([^)]*\)")  # images ![text](url)
@@ -61,96 +91,126 @@ async def filter_markdown(text: AsyncIterable[str]) -> AsyncIterable[str]:
     """
     Filter out markdown symbols from the text.
     """
+    markdown_filter = _MarkdownFilter()
+    async for chunk in text:
+        if filtered := markdown_filter.push(chunk):
+            yield filtered
 
-    def has_incomplete_pattern(buffer: str) -> bool:
-        """Check if buffer might contain incomplete markdown patterns that need more text."""
+    if filtered := markdown_filter.flush():
+        yield filtered
 
-        if buffer.endswith(("#", "-", "+", "*", ">", "!", "`", "~", " ")):
-            return True
 
-        # check for incomplete bold (**text** or *text*)
-        double_asterisks = buffer.count("**")
-        if double_asterisks % 2 == 1:
-            return True
+class _MarkdownFilter:
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._buffer_is_newline = True  # track if buffer is at start of line
+        self._last_split_pos = -1  # position of the last split token in the buffer
 
-        single_asterisks = buffer.count("*") - (double_asterisks * 2)
-        if single_asterisks % 2 == 1:
-            return True
+    def push(self, text: str) -> str:
+        if "\n" in text:
+            lines = (self._buffer + text).split("\n")
+            self._buffer = lines[-1]  # keep last incomplete line
+            self._last_split_pos = _rfind_split_token(self._buffer)
+
+            processed = ""
+            for i, line in enumerate(lines[:-1]):
+                is_newline = self._buffer_is_newline if i == 0 else True
+                processed += _process_complete_text(line, is_newline=is_newline) + "\n"
+
+            self._buffer_is_newline = True
+            return processed
+
+        # only the new text is searched, the buffer before it was already
+        if (split_pos := _rfind_split_token(text)) != -1:
+            self._last_split_pos = len(self._buffer) + split_pos
+        self._buffer += text
+
+        # split at the position after the split token
+        if self._last_split_pos >= 1:
+            processable = self._buffer[: self._last_split_pos]  # exclude the split token
+            if not _has_incomplete_pattern(processable) or len(processable) > MAX_LOOKAHEAD:
+                self._buffer = self._buffer[self._last_split_pos :]
+                self._last_split_pos = 0
+                is_newline, self._buffer_is_newline = self._buffer_is_newline, False
+                return _process_complete_text(processable, is_newline=is_newline)
 
-        # check for incomplete underscores (__text__ or _text_)
-        double_underscores = buffer.count("__")
-        if double_underscores % 2 == 1:
-            return True
-        single_underscores = buffer.count("_") - (double_underscores * 2)
-        if single_underscores % 2 == 1:
-            return True
+        return ""
 
-        # check for incomplete code (`text`)
-        backticks = buffer.count("`")
-        if backticks % 2 == 1:
-            return True
+    def flush(self) -> str:
+        processed = ""
+        if self._buffer:
+            processed = _process_complete_text(self._buffer, is_newline=self._buffer_is_newline)
 
-        # check for incomplete strikethrough (~~text~~)
-        double_tildes = buffer.count("~~")
-        if double_tildes % 2 == 1:
-            return True
+        self._buffer = ""
+        self._buffer_is_newline = True
+        self._last_split_pos = -1
+        return processed
 
-        # check for incomplete links [text](url) or images ![text](url)
-        open_brackets = buffer.count("[")
-        complete_links = len(COMPLETE_LINKS_PATTERN.findall(buffer))
-        complete_images = len(COMPLETE_IMAGES_PATTERN.findall(buffer))
 
-        remaining_brackets = open_brackets - complete_links - complete_images
-        if remaining_brackets > 0:
-            return True
+def _rfind_split_token(text: str) -> int:
+    return max(text.rfind(token) for token in INLINE_SPLIT_TOKENS)
 
+
+def _has_incomplete_pattern(buffer: str) -> bool:
+    """Check if buffer might contain incomplete markdown patterns that need more text."""
+
+    if buffer.endswith(("#", "-", "+", "*", ">", "!", "`", "~", " ")):
+        return True
+
+    if not _INCOMPLETE_PATTERN_CHARS.search(buffer):
         return False
 
-    def process_complete_text(text: str, is_newline: bool = False) -> str:
-        if is_newline:
-            for pattern, replacement in LINE_PATTERNS:
-                text = pattern.sub(replacement, text)
+    # check for incomplete bold (**text** or *text*)
+    double_asterisks = buffer.count("**")
+    if double_asterisks % 2 == 1:
+        return True
 
-        for pattern, replacement in INLINE_PATTERNS:
-            text = pattern.sub(replacement, text)
+    single_asterisks = buffer.count("*") - (double_asterisks * 2)
+    if single_asterisks % 2 == 1:
+        return True
 
-        return text
+    # check for incomplete underscores (__text__ or _text_)
+    double_underscores = buffer.count("__")
+    if double_underscores % 2 == 1:
+        return True
+    single_underscores = buffer.count("_") - (double_underscores * 2)
+    if single_underscores % 2 == 1:
+        return True
 
-    buffer = ""
-    buffer_is_newline = True  # track if buffer is at start of line
+    # check for incomplete code (`text`)
+    backticks = buffer.count("`")
+    if backticks % 2 == 1:
+        return True
 
-    async for chunk in text:
-        buffer += chunk
+    # check for incomplete strikethrough (~~text~~)
+    double_tildes = buffer.count("~~")
+    if double_tildes % 2 == 1:
+        return True
 
-        if "\n" in buffer:
-            lines = buffer.split("\n")
-            buffer = lines[-1]  # keep last incomplete line
+    # check for incomplete links [text](url) or images ![text](url)
+    open_brackets = buffer.count("[")
+    complete_links = len(COMPLETE_LINKS_PATTERN.findall(buffer))
+    complete_images = len(COMPLETE_IMAGES_PATTERN.findall(buffer))
 
-            for i, line in enumerate(lines[:-1]):
-                is_newline = buffer_is_newline if i == 0 else True
-                processed_line = process_complete_text(line, is_newline=is_newline)
-                yield processed_line + "\n"
+    remaining_brackets = open_brackets - complete_links - complete_images
+    if remaining_brackets > 0:
+        return True
 
-            buffer_is_newline = True
-            continue
+    return False
 
-        # split at the position after the split token
-        last_split_pos = 0
-        for token in INLINE_SPLIT_TOKENS:
-            last_split_pos = max(last_split_pos, buffer.rfind(token, last_split_pos))
-            if last_split_pos >= len(buffer) - 1:
-                break
 
-        if last_split_pos >= 1:
-            processable = buffer[:last_split_pos]  # exclude the split token
-            rest = buffer[last_split_pos:]
-            if not has_incomplete_pattern(processable):
-                yield process_complete_text(processable, is_newline=buffer_is_newline)
-                buffer = rest
-                buffer_is_newline = False
+def _process_complete_text(text: str, is_newline: bool = False) -> str:
+    if not _MARKDOWN_CHARS.search(text):
+        return text
+
+    if is_newline:
+        for pattern, replacement in LINE_PATTERNS:
+            text = pattern.sub(replacement, text)
 
-    if buffer:
-        yield process_complete_text(buffer, is_newline=buffer_is_newline)
+    for pattern, replacement in INLINE_PATTERNS:
+        text = pattern.sub(replacement, text)
+
+    return text
 
 
 # Unicode block ranges from: https://unicode.org/Public/UNIDATA/Blocks.txt
@@ -171,7 +231,18 @@ async def filter_emoji(text: AsyncIterable[str]) -> AsyncIterable[str]:
     """
     Filter out emojis from the text.
     """
-
+    emoji_filter = _EmojiFilter()
     async for chunk in text:
-        filtered_chunk = EMOJI_PATTERN.sub("", chunk)
-        yield filtered_chunk
+        yield emoji_filter.push(chunk)
+
+
+class _EmojiFilter:
+    # every emoji char is removed on its own, nothing is held between the chunks
+
+    def push(self, text: str) -> str:
+        if text.isascii():
+            return text
+        return EMOJI_PATTERN.sub("", text)
+
+    def flush(self) -> str:
+        return ""
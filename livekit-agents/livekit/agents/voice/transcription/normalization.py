@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import functools
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Callable, Union
+
+Replacement = Union[str, Callable[[re.Match[str]], str]]
+
+
+@dataclass(frozen=True)
+class NormalizationRule:
+    pattern: str
+    replacement: Replacement
+    flags: int = 0
+
+
+COMMON_RULES = [
+    # urls: keep the domain https://www.example.com/path?q=1 -> example.com
+    # (the punctuation ending the sentence is kept)
+    NormalizationRule(
+        r"(?:https?://(?:www\.)?|\bwww\.)([^\s/?#]+)\S*?(?=[.,;:!?)\]]*(?:\s|$))", r"\1"
+    ),
+    # repeated punctuation: "!!!" -> "!", "?!?" -> "?", "....." -> "..."
+    NormalizationRule(r"([!?])[!?]+", r"\1"),
+    NormalizationRule(r"([,;:])\1+", r"\1"),
+    NormalizationRule(r"\.{4,}", "..."),
+    # whitespaces: collapse the runs and the newlines/tabs into a single space
+    NormalizationRule(r"\s{2,}|[^\S ]", " "),
+]
+
+# thousands separators of the long numbers: 1,000,000 -> 1000000
+_COMMA_THOUSANDS = NormalizationRule(r"(?<=\d),(?=\d{3}(?!\d))", "")
+_DOT_THOUSANDS = NormalizationRule(r"(?<=\d)\.(?=\d{3}(?!\d))", "")
+_SPACE_THOUSANDS = NormalizationRule(r"(?<=\d)[ \u00a0\u202f](?=\d{3}(?!\d))", "")
+
+LANGUAGE_RULES: dict[str, list[NormalizationRule]] = {
+    "en": [_COMMA_THOUSANDS],
+    "zh": [_COMMA_THOUSANDS],
+    "ja": [_COMMA_THOUSANDS],
+    "ko": [_COMMA_THOUSANDS],
+    "de": [_DOT_THOUSANDS],
+    "es": [_DOT_THOUSANDS],
+    "it": [_DOT_THOUSANDS],
+    "nl": [_DOT_THOUSANDS],
+    "pt": [_DOT_THOUSANDS],
+    "fr": [_SPACE_THOUSANDS],
+}
+
+
+def default_rules(language: str) -> list[NormalizationRule]:
+    """The rules of the language ("en", "fr-FR", ...) followed by the common rules."""
+    language = language.lower().replace("_", "-").split("-")[0]
+    return [*LANGUAGE_RULES.get(language, []), *COMMON_RULES]
+
+
+@functools.cache
+def _compile_rules(
+    rules: tuple[NormalizationRule, ...],
+) -> tuple[tuple[re.Pattern[str], Replacement], ...]:
+    return tuple((re.compile(rule.pattern, rule.flags), rule.replacement) for rule in rules)
+
+
+class TextNormalizer:
+    def __init__(
+        self,
+        *,
+        language: str = "en",
+        rules: Sequence[NormalizationRule] | None = None,
+        cache_size: int = 1024,
+    ) -> None:
+        """
+        Rewrites the text sent to the TTS to save characters (and latency) on what doesn't
+        change the speech: urls, thousands separators, repeated punctuation and whitespaces.
+        The rules are compiled once per process, and the normalized sentences are memoized.
+
+        Args:
+            language: The language of the default rule pack.
+            rules: The rules to apply in order, instead of ``default_rules(language)``.
+            cache_size: Maximum number of normalized sentences kept in memory.
+        """
+        if rules is None:
+            rules = default_rules(language)
+
+        self._rules = _compile_rules(tuple(rules))
+        self._normalize = functools.lru_cache(maxsize=cache_size)(self._apply_rules)
+
+    def normalize(self, text: str) -> str:
+        return self._normalize(text)
+
+    def _apply_rules(self, text: str) -> str:
+        for pattern, replacement in self._rules:
+            text = pattern.sub(replacement, text)
+        return text
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import itertools
+import functools
 import time
 from dataclasses import dataclass, field
 from typing import Callable
@@ -19,12 +19,14 @@ from .. import io
 from ._speaking_rate import SpeakingRateDetector, SpeakingRateStream
 
 STANDARD_SPEECH_RATE = 3.83  # hyphens (syllables) per second
+HYPHEN_CACHE_SIZE = 4096  # words
 
 
 @dataclass
 class _TextSyncOptions:
     speed: float
     hyphenate_word: Callable[[str], list[str]]
+    hyphen_count: Callable[[str], int]  # memoized len(hyphenate_word(word))
     word_tokenizer: tokenize.WordTokenizer
     speaking_rate_detector: SpeakingRateDetector
 
@@ -121,18 +123,63 @@ class _AudioData:
 @dataclass
 class _TextData:
     word_stream: tokenize.WordStream
+    word_tokenizer: tokenize.WordTokenizer
+    hyphen_count: Callable[[str], int]
     pushed_text: str = ""
     done: bool = False
     forwarded_hyphens: int = 0
     forwarded_text: str = ""
 
+    pushed_hyphens: list[int] = field(default_factory=lambda: [0])
+    """hyphens of pushed_text[:i], the hyphens of a word are spread over its chars"""
+
+    _settled_len: int = 0  # the words before can't change anymore
+
+    def push_text(self, text: str) -> None:
+        self.pushed_text += text
+
+        # only the last word may continue in the next text, tokenize again after the word
+        # before it. The tokens are located in the text, they may not cover it all (e.g. the
+        # whitespaces or the punctuations are dropped by the tokenizer)
+        del self.pushed_hyphens[self._settled_len + 1 :]
+        words = self.word_tokenizer.tokenize(self.pushed_text[self._settled_len :])
+        hyphens = self.pushed_hyphens[-1]
+        pos = self._settled_len
+        for i, word in enumerate(words):
+            start = self.pushed_text.find(word, pos)
+            if start == -1:
+                start = end = pos  # not in the text as is, counted at the cursor
+            else:
+                end = start + len(word)
+            self.pushed_hyphens.extend([hyphens] * (start - pos))
+
+            count = self.hyphen_count(word)
+            # a part of a word counts for one hyphen at least, like the word alone
+            n = end - start
+            self.pushed_hyphens.extend(hyphens + (count * k + n - 1) // n for k in range(1, n + 1))
+            hyphens += count
+            pos = end
+            if i < len(words) - 1:
+                self._settled_len = end
+
+        self.pushed_hyphens.extend([hyphens] * (len(self.pushed_text) - pos))
+
+    def count_hyphens(self, start: int, end: int) -> int:
+        """Hyphens of pushed_text[start:end], negative if end < start."""
+        last = len(self.pushed_hyphens) - 1
+        return self.pushed_hyphens[min(end, last)] - self.pushed_hyphens[min(start, last)]
+
 
 class _SegmentSynchronizerImpl:
     """Synchronizes one text segment with one audio segment"""
 
     def __init__(self, options: _TextSyncOptions, *, next_in_chain: io.TextOutput) -> None:
         self._opts = options
-        self._text_data = _TextData(word_stream=self._opts.word_tokenizer.stream())
+        self._text_data = _TextData(
+            word_stream=self._opts.word_tokenizer.stream(),
+            word_tokenizer=self._opts.word_tokenizer,
+            hyphen_count=self._opts.hyphen_count,
+        )
         self._audio_data = _AudioData(sr_stream=self._opts.speaking_rate_detector.stream())
 
         self._next_in_chain = next_in_chain
@@ -212,7 +259,7 @@ class _SegmentSynchronizerImpl:
             )
 
         self._text_data.word_stream.push_text(text)
-        self._text_data.pushed_text += text
+        self._text_data.push_text(text)
 
     def end_text_input(self) -> None:
         if self.closed:
@@ -247,7 +294,7 @@ class _SegmentSynchronizerImpl:
         if not self._text_data.done or not self._audio_data.done:
             return
 
-        pushed_hyphens = len(self._calc_hyphens(self._text_data.pushed_text))
+        pushed_hyphens = self._text_data.pushed_hyphens[-1]
         # hyphens per second
         if self._audio_data.pushed_duration > 0:
             self._speed = pushed_hyphens / self._audio_data.pushed_duration
@@ -323,7 +370,7 @@ class _SegmentSynchronizerImpl:
                 self._out_ch.send_nowait(word)
                 continue
 
-            word_hyphens = len(self._opts.hyphenate_word(word))
+            word_hyphens = self._opts.hyphen_count(word)
             elapsed = time.time() - self._start_wall_time - self._paused_duration
 
             d_hyphens = 0
@@ -333,12 +380,7 @@ class _SegmentSynchronizerImpl:
                 # use the actual speaking rate
                 target_len = int(annotated.accumulate_to(elapsed))
                 forwarded_len = len(self._text_data.forwarded_text)
-                if target_len >= forwarded_len:
-                    d_text = self._text_data.pushed_text[forwarded_len:target_len]
-                    d_hyphens = len(self._calc_hyphens(d_text))
-                else:
-                    d_text = self._text_data.pushed_text[target_len:forwarded_len]
-                    d_hyphens = -len(self._calc_hyphens(d_text))
+                d_hyphens = self._text_data.count_hyphens(forwarded_len, target_len)
 
             elif self._speed_on_speaking_unit:
                 # use the estimated speed from speaking rate
@@ -359,14 +401,6 @@ class _SegmentSynchronizerImpl:
             self._text_data.forwarded_hyphens += word_hyphens
             self._text_data.forwarded_text += word
 
-    def _calc_hyphens(self, text: str) -> list[str]:
-        """Calculate hyphens for text."""
-        words = self._opts.word_tokenizer.tokenize(text)
-        hyphens = list(
-            itertools.chain.from_iterable(self._opts.hyphenate_word(word) for word in words)
-        )
-        return hyphens
-
     async def _sleep_if_not_closed(self, delay: float) -> None:
         with contextlib.suppress(asyncio.TimeoutError):
             await asyncio.wait([self._close_future], timeout=delay)
@@ -409,6 +443,9 @@ class TranscriptSynchronizer:
         self._opts = _TextSyncOptions(
             speed=speed,
             hyphenate_word=hyphenate_word,
+            hyphen_count=functools.lru_cache(maxsize=HYPHEN_CACHE_SIZE)(
+                lambda word: len(hyphenate_word(word))
+            ),
             word_tokenizer=(
                 word_tokenizer
                 or tokenize.basic.WordTokenizer(
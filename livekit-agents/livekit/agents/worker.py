@@ -32,6 +32,7 @@ from urllib.parse import urljoin, urlparse
 
 import aiohttp
 import jwt
+import psutil
 from aiohttp import web
 
 from livekit import api, rtc
@@ -130,6 +131,21 @@ else:
 T = TypeVar("T")
 
 
+def _processes_memory(processes: dict[int, dict[str, Any]]) -> list[dict[str, Any]]:
+    """memory used by the worker processes, the shared memory of the job processes is mostly
+    the copy-on-write pages inherited from the forkserver"""
+    report = []
+    for pid, info in processes.items():
+        try:
+            usage = utils.hw.get_memory_usage(pid)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+        report.append({"pid": pid, **info, **usage.to_dict()})
+
+    return report
+
+
 @dataclass(frozen=True)
 class _WorkerEnvOption(Generic[T]):
     dev_default: T
@@ -166,12 +182,29 @@ class WorkerOptions:
     Defaults to 0.7 on "production" mode, and is disabled in "development" mode.
     """
 
+    max_jobs_per_process: int = 4
+    """Maximum number of jobs running concurrently in a process, only used with
+    JobExecutorType.SHARED_PROCESS."""
     job_memory_warn_mb: float = 500
     """Memory warning threshold in MB. If the job process exceeds this limit, a warning will be logged."""  # noqa: E501
     job_memory_limit_mb: float = 0
     """Maximum memory usage for a job in MB, the job process will be killed if it exceeds this limit.
     Defaults to 0 (disabled).
     """  # noqa: E501
+    job_memory_metric: utils.hw.MemoryMetric = "rss"
+    """Memory metric compared to job_memory_warn_mb and job_memory_limit_mb. With the forkserver,
+    "rss" counts the pages shared by the job processes in full in each process, "pss" splits
+    them between the processes and "uss" only counts the memory private to the process."""
+
+    inference_shared_memory_mb: float = 0
+    """Size in MB of the shared memory used to exchange large payloads with the inference process.
+    Defaults to 0 (disabled), the payloads are sent through the IPC socket.
+    """
+    recording_encoder_process: bool = False
+    """Encode the recordings of the RecorderIOs created with `encoder_process=True` in the
+    inference process, with a small fixed number of threads shared by all the jobs, instead of
+    a thread of each job process. Defaults to False.
+    """
 
     drain_timeout: int = 1800
     """Number of seconds to wait for current jobs to finish upon receiving TERM or INT signal."""
@@ -179,6 +212,12 @@ class WorkerOptions:
         dev_default=0, prod_default=min(math.ceil(get_cpu_monitor().cpu_count()), 4)
     )
     """Number of idle processes to keep warm."""
+    idle_process_policy: ipc.proc_pool.IdleProcessPolicy | None = None
+    """Decides how many idle processes are kept warm, up to num_idle_processes.
+
+    Defaults to always keeping num_idle_processes, use ``ipc.proc_pool.PredictiveIdlePolicy``
+    to scale them with the job arrival rate and the process initialization time.
+    """
     shutdown_process_timeout: float = 60.0
     """Maximum amount of time to wait for a job to shut down gracefully"""
     initialize_process_timeout: float = 10.0
@@ -278,7 +317,10 @@ class Worker(utils.EventEmitter[EventTypes]):
         os.environ["LIVEKIT_API_KEY"] = opts.api_key
         os.environ["LIVEKIT_API_SECRET"] = opts.api_secret
 
-        if opts.job_memory_limit_mb > 0 and opts.job_executor_type != JobExecutorType.PROCESS:
+        if opts.job_memory_limit_mb > 0 and opts.job_executor_type not in (
+            JobExecutorType.PROCESS,
+            JobExecutorType.SHARED_PROCESS,
+        ):
             logger.warning(
                 "max_job_memory_usage is only supported for process-based job executors, "
                 "ignoring max_job_memory_usage"
@@ -313,6 +355,12 @@ class Worker(utils.EventEmitter[EventTypes]):
 
         self._mp_ctx = mp.get_context(self._opts.multiprocessing_context)
 
+        if opts.recording_encoder_process:
+            from .voice.recorder_io.encoder_process import _RecorderEncoderRunner
+
+            if _RecorderEncoderRunner.INFERENCE_METHOD not in _InferenceRunner.registered_runners:
+                _InferenceRunner.register_runner(_RecorderEncoderRunner)
+
         self._inference_executor: ipc.inference_proc_executor.InferenceProcExecutor | None = None
         if len(_InferenceRunner.registered_runners) > 0:
             self._inference_executor = ipc.inference_proc_executor.InferenceProcExecutor(
@@ -327,6 +375,7 @@ class Worker(utils.EventEmitter[EventTypes]):
                 mp_ctx=self._mp_ctx,
                 loop=self._loop,
                 http_proxy=opts.http_proxy or None,
+                shared_memory_mb=opts.inference_shared_memory_mb,
             )
 
         self._proc_pool = ipc.proc_pool.ProcPool(
@@ -342,6 +391,9 @@ class Worker(utils.EventEmitter[EventTypes]):
             memory_warn_mb=opts.job_memory_warn_mb,
             memory_limit_mb=opts.job_memory_limit_mb,
             http_proxy=opts.http_proxy or None,
+            idle_process_policy=opts.idle_process_policy,
+            max_jobs_per_process=opts.max_jobs_per_process,
+            memory_metric=opts.job_memory_metric,
         )
 
         self._previous_status = agent.WorkerStatus.WS_AVAILABLE
@@ -361,6 +413,9 @@ class Worker(utils.EventEmitter[EventTypes]):
             return web.Response(text="OK")
 
         async def worker(_: Any) -> web.Response:
+            processes = await self._loop.run_in_executor(
+                None, _processes_memory, self._worker_processes()
+            )
             body = json.dumps(
                 {
                     "agent_name": self._opts.agent_name,
@@ -368,6 +423,7 @@ class Worker(utils.EventEmitter[EventTypes]):
                     "active_jobs": len(self.active_jobs),
                     "sdk_version": __version__,
                     "project_type": "python",
+                    "processes": processes,
                 }
             )
             return web.Response(body=body, content_type="application/json")
@@ -390,6 +446,20 @@ class Worker(utils.EventEmitter[EventTypes]):
     def worker_info(self) -> WorkerInfo:
         return WorkerInfo(http_port=self._http_server.port)
 
+    def _worker_processes(self) -> dict[int, dict[str, Any]]:
+        processes: dict[int, dict[str, Any]] = {os.getpid(): {"type": "worker", "job_ids": []}}
+        if self._inference_executor is not None and self._inference_executor.pid:
+            processes[self._inference_executor.pid] = {"type": "inference", "job_ids": []}
+
+        for proc in self._proc_pool.processes:
+            # thread executors run inside the worker process
+            pid = getattr(proc, "pid", None) or os.getpid()
+            info = processes.setdefault(pid, {"type": "job", "job_ids": []})
+            if proc.running_job:
+                info["job_ids"].append(proc.running_job.job.id)
+
+        return processes
+
     async def run(self) -> None:
         if not self._closed:
             raise Exception("worker is already running")
@@ -402,7 +472,10 @@ class Worker(utils.EventEmitter[EventTypes]):
         if self._opts.multiprocessing_context == "forkserver":
             plugin_packages = [p.package for p in Plugin.registered_plugins] + ["av"]
             logger.info("preloading plugins", extra={"packages": plugin_packages})
-            self._mp_ctx.set_forkserver_preload(plugin_packages)
+            # imported last, once the plugins are registered inside the forkserver
+            self._mp_ctx.set_forkserver_preload(
+                plugin_packages + ["livekit.agents.ipc.forkserver_preload"]
+            )
 
         if self._inference_executor is not None:
             logger.info("starting inference executor")
@@ -980,6 +1053,14 @@ class Worker(utils.EventEmitter[EventTypes]):
         elif proc.status == ipc.job_executor.JobStatus.RUNNING:
             status = agent.JobStatus.JS_RUNNING
 
+        # the job status message has no field for it, the peak memory is logged instead
+        memory_peak: utils.hw.MemoryUsage | None = getattr(proc, "memory_peak", None)
+        if status != agent.JobStatus.JS_RUNNING and memory_peak is not None:
+            logger.info(
+                "job memory peak",
+                extra={"job_id": job_info.job.id, **memory_peak.to_dict(), **proc.logging_extra()},
+            )
+
         update = agent.UpdateJobStatus(job_id=job_info.job.id, status=status, error="")
         msg = agent.WorkerMessage(update_job=update)
         await self._queue_msg(msg)
@@ -63,4 +63,5 @@ class SentenceTokenizer(agents.tokenize.SentenceTokenizer):
             tokenizer=functools.partial(nltk.tokenize.sent_tokenize, language=config.language),
             min_token_len=self._config.min_sentence_len,
             min_ctx_len=self._config.stream_context_len,
+            boundary_chars=agents.tokenize.token_stream.SENTENCE_END_CHARS,
         )
@@ -31,6 +31,11 @@ class SileroPlugin(Plugin):
     def __init__(self) -> None:
         super().__init__(__name__, __version__, __package__, logger)
 
+    def preload_resources(self) -> None:
+        from .onnx_model import load_model
+
+        load_model()
+
 
 Plugin.register_plugin(SileroPlugin())
 
@@ -1,23 +1,32 @@
 # mypy: disable-error-code=unused-ignore
 
-import atexit
+from __future__ import annotations
+
 import importlib.resources
-from contextlib import ExitStack
+from collections.abc import Sequence
 
 import numpy as np
 import onnxruntime  # type: ignore
 
-_resource_files = ExitStack()
-atexit.register(_resource_files.close)
-
+from livekit.agents import utils
 
 SUPPORTED_SAMPLE_RATES = [8000, 16000]
 
 
-def new_inference_session(force_cpu: bool) -> onnxruntime.InferenceSession:
+def _load_model() -> bytes:
     res = importlib.resources.files("livekit.plugins.silero.resources") / "silero_vad.onnx"
-    ctx = importlib.resources.as_file(res)
-    path = str(_resource_files.enter_context(ctx))
+    return res.read_bytes()
+
+
+def load_model() -> bytes:
+    """the model file is read once per process, and inherited by the job processes when
+    preloaded inside the forkserver. only the serialized bytes are shared: each InferenceSession
+    still builds its own copy of the weights"""
+    return utils.shared_resource("silero.silero_vad.onnx", _load_model)
+
+
+def new_inference_session(force_cpu: bool) -> onnxruntime.InferenceSession:
+    model = load_model()
 
     opts = onnxruntime.SessionOptions()
     opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
@@ -28,10 +37,10 @@ def new_inference_session(force_cpu: bool) -> onnxruntime.InferenceSession:
 
     if force_cpu and "CPUExecutionProvider" in onnxruntime.get_available_providers():
         session = onnxruntime.InferenceSession(
-            path, providers=["CPUExecutionProvider"], sess_options=opts
+            model, providers=["CPUExecutionProvider"], sess_options=opts
         )
     else:
-        session = onnxruntime.InferenceSession(path, sess_options=opts)
+        session = onnxruntime.InferenceSession(model, sess_options=opts)
 
     return session
 
@@ -79,6 +88,33 @@ class OnnxModel:
             "state": self._rnn_state,
             "sr": self._sample_rate_nd,
         }
-        out, self._state = self._sess.run(None, ort_inputs)
+        out, self._rnn_state = self._sess.run(None, ort_inputs)
         self._context = self._input_buffer[:, -self._context_size :]  # type: ignore
         return out.item()  # type: ignore
+
+    @staticmethod
+    def run_batch(models: Sequence[OnnxModel], windows: Sequence[np.ndarray]) -> list[float]:
+        """Run one inference window for each model using a single session call.
+
+        All models must share the same session and sample rate. Each model keeps its own
+        context and RNN state, the result is the same as calling each model individually.
+        """
+        if len(models) == 1:
+            return [models[0](windows[0])]
+
+        first = models[0]
+        for model, x in zip(models, windows):
+            model._input_buffer[:, : model._context_size] = model._context
+            model._input_buffer[:, model._context_size :] = x
+
+        ort_inputs = {
+            "input": np.concatenate([m._input_buffer for m in models], axis=0),
+            "state": np.concatenate([m._rnn_state for m in models], axis=1),
+            "sr": first._sample_rate_nd,
+        }
+        out, state = first._sess.run(None, ort_inputs)
+        for i, model in enumerate(models):
+            model._rnn_state = state[:, i : i + 1]
+            model._context = model._input_buffer[:, -model._context_size :]
+
+        return out[:, 0].tolist()  # type: ignore
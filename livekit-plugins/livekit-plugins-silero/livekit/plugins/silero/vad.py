@@ -48,6 +48,114 @@ class _VADOptions:
     sample_rate: int
 
 
+class _SampleBuffer:
+    """Preallocated int16 sample buffer with read/write cursors.
+
+    Reads are views over the underlying array. The unread samples are moved back to the
+    start of the array only when a write doesn't fit, and the array is only reallocated
+    when a single write is larger than the free capacity.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._buf = np.empty(capacity, dtype=np.int16)
+        self._read = 0
+        self._write = 0
+
+    def __len__(self) -> int:
+        return self._write - self._read
+
+    def write(self, data: np.ndarray) -> None:
+        n = len(data)
+        if self._write + n > len(self._buf):
+            unread = self._write - self._read
+            buf = self._buf
+            if unread + n > len(buf):
+                buf = np.empty(max(len(buf) * 2, unread + n), dtype=np.int16)
+
+            buf[:unread] = self._buf[self._read : self._write]
+            self._buf, self._read, self._write = buf, 0, unread
+
+        self._buf[self._write : self._write + n] = data
+        self._write += n
+
+    def peek(self, n: int) -> np.ndarray:
+        return self._buf[self._read : min(self._read + n, self._write)]
+
+    def consume(self, n: int) -> None:
+        self._read = min(self._read + n, self._write)
+        if self._read == self._write:
+            self._read = self._write = 0
+
+
+class _InferenceEngine:
+    """Batches the inference windows of every VADStream sharing the same ONNX session.
+
+    Windows submitted while a batch is running are queued and stacked into the next
+    batch, so a process hosting many streams does a single session call per tick instead
+    of one call (and one thread) per stream.
+    """
+
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: list[tuple[onnx_model.OnnxModel, np.ndarray, asyncio.Future[float]]] = []
+        self._run_atask: asyncio.Task[None] | None = None
+        self._refs = 0
+
+    def acquire(self) -> None:
+        self._refs += 1
+
+    def release(self) -> bool:
+        """Release a reference, returns True when the engine is no longer used."""
+        self._refs -= 1
+        if self._refs > 0:
+            return False
+
+        if self._run_atask is not None:
+            self._run_atask.cancel()
+
+        self._executor.shutdown(wait=False)
+        return True
+
+    async def infer(self, model: onnx_model.OnnxModel, x: np.ndarray) -> float:
+        fut: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+        self._pending.append((model, x, fut))
+        if self._run_atask is None or self._run_atask.done():
+            self._run_atask = asyncio.create_task(self._run_task())
+
+        return await fut
+
+    @agents.utils.log_exceptions(logger=logger)
+    async def _run_task(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        batch: list[tuple[onnx_model.OnnxModel, np.ndarray, asyncio.Future[float]]] = []
+        try:
+            # let the other streams woken up by the same audio tick submit their window
+            await asyncio.sleep(0)
+
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    probs = await loop.run_in_executor(
+                        self._executor,
+                        onnx_model.OnnxModel.run_batch,
+                        [model for model, _, _ in batch],
+                        [x for _, x, _ in batch],
+                    )
+                except Exception as e:
+                    for _, _, fut in batch:
+                        if not fut.done():
+                            fut.set_exception(e)
+                    continue
+
+                for (_, _, fut), p in zip(batch, probs):
+                    if not fut.done():
+                        fut.set_result(p)
+        finally:
+            for _, _, fut in batch + self._pending:
+                fut.cancel()
+
+
 class VAD(agents.vad.VAD):
     """
     Silero Voice Activity Detection (VAD) class.
@@ -141,6 +249,7 @@ class VAD(agents.vad.VAD):
         self._onnx_session = session
         self._opts = opts
         self._streams = weakref.WeakSet[VADStream]()
+        self._engines: dict[asyncio.AbstractEventLoop, _InferenceEngine] = {}
 
     @property
     def model(self) -> str:
@@ -167,6 +276,20 @@ class VAD(agents.vad.VAD):
         self._streams.add(stream)
         return stream
 
+    def _acquire_engine(self, loop: asyncio.AbstractEventLoop) -> _InferenceEngine:
+        # streams running on the same event loop share one engine so their windows get batched
+        engine = self._engines.get(loop)
+        if engine is None:
+            engine = self._engines[loop] = _InferenceEngine()
+
+        engine.acquire()
+        return engine
+
+    def _release_engine(self, loop: asyncio.AbstractEventLoop) -> None:
+        engine = self._engines.get(loop)
+        if engine is not None and engine.release():
+            del self._engines[loop]
+
     def update_options(
         self,
         *,
@@ -215,8 +338,8 @@ class VADStream(agents.vad.VADStream):
         self._opts, self._model = opts, model
         self._loop = asyncio.get_event_loop()
 
-        self._executor = ThreadPoolExecutor(max_workers=1)
-        self._task.add_done_callback(lambda _: self._executor.shutdown(wait=False))
+        self._engine = vad._acquire_engine(self._loop)
+        self._task.add_done_callback(lambda _: vad._release_engine(self._loop))
         self._exp_filter = utils.ExpFilter(alpha=0.35)
 
         self._input_sample_rate = 0
@@ -288,8 +411,8 @@ class VADStream(agents.vad.VADStream):
         speech_threshold_duration = 0.0
         silence_threshold_duration = 0.0
 
-        input_frames: list[rtc.AudioFrame] = []
-        inference_frames: list[rtc.AudioFrame] = []
+        input_buffer: _SampleBuffer | None = None
+        inference_buffer: _SampleBuffer | None = None
         resampler: rtc.AudioResampler | None = None
 
         # used to avoid drift when the sample_rate ratio is not an integer
@@ -315,6 +438,10 @@ class VADStream(agents.vad.VADStream):
                     dtype=np.int16,
                 )
 
+                # a second of audio, the buffers only grow if a single frame is bigger
+                input_buffer = _SampleBuffer(self._input_sample_rate)
+                inference_buffer = input_buffer
+
                 if self._input_sample_rate != self._opts.sample_rate:
                     # resampling needed: the input sample rate isn't the same as the model's
                     # sample rate used for inference
@@ -323,45 +450,38 @@ class VADStream(agents.vad.VADStream):
                         output_rate=self._opts.sample_rate,
                         quality=rtc.AudioResamplerQuality.QUICK,  # VAD doesn't need high quality
                     )
+                    inference_buffer = _SampleBuffer(self._opts.sample_rate)
 
             elif self._input_sample_rate != input_frame.sample_rate:
                 logger.error("a frame with another sample rate was already pushed")
                 continue
 
             assert self._speech_buffer is not None
+            assert input_buffer is not None and inference_buffer is not None
 
-            input_frames.append(input_frame)
+            input_buffer.write(np.frombuffer(input_frame.data, dtype=np.int16))
             if resampler is not None:
                 # the resampler may have a bit of latency, but it is OK to ignore since it should be
                 # negligible
-                inference_frames.extend(resampler.push(input_frame))
-            else:
-                inference_frames.append(input_frame)
+                for frame in resampler.push(input_frame):
+                    inference_buffer.write(np.frombuffer(frame.data, dtype=np.int16))
 
             while True:
                 start_time = time.perf_counter()
 
-                available_inference_samples = sum(
-                    [frame.samples_per_channel for frame in inference_frames]
-                )
-                if available_inference_samples < self._model.window_size_samples:
+                if len(inference_buffer) < self._model.window_size_samples:
                     break  # not enough samples to run inference
 
-                input_frame = utils.combine_frames(input_frames)
-                inference_frame = utils.combine_frames(inference_frames)
-
                 # convert data to f32
                 np.divide(
-                    inference_frame.data[: self._model.window_size_samples],
+                    inference_buffer.peek(self._model.window_size_samples),
                     np.iinfo(np.int16).max,
                     out=inference_f32_data,
                     dtype=np.float32,
                 )
 
                 # run the inference
-                p = await self._loop.run_in_executor(
-                    self._executor, self._model, inference_f32_data
-                )
+                p = await self._engine.infer(self._model, inference_f32_data)
                 p = self._exp_filter.apply(exp=1.0, sample=p)
 
                 window_duration = self._model.window_size_samples / self._opts.sample_rate
@@ -375,14 +495,15 @@ class VADStream(agents.vad.VADStream):
                 )
                 to_copy_int = int(to_copy)
                 input_copy_remaining_fract = to_copy - to_copy_int
+                input_data = input_buffer.peek(to_copy_int)
 
                 # copy the inference window to the speech buffer
                 available_space = len(self._speech_buffer) - speech_buffer_index
-                to_copy_buffer = min(to_copy_int, available_space)
+                to_copy_buffer = min(len(input_data), available_space)
                 if to_copy_buffer > 0:
                     self._speech_buffer[
                         speech_buffer_index : speech_buffer_index + to_copy_buffer
-                    ] = input_frame.data[:to_copy_buffer]
+                    ] = input_data[:to_copy_buffer]
                     speech_buffer_index += to_copy_buffer
                 elif not self._speech_buffer_max_reached:
                     # reached self._opts.max_buffered_speech (padding is included)
@@ -445,10 +566,10 @@ class VADStream(agents.vad.VADStream):
                         inference_duration=inference_duration,
                         frames=[
                             rtc.AudioFrame(
-                                data=input_frame.data[:to_copy_int].tobytes(),
+                                data=input_data.tobytes(),
                                 sample_rate=self._input_sample_rate,
                                 num_channels=1,
-                                samples_per_channel=to_copy_int,
+                                samples_per_channel=len(input_data),
                             )
                         ],
                         speaking=pub_speaking,
@@ -508,29 +629,7 @@ class VADStream(agents.vad.VADStream):
 
                         _reset_write_cursor()
 
-                # remove the frames that were used for inference from the input and inference frames
-                input_frames = []
-                inference_frames = []
-
-                # add the remaining data
-                if len(input_frame.data) - to_copy_int > 0:
-                    data = input_frame.data[to_copy_int:].tobytes()
-                    input_frames.append(
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._input_sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    )
-
-                if len(inference_frame.data) - self._model.window_size_samples > 0:
-                    data = inference_frame.data[self._model.window_size_samples :].tobytes()
-                    inference_frames.append(
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._opts.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    )
+                # remove the samples that were used for inference from the buffers
+                input_buffer.consume(to_copy_int)
+                if inference_buffer is not input_buffer:
+                    inference_buffer.consume(self._model.window_size_samples)
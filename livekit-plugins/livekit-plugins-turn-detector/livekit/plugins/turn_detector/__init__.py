@@ -40,6 +40,18 @@ class EOUPlugin(Plugin):
             _download_from_hf_hub(HG_MODEL, ONNX_FILENAME, subfolder="onnx", revision=revision)
             _download_from_hf_hub(HG_MODEL, "languages.json", revision=revision)
 
+    def preload_resources(self) -> None:
+        from .base import _load_languages
+        from .models import MODEL_REVISIONS
+
+        # the tokenizer and the ONNX model are only used by the inference process
+        for revision in MODEL_REVISIONS.values():
+            try:
+                _load_languages(revision)
+            except Exception:
+                # not downloaded yet, the sessions report the error when loading it
+                logger.debug("languages.json not preloaded", extra={"revision": revision})
+
 
 Plugin.register_plugin(EOUPlugin())
 
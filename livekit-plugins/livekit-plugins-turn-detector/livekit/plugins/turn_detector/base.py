@@ -4,16 +4,21 @@ import asyncio
 import json
 import math
 import re
+import threading
 import time
 import unicodedata
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any
 
-from livekit.agents import llm
+import numpy as np
+
+from livekit.agents import llm, utils
 from livekit.agents.inference_runner import _InferenceRunner
 from livekit.agents.ipc.inference_executor import InferenceExecutor
 from livekit.agents.job import get_job_context
-from livekit.agents.utils import hw
+from livekit.agents.utils import BoundedDict, hw
 
 from .log import logger
 from .models import HG_MODEL, MODEL_REVISIONS, ONNX_FILENAME, EOUModelType
@@ -21,6 +26,10 @@ from .models import HG_MODEL, MODEL_REVISIONS, ONNX_FILENAME, EOUModelType
 MAX_HISTORY_TOKENS = 128
 MAX_HISTORY_TURNS = 6
 
+_NORMALIZE_CACHE_SIZE = 1024
+_TOKENIZE_CACHE_SIZE = 1024
+_SEGMENT_RE = re.compile(r"(?=<\|im_start\|>)")
+
 
 def _download_from_hf_hub(repo_id: str, filename: str, **kwargs: Any) -> str:
     from huggingface_hub import hf_hub_download
@@ -29,11 +38,35 @@ def _download_from_hf_hub(repo_id: str, filename: str, **kwargs: Any) -> str:
     return local_path
 
 
+def _load_languages(revision: str) -> Mapping[str, Any]:
+    def _load() -> Mapping[str, Any]:
+        config_fname = _download_from_hf_hub(
+            HG_MODEL, "languages.json", revision=revision, local_files_only=True
+        )
+        with open(config_fname) as f:
+            return MappingProxyType(json.load(f))
+
+    # parsed once per process instead of once per session, and inherited from the forkserver
+    # when preloaded. read-only, the models copy it before adding their own languages
+    return utils.shared_resource(f"turn_detector.languages.{revision}", _load)
+
+
 class _EUORunnerBase(_InferenceRunner):
+    # coalesce the predictions of concurrent sessions into one padded batch
+    BATCH_WINDOW = 0.005
+
     def __init__(self, model_type: EOUModelType):
         super().__init__()
         self._model_revision = MODEL_REVISIONS[model_type]
 
+        # the history is the same between predictions of a session, only the last user
+        # utterance changes. cache the normalized messages and the token ids of each turn
+        # (keyed by their content) so it's the only part normalized and tokenized again
+        self._normalize_cache = BoundedDict[str, str](maxsize=_NORMALIZE_CACHE_SIZE)
+        self._tokenize_cache = BoundedDict[str, list[int]](maxsize=_TOKENIZE_CACHE_SIZE)
+        # the requests run in the threads of the inference process
+        self._cache_lock = threading.Lock()
+
     def _normalize_text(self, text: str) -> str:
         if not text:
             return ""
@@ -54,7 +87,7 @@ class _EUORunnerBase(_InferenceRunner):
             if not msg["content"]:
                 continue
 
-            content = self._normalize_text(msg["content"])
+            content = self._cached_normalize_text(msg["content"])
 
             # need to combine adjacent turns together to match training data
             if last_msg and last_msg["role"] == msg["role"]:
@@ -76,6 +109,53 @@ class _EUORunnerBase(_InferenceRunner):
         text = convo_text[:ix]
         return text  # type: ignore
 
+    def _cached_normalize_text(self, text: str) -> str:
+        with self._cache_lock:
+            normalized = self._normalize_cache.get(text)
+            if normalized is not None:
+                self._normalize_cache.move_to_end(text)
+                return normalized
+
+        normalized = self._normalize_text(text)
+        with self._cache_lock:
+            self._normalize_cache[text] = normalized
+
+        return normalized
+
+    def _tokenize(self, text: str) -> list[int]:
+        # the special tokens are never merged with the surrounding text, so each turn
+        # (starting with <|im_start|>) can be tokenized on its own
+        input_ids: list[int] = []
+        for segment in _SEGMENT_RE.split(text):
+            if not segment:
+                continue
+
+            with self._cache_lock:
+                ids = self._tokenize_cache.get(segment)
+                if ids is not None:
+                    self._tokenize_cache.move_to_end(segment)
+
+            if ids is None:
+                ids = self._tokenizer(segment, add_special_tokens=False)["input_ids"]
+                with self._cache_lock:
+                    self._tokenize_cache[segment] = ids
+
+            input_ids.extend(ids)
+
+        # same as truncating on the left side
+        return input_ids[-MAX_HISTORY_TOKENS:]
+
+    def _prepare_inputs(self, data: bytes) -> tuple[list[int], str]:
+        """Returns the input_ids of a request and the text they were tokenized from"""
+        data_json = json.loads(data)
+        chat_ctx = data_json.get("chat_ctx", None)
+
+        if not chat_ctx:
+            raise ValueError("chat_ctx is required on the inference input data")
+
+        text = self._format_chat_ctx(chat_ctx)
+        return self._tokenize(text), text
+
     def initialize(self) -> None:
         import onnxruntime as ort  # type: ignore
         from huggingface_hub import errors
@@ -118,31 +198,48 @@ class _EUORunnerBase(_InferenceRunner):
             ) from None
 
     def run(self, data: bytes) -> bytes | None:
-        data_json = json.loads(data)
-        chat_ctx = data_json.get("chat_ctx", None)
-
-        if not chat_ctx:
-            raise ValueError("chat_ctx is required on the inference input data")
-
         start_time = time.perf_counter()
 
-        text = self._format_chat_ctx(chat_ctx)
-        inputs = self._tokenizer(
-            text,
-            add_special_tokens=False,
-            return_tensors="np",
-            max_length=MAX_HISTORY_TOKENS,
-            truncation=True,
-        )
+        input_ids, text = self._prepare_inputs(data)
         # Run inference
-        outputs = self._session.run(None, {"input_ids": inputs["input_ids"].astype("int64")})
+        outputs = self._session.run(None, {"input_ids": np.array([input_ids], dtype=np.int64)})
         eou_probability = outputs[0].flatten()[-1]
         end_time = time.perf_counter()
 
+        return self._encode_result(eou_probability, text, end_time - start_time)
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        if len(data) == 1:
+            return [self.run(data[0])]
+
+        start_time = time.perf_counter()
+
+        inputs = [self._prepare_inputs(d) for d in data]
+
+        # pad on the right, the model is causal so the padding never changes the
+        # probabilities of the real tokens
+        seq_len = max(len(ids) for ids, _ in inputs)
+        input_ids = np.full((len(inputs), seq_len), self._tokenizer.pad_token_id or 0, np.int64)
+        for i, (ids, _) in enumerate(inputs):
+            input_ids[i, : len(ids)] = ids
+
+        outputs = self._session.run(None, {"input_ids": input_ids})
+        probs = outputs[0].reshape(len(inputs), -1)
+        if probs.shape[1] != seq_len:
+            # the model doesn't output a probability per position, padded rows can't be used
+            return [self.run(d) for d in data]
+
+        duration = time.perf_counter() - start_time
+        return [
+            self._encode_result(probs[i, len(ids) - 1], text, duration)
+            for i, (ids, text) in enumerate(inputs)
+        ]
+
+    def _encode_result(self, eou_probability: Any, text: str, duration: float) -> bytes:
         result: dict[str, Any] = {
             "eou_probability": float(eou_probability),
             "input": text,
-            "duration": round(end_time - start_time, 3),
+            "duration": round(duration, 3),
         }
         return json.dumps(result).encode()
 
@@ -163,14 +260,7 @@ class EOUModelBase(ABC):
         self._languages: dict[str, Any] = {}
 
         if load_languages:
-            config_fname = _download_from_hf_hub(
-                HG_MODEL,
-                "languages.json",
-                revision=MODEL_REVISIONS[self._model_type],
-                local_files_only=True,
-            )
-            with open(config_fname) as f:
-                self._languages = json.load(f)
+            self._languages = dict(_load_languages(MODEL_REVISIONS[self._model_type]))
 
     @property
     def model(self) -> str:
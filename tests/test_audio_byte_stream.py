@@ -0,0 +1,40 @@
+import random
+
+from livekit.agents.utils.audio import AudioByteStream
+
+
+def test_audio_byte_stream_chunks():
+    rng = random.Random(0)
+    data = rng.randbytes(2 * 2 * 24000 * 3)  # 3s of stereo audio
+    stream = AudioByteStream(sample_rate=24000, num_channels=2, samples_per_channel=480)
+
+    frames = []
+    offset = 0
+    while offset < len(data):
+        # chunks from a few bytes to a few seconds, not aligned on the frames
+        size = rng.choice([1, 3, 500, 1920, 10_000, 200_000])
+        frames.extend(stream.push(data[offset : offset + size]))
+        offset += size
+
+    frames.extend(stream.flush())
+
+    assert all(frame.samples_per_channel == 480 for frame in frames)
+    assert b"".join(bytes(frame.data) for frame in frames) == data
+    assert stream.flush() == []
+
+
+def test_audio_byte_stream_flush():
+    stream = AudioByteStream(sample_rate=16000, num_channels=2, samples_per_channel=160)
+
+    frames = stream.push(b"\x01" * 1000)
+    assert len(frames) == 1
+    assert bytes(frames[0].data) == b"\x01" * 640
+
+    assert stream.push(memoryview(b"\x02" * 200)) == []
+
+    # the remaining 140 stereo samples
+    frames = stream.flush()
+    assert len(frames) == 1
+    assert frames[0].num_channels == 2
+    assert frames[0].samples_per_channel == 140
+    assert bytes(frames[0].data) == b"\x01" * 360 + b"\x02" * 200
@@ -1,3 +1,5 @@
+import asyncio
+import io
 import os
 import threading
 import time
@@ -150,3 +152,162 @@ def test_stream_buffer_early_close():
 
     # Reading from closed buffer should return empty bytes
     assert buffer.read() == b""
+
+
+def test_stream_buffer_linear_time():
+    def read_all(size: int) -> float:
+        buffer = StreamBuffer()
+        data = os.urandom(4096)
+        for _ in range(size // len(data)):
+            buffer.write(data)
+        buffer.end_input()
+
+        start = time.perf_counter()
+        received = 0
+        out = bytearray(256)
+        # the reads of PyAV (buffer_size=256), alternating read and readinto
+        while chunk := buffer.read(256):
+            received += len(chunk)
+            received += buffer.readinto(out)
+
+        assert received == size
+        return time.perf_counter() - start
+
+    small = min(read_all(1024 * 1024) for _ in range(3))
+    large = read_all(10 * 1024 * 1024)
+    # ~10x for 10x the data, the remaining data used to be copied on each read
+    assert large < small * 25
+
+
+def test_stream_buffer_readinto():
+    buffer = StreamBuffer()
+    buffer.write(b"hello ")
+    buffer.write(b"world")
+    buffer.end_input()
+
+    out = bytearray(8)
+    assert buffer.readinto(out) == 8
+    assert out == b"hello wo"
+    assert buffer.read(1) == b"r"
+    assert buffer.readinto(out) == 2
+    assert out[:2] == b"ld"
+    assert buffer.readinto(out) == 0
+    assert buffer.read() == b""
+
+
+def _encode_sine(container_format: str, codec: str, *, sample_rate: int = 24000) -> bytes:
+    import av
+    import numpy as np
+
+    t = np.arange(sample_rate * 2) / sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).reshape(1, -1)
+
+    buf = io.BytesIO()
+    with av.open(buf, "w", format=container_format) as container:
+        stream = container.add_stream(codec, rate=48000 if codec == "libopus" else sample_rate)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(pcm, format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+        resampler = av.AudioResampler(format=stream.format.name, layout="mono", rate=stream.rate)
+        for f in [*resampler.resample(frame), *resampler.resample(None), None]:
+            for packet in stream.encode(f):
+                container.mux(packet)
+
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize(
+    "mime_type, container_format, codec",
+    [
+        ("audio/mpeg", "mp3", "libmp3lame"),
+        ("audio/aac", "adts", "aac"),
+        ("audio/ogg", "ogg", "libopus"),
+        ("audio/flac", "flac", "flac"),
+    ],
+)
+async def test_decode_formats(mime_type: str, container_format: str, codec: str):
+    data = _encode_sine(container_format, codec)
+    decoder = AudioStreamDecoder(sample_rate=24000, num_channels=1, format=mime_type)
+    for i in range(0, len(data), 333):
+        decoder.push(data[i : i + 333])
+    decoder.end_input()
+
+    samples = 0
+    async for frame in decoder:
+        assert frame.sample_rate == 24000 and frame.num_channels == 1
+        samples += frame.samples_per_channel
+    await decoder.aclose()
+
+    # 2s of audio, the packet decoders don't trim the encoder padding at the end
+    assert 24000 * 1.9 < samples < 24000 * 2.05
+
+
+async def test_decoder_many_streams():
+    # more concurrent streams than decoding workers, each must make progress while the
+    # others are still waiting for data
+    data = _encode_sine("mp3", "libmp3lame")
+    decoders = [
+        AudioStreamDecoder(sample_rate=24000, num_channels=1, format="audio/mpeg")
+        for _ in range(AudioStreamDecoder._max_workers * 3)
+    ]
+    for decoder in decoders:
+        decoder.push(data[: len(data) // 2])
+
+    first_frames = await asyncio.wait_for(
+        asyncio.gather(*[decoder.__anext__() for decoder in decoders]), timeout=5
+    )
+    assert len(first_frames) == len(decoders)
+
+    for decoder in decoders:
+        decoder.push(data[len(data) // 2 :])
+        decoder.end_input()
+        async for _ in decoder:
+            pass
+        await decoder.aclose()
+
+
+def _wav_data(sample_rate: int, duration: float) -> bytes:
+    import struct
+
+    import numpy as np
+
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    # an odd sized chunk before the data, padded to an even size
+    info = b"LIST" + struct.pack("<I", 5) + b"INFO\x00\x00"
+    # streamed WAVs don't know the size of the data chunk
+    data = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + info
+    data += b"data" + struct.pack("<I", 0xFFFFFFFF) + pcm
+    return b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + data
+
+
+async def test_decode_wav_inline():
+    data = _wav_data(16000, 2.0)
+
+    threads = threading.active_count()
+    decoder = AudioStreamDecoder(sample_rate=24000, num_channels=1, format="audio/wav")
+    for i in range(0, len(data), 333):
+        decoder.push(data[i : i + 333])
+    decoder.end_input()
+    assert threading.active_count() == threads
+
+    samples = 0
+    async for frame in decoder:
+        assert frame.sample_rate == 24000 and frame.num_channels == 1
+        samples += frame.samples_per_channel
+    await decoder.aclose()
+
+    assert 24000 * 1.98 < samples <= 24000 * 2.01
+
+
+async def test_decode_wav_frame_size():
+    # the whole file pushed at once is still decoded in 100ms frames
+    decoder = AudioStreamDecoder(sample_rate=None, format="audio/wav")
+    decoder.push(_wav_data(16000, 2.05))
+    decoder.end_input()
+
+    sizes = [frame.samples_per_channel async for frame in decoder]
+    await decoder.aclose()
+
+    assert sizes == [1600] * 20 + [800]
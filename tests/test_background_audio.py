@@ -0,0 +1,201 @@
+import asyncio
+import wave
+
+import numpy as np
+import pytest
+
+from livekit.agents.utils.aio import cancel_and_wait
+from livekit.agents.voice import background_audio
+from livekit.agents.voice.background_audio import (
+    BackgroundAudioPlayer,
+    PlayHandle,
+    _AmbientBus,
+    _clip_frames,
+    _ClipCache,
+)
+
+
+def _write_wav(path: str, seconds: float, amplitude: int = 1000) -> None:
+    samples = np.full(int(48000 * seconds), amplitude, dtype=np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(48000)
+        f.writeframes(samples.tobytes())
+
+
+async def _collect(gen, samples: int = 0) -> list:
+    frames = []
+    async for frame in gen:
+        frames.append(frame)
+        if samples and sum(f.samples_per_channel for f in frames) >= samples:
+            break
+    await gen.aclose()
+    return frames
+
+
+def _samples(frames: list) -> int:
+    return sum(f.samples_per_channel for f in frames)
+
+
+@pytest.fixture
+def clip_cache(monkeypatch: pytest.MonkeyPatch) -> _ClipCache:
+    cache = _ClipCache(max_bytes=48000 * 2)
+    monkeypatch.setattr(background_audio, "_clip_cache", cache)
+    return cache
+
+
+async def test_clip_cache_loop(tmp_path, clip_cache: _ClipCache, monkeypatch: pytest.MonkeyPatch):
+    path = str(tmp_path / "clip.wav")
+    _write_wav(path, 0.5)
+
+    decoded = 0
+    audio_frames_from_file = background_audio.audio_frames_from_file
+
+    def _counting_audio_frames_from_file(*args, **kwargs):
+        nonlocal decoded
+        decoded += 1
+        return audio_frames_from_file(*args, **kwargs)
+
+    monkeypatch.setattr(
+        background_audio, "audio_frames_from_file", _counting_audio_frames_from_file
+    )
+
+    frames = await _collect(_clip_frames(path, 0.5, loop=False))
+    assert decoded == 1
+    clip_samples = _samples(frames)
+    assert clip_samples > 0
+    assert all((np.frombuffer(f.data, dtype=np.int16) == 500).all() for f in frames)
+
+    # the next plays and the iterations of a loop are served from the cache
+    frames = await _collect(_clip_frames(path, 0.5, loop=True), clip_samples * 3)
+    assert decoded == 1
+    assert _samples(frames) == clip_samples * 3
+    assert all((np.frombuffer(f.data, dtype=np.int16) == 500).all() for f in frames)
+
+    # another volume is scaled from the cached clip
+    frames = await _collect(_clip_frames(path, 0.1, loop=False))
+    assert decoded == 1
+    assert _samples(frames) == clip_samples
+    assert all((np.frombuffer(f.data, dtype=np.int16) == 100).all() for f in frames)
+
+    # a modified file is decoded again
+    _write_wav(path, 0.2)
+    await _collect(_clip_frames(path, 0.5, loop=False))
+    assert decoded == 2
+
+
+async def test_clip_cache_eviction(tmp_path, clip_cache: _ClipCache):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f"clip{i}.wav"))
+        _write_wav(paths[-1], 0.5)
+        await _collect(_clip_frames(paths[-1], 1.0, loop=False))
+
+    # 2 clips of 0.5s fit in the cache, the least recently used one was evicted
+    assert clip_cache.get(clip_cache.file_key(paths[0]), 1.0) is None
+    assert clip_cache.get(clip_cache.file_key(paths[1]), 1.0) is not None
+    assert clip_cache.get(clip_cache.file_key(paths[2]), 1.0) is not None
+
+    # too large to be cached, still played
+    large = str(tmp_path / "large.wav")
+    _write_wav(large, 3)
+    frames = await _collect(_clip_frames(large, 1.0, loop=False))
+    assert _samples(frames) > 48000 * 2
+    assert clip_cache.get(clip_cache.file_key(large), 1.0) is None
+
+
+async def test_ambient_bus(tmp_path, clip_cache: _ClipCache):
+    path = str(tmp_path / "ambient.wav")
+    _write_wav(path, 0.5)
+
+    bus = await _AmbientBus.acquire(path, 0.5)
+    assert await _AmbientBus.acquire(path, 0.5) is bus
+    other = await _AmbientBus.acquire(path, 1.0)
+    assert other is not bus
+
+    # fixed size frames, read across the end of the loop
+    frames = bus.frames()
+    for _ in range(bus._length * 3 // bus._frame_size):
+        frame = next(frames)
+        assert frame.samples_per_channel == 4800
+        assert (np.frombuffer(frame.data, dtype=np.int16) == 500).all()
+
+    bus.release()
+    assert await _AmbientBus.acquire(path, 0.5) is bus
+    bus.release()
+    bus.release()
+    other.release()
+    assert not _AmbientBus._buses
+
+
+class _CapturingSource:
+    def __init__(self) -> None:
+        self.frames: list = []
+
+    async def capture_frame(self, frame) -> None:
+        self.frames.append(frame)
+        await asyncio.sleep(0.005)  # paced like the real source
+
+    async def aclose(self) -> None:
+        pass
+
+
+async def test_shared_ambient_mixing(tmp_path, clip_cache: _ClipCache):
+    ambient_path = str(tmp_path / "ambient.wav")
+    thinking_path = str(tmp_path / "thinking.wav")
+    _write_wav(ambient_path, 0.5, amplitude=1000)
+    _write_wav(thinking_path, 0.3, amplitude=300)
+
+    player = BackgroundAudioPlayer(shared_ambient=True)
+    source = _CapturingSource()
+    player._audio_source = source  # type: ignore[assignment]
+    player._ambient_bus = await _AmbientBus.acquire(ambient_path, 0.5)
+    player._ambient_handle = PlayHandle()
+    mixer_atask = player._mixer_atask = asyncio.create_task(player._run_mixer_task())
+    try:
+        # the ambient frames are captured as they are
+        while len(source.frames) < 5:
+            await asyncio.sleep(0.01)
+        assert all((np.frombuffer(f.data, dtype=np.int16) == 500).all() for f in source.frames)
+
+        # a thinking sound is mixed on top of the ambient loop
+        player.play(thinking_path)
+
+        async def _wait_mixed() -> None:
+            while not any(
+                (np.frombuffer(f.data, dtype=np.int16) == 800).all() for f in source.frames
+            ):
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(_wait_mixed(), 5.0)
+    finally:
+        await cancel_and_wait(mixer_atask, *player._play_tasks)
+        await player._audio_mixer.aclose()
+        player._ambient_bus.release()
+
+
+async def test_shared_ambient_fallback(tmp_path, clip_cache: _ClipCache):
+    class _FakeParticipant:
+        async def publish_track(self, track, options):  # type: ignore[no-untyped-def]
+            return object()
+
+        async def unpublish_track(self, sid: str) -> None:
+            pass
+
+    class _FakeRoom:
+        local_participant = _FakeParticipant()
+
+        def on(self, event: str, callback) -> None:  # type: ignore[no-untyped-def]
+            pass
+
+        def off(self, event: str, callback) -> None:  # type: ignore[no-untyped-def]
+            pass
+
+    # the shared ambient can't be prepared, the player starts and plays it on its own
+    player = BackgroundAudioPlayer(ambient_sound=str(tmp_path / "missing.wav"), shared_ambient=True)
+    await player.start(room=_FakeRoom())  # type: ignore[arg-type]
+    assert player._ambient_bus is None
+    assert player._mixer_atask is not None and not player._mixer_atask.done()
+    assert player._ambient_handle is not None and len(player._play_tasks) == 1
+    await player.aclose()
@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import ctypes
 import io
 import multiprocessing as mp
+import random
 import socket
+import sys
 import time
 import uuid
 from dataclasses import dataclass
 from multiprocessing.context import BaseContext
-from typing import ClassVar
+from typing import Any, ClassVar
 
 import psutil
+import pytest
 
 from livekit.agents import JobContext, JobProcess, ipc, job, utils
+from livekit.agents.inference_runner import _InferenceRunner
+from livekit.agents.ipc.inference_proc_lazy_main import _InferenceProc
+from livekit.agents.ipc.shared_memory import SlabAllocator
 from livekit.protocol import agent
 
 
@@ -107,6 +114,58 @@ def test_sync_channel():
     pch.close()
 
 
+def test_message_zero_copy():
+    payload = bytes(range(256)) * 64
+    assert len(payload) >= ipc.channel.ZERO_COPY_THRESHOLD
+
+    msg = SomeDataMessage(string="hello", number=42, double=3.14, data=payload)
+    buffers = ipc.channel._write_message(msg)
+    assert any(memoryview(b).obj is payload for b in buffers), "the payload shouldn't be copied"
+
+    frame = b"".join(buffers)
+    assert ipc.channel._read_message(frame, IPC_MESSAGES) == msg
+
+    reader = ipc.channel.MessageReader(frame)
+    assert ipc.channel.read_int(reader) == SomeDataMessage.MSG_ID
+    assert ipc.channel.read_string(reader) == "hello"
+    assert ipc.channel.read_int(reader) == 42
+    assert ipc.channel.read_double(reader) == 3.14
+    view = ipc.channel.read_bytes_view(reader)
+    assert view.obj is frame, "the payload should be a view of the received data"
+    assert view == payload
+
+    # the inference payloads are relayed as views of the frame read by recv_buffer
+    req = ipc.proto.InferenceRequest(method="test", request_id="req", data=payload)
+    buffer = bytearray(b"".join(ipc.channel._write_message(req)))
+    req_copy = ipc.channel._read_message(buffer, ipc.proto.IPC_MESSAGES)
+    assert isinstance(req_copy, ipc.proto.InferenceRequest)
+    assert isinstance(req_copy.data, memoryview) and req_copy.data.obj is buffer
+    assert req_copy == req
+
+
+def test_message_reader():
+    data = memoryview(b"__first\nsecond\nthird")[2:]
+    reader = ipc.channel.MessageReader(data)
+    assert reader.getvalue() == b"first\nsecond\nthird"
+    assert reader.getbuffer() == data
+
+    # the inherited methods of io.BytesIO read from the view
+    assert reader.readline() == b"first\n"
+    assert reader.readline(3) == b"sec"
+    assert list(reader) == [b"ond\n", b"third"]
+
+    reader.seek(0)
+    out = bytearray(8)
+    assert reader.readinto(out) == 8 and out == b"first\nse"
+    assert reader.read1(4) == b"cond"
+    assert reader.readlines() == [b"\n", b"third"]
+    assert reader.readinto(out) == 0
+
+    assert not reader.writable()
+    with pytest.raises(io.UnsupportedOperation):
+        reader.write(b"data")
+
+
 def _generate_fake_job() -> job.RunningJobInfo:
     return job.RunningJobInfo(
         job=agent.Job(id="fake_job_" + str(uuid.uuid4().hex), type=agent.JobType.JT_ROOM),
@@ -391,3 +450,440 @@ async def test_job_graceful_shutdown():
     assert proc.exitcode == 0, "process should have exited cleanly"
     assert not proc.killed
     assert start_args.shutdown_counter.value == 1
+
+
+def _start_inference_proc(
+    runners: dict[str, type[_InferenceRunner]], **kwargs: Any
+) -> tuple[
+    _InferenceProc,
+    utils.aio.Chan[ipc.channel.Message],
+    list[ipc.channel.Message],
+    asyncio.Task[None],
+]:
+    """run the entrypoint of an inference process, the messages it sends are collected"""
+    inf_proc = _InferenceProc(runners, **kwargs)
+    responses: list[ipc.channel.Message] = []
+
+    class _FakeClient:
+        async def send(self, msg: ipc.channel.Message) -> None:
+            responses.append(msg)
+
+    inf_proc._client = _FakeClient()  # type: ignore[assignment]
+    cch = utils.aio.Chan[ipc.channel.Message]()
+    entrypoint_task = asyncio.create_task(inf_proc.entrypoint(cch))
+    return inf_proc, cch, responses, entrypoint_task
+
+
+class _BatchRunner(_InferenceRunner):
+    INFERENCE_METHOD = "test_batch"
+    BATCH_WINDOW = 0.05
+
+    def __init__(self) -> None:
+        self.batches: list[list[bytes]] = []
+
+    def initialize(self) -> None:
+        pass
+
+    def run(self, data: bytes) -> bytes | None:
+        return data[::-1]
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        self.batches.append(data)
+        return [d[::-1] for d in data]
+
+
+async def test_inference_batching():
+    inf_proc, cch, responses, entrypoint_task = _start_inference_proc(
+        {_BatchRunner.INFERENCE_METHOD: _BatchRunner}
+    )
+    runner = inf_proc._runners[_BatchRunner.INFERENCE_METHOD]
+    assert isinstance(runner, _BatchRunner)
+
+    for i in range(5):
+        cch.send_nowait(
+            ipc.proto.InferenceRequest(
+                method=_BatchRunner.INFERENCE_METHOD, request_id=f"req_{i}", data=f"{i}abc".encode()
+            )
+        )
+
+    while len(responses) < 5:
+        await asyncio.sleep(0.01)
+
+    cch.close()
+    await entrypoint_task
+
+    assert len(runner.batches) == 1, "requests sent within the window should be batched"
+    assert {
+        resp.request_id: resp.data
+        for resp in responses
+        if isinstance(resp, ipc.proto.InferenceResponse)
+    } == {f"req_{i}": f"cba{i}".encode() for i in range(5)}
+
+
+class _ShortBatchRunner(_BatchRunner):
+    INFERENCE_METHOD = "test_short_batch"
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        self.batches.append(data)
+        return [d[::-1] for d in data[1:]]
+
+
+async def test_inference_batching_fallback():
+    _, cch, responses, entrypoint_task = _start_inference_proc(
+        {_ShortBatchRunner.INFERENCE_METHOD: _ShortBatchRunner}
+    )
+
+    for i in range(3):
+        cch.send_nowait(
+            ipc.proto.InferenceRequest(
+                method=_ShortBatchRunner.INFERENCE_METHOD,
+                request_id=f"req_{i}",
+                data=f"{i}abc".encode(),
+            )
+        )
+    # the pending batch is run before exiting
+    cch.send_nowait(ipc.proto.ShutdownRequest())
+    await entrypoint_task
+
+    # the results of the batch don't match the requests, they're run individually
+    assert isinstance(responses[-1], ipc.proto.Exiting)
+    assert {
+        resp.request_id: resp.data
+        for resp in responses[:-1]
+        if isinstance(resp, ipc.proto.InferenceResponse)
+    } == {f"req_{i}": f"cba{i}".encode() for i in range(3)}
+
+
+class _SlowRunner(_InferenceRunner):
+    INFERENCE_METHOD = "test_slow"
+    THREADS = 2
+
+    def initialize(self) -> None:
+        pass
+
+    def run(self, data: bytes) -> bytes | None:
+        time.sleep(0.2)
+        return data
+
+
+class _FastRunner(_SlowRunner):
+    INFERENCE_METHOD = "test_fast"
+    THREADS = 0
+
+    def run(self, data: bytes) -> bytes | None:
+        return data
+
+
+async def test_inference_runner_threads():
+    _, cch, responses, entrypoint_task = _start_inference_proc(
+        {_SlowRunner.INFERENCE_METHOD: _SlowRunner, _FastRunner.INFERENCE_METHOD: _FastRunner}
+    )
+
+    start = time.perf_counter()
+    for i in range(2):
+        cch.send_nowait(
+            ipc.proto.InferenceRequest(
+                method=_SlowRunner.INFERENCE_METHOD, request_id=f"slow_{i}", data=b"slow"
+            )
+        )
+    cch.send_nowait(
+        ipc.proto.InferenceRequest(
+            method=_FastRunner.INFERENCE_METHOD, request_id="fast", data=b"fast"
+        )
+    )
+    cch.send_nowait(ipc.proto.ShutdownRequest())
+    await entrypoint_task
+
+    # the slow requests run concurrently, without holding up the fast one, and are
+    # finished before exiting
+    assert [getattr(msg, "request_id", None) for msg in responses[:1]] == ["fast"]
+    assert {getattr(msg, "request_id", None) for msg in responses[1:3]} == {"slow_0", "slow_1"}
+    assert isinstance(responses[3], ipc.proto.Exiting)
+    assert time.perf_counter() - start < 0.35
+
+
+async def test_inference_shared_memory():
+    shm = SlabAllocator.create(size=4 * 64 * 1024, slot_size=64 * 1024)
+    try:
+        _, cch, responses, entrypoint_task = _start_inference_proc(
+            {_BatchRunner.INFERENCE_METHOD: _BatchRunner}, shm=shm
+        )
+
+        large = bytes(range(256)) * 64
+        offset = shm.alloc()
+        assert offset is not None and shm.should_use(len(large))
+        shm.write(offset, large)
+        cch.send_nowait(
+            ipc.proto.InferenceRequest(
+                method=_BatchRunner.INFERENCE_METHOD,
+                request_id="req_shm",
+                shm_offset=offset,
+                shm_length=len(large),
+            )
+        )
+        cch.send_nowait(
+            ipc.proto.InferenceRequest(
+                method=_BatchRunner.INFERENCE_METHOD, request_id="req_small", data=b"abc"
+            )
+        )
+
+        while len(responses) < 2:
+            await asyncio.sleep(0.01)
+
+        cch.close()
+        await entrypoint_task
+
+        resps = {
+            resp.request_id: resp
+            for resp in responses
+            if isinstance(resp, ipc.proto.InferenceResponse)
+        }
+        assert resps["req_small"].data == b"cba" and resps["req_small"].shm_offset == -1
+
+        # the response is written back to the slot of the request
+        resp = resps["req_shm"]
+        assert resp.data is None and resp.shm_offset == offset
+        assert shm.read(resp.shm_offset, resp.shm_length) == large[::-1]
+
+        # the offsets cross the socket instead of the payload
+        resp_copy = ipc.proto.InferenceResponse()
+        resp_copy.read(io.BytesIO(b"".join(ipc.channel._write_message(resp))[4:]))
+        assert resp_copy == resp
+    finally:
+        shm.close()
+
+
+async def test_inference_shared_memory_send_failure():
+    executor = ipc.inference_proc_executor.InferenceProcExecutor(
+        runners={},
+        initialize_timeout=1.0,
+        close_timeout=1.0,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        ping_interval=1.0,
+        ping_timeout=1.0,
+        high_ping_threshold=1.0,
+        mp_ctx=mp.get_context("spawn"),
+        loop=asyncio.get_running_loop(),
+        http_proxy=None,
+    )
+    a, b = socket.socketpair()
+    b.close()
+    executor._pch = await utils.aio.duplex_unix._AsyncDuplex.open(a)
+    executor._supervise_atask = asyncio.Future()  # started
+    executor._shm = SlabAllocator.create(size=2 * 64 * 1024, slot_size=64 * 1024)
+    try:
+        # the process is gone, the slots of the requests that couldn't be sent are freed
+        for _ in range(3):
+            with pytest.raises(utils.aio.duplex_unix.DuplexClosed):
+                await executor.do_inference("test", bytes(8192))
+
+        assert not executor._shm_requests and not executor._active_requests
+        assert executor._shm.alloc() is not None
+    finally:
+        with contextlib.suppress(utils.aio.duplex_unix.DuplexClosed):
+            await executor._pch.aclose()
+        executor._shm.close()
+
+
+def test_predictive_idle_policy():
+    policy = ipc.proc_pool.PredictiveIdlePolicy(min_idle_processes=1, rate_time_constant=30.0)
+    for _ in range(3):
+        policy.on_process_initialized(2.0)
+
+    assert policy.init_duration == pytest.approx(2.0)
+    assert policy.target_idle_processes(0.0, max_idle_processes=10) == 1
+
+    # simulated Poisson arrivals at 2 jobs/s for 2 minutes
+    rng = random.Random(0)
+    now = 0.0
+    while now < 120.0:
+        now += rng.expovariate(2.0)
+        policy.on_job_launched(now)
+
+    assert 1.6 < policy.arrival_rate(now) < 2.4
+    # ~4 jobs arrive while a process initializes, plus one standard deviation
+    assert 5 <= policy.target_idle_processes(now, max_idle_processes=10) <= 7
+    assert policy.target_idle_processes(now, max_idle_processes=3) == 3
+
+    # slower initializations need more warm processes
+    for _ in range(10):
+        policy.on_process_initialized(4.0)
+    assert policy.target_idle_processes(now, max_idle_processes=20) >= 9
+
+    # back to the minimum once the traffic stops
+    assert policy.target_idle_processes(now + 300.0, max_idle_processes=10) == 1
+
+
+def test_memory_monitor_interval():
+    next_check = ipc.supervised_proc._next_memory_check
+    assert next_check(100, 0.0, [500, 1000]) == ipc.supervised_proc.MEMORY_MAX_INTERVAL
+    assert next_check(100, -10.0, [500]) == ipc.supervised_proc.MEMORY_MAX_INTERVAL
+    # 400MB before the warn threshold at 20MB/s, sampled 4 times on the way
+    assert next_check(100, 20.0, [500, 1000]) == pytest.approx(5.0)
+    assert next_check(100, 40.0, [500, 1000]) == pytest.approx(2.5)
+    # above the warn threshold, the limit is the next one
+    assert next_check(600, 40.0, [500, 1000]) == pytest.approx(2.5)
+    assert next_check(990, 1000.0, [500, 1000]) == ipc.supervised_proc.MEMORY_MIN_INTERVAL
+
+    usage = utils.hw.MemoryUsage(rss=300, pss=200, unique=100, shared=200)
+    assert [usage.get(m) for m in ("rss", "pss", "uss")] == [300, 200, 100]
+    peak = usage.max(utils.hw.MemoryUsage(rss=250, pss=220, unique=150, shared=100))
+    assert peak == utils.hw.MemoryUsage(rss=300, pss=220, unique=150, shared=200)
+
+
+async def test_shared_proc_pool():
+    mp_ctx = mp.get_context("spawn")
+    loop = asyncio.get_running_loop()
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_job_entrypoint,
+        num_idle_processes=2,
+        job_executor_type=job.JobExecutorType.SHARED_PROCESS,
+        max_jobs_per_process=3,
+        initialize_timeout=20.0,
+        close_timeout=20.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=loop,
+    )
+
+    start_args = _new_start_args(mp_ctx)
+    start_args.entrypoint_simulate_work_time = 0.5
+    close_q = asyncio.Queue()
+    statuses = []
+
+    @pool.on("process_created")
+    def _process_created(proc: ipc.job_shared_proc_executor.SharedProcJobExecutor):
+        proc.user_arguments = start_args
+
+    @pool.on("process_closed")
+    def _process_closed(proc: ipc.job_shared_proc_executor.SharedProcJobExecutor):
+        close_q.put_nowait(None)
+        statuses.append(proc.status)
+
+    await pool.start()
+
+    jobs_to_start = 4
+    pids = set()
+    for _ in range(jobs_to_start):
+        await pool.launch_job(_generate_fake_job())
+        # collected while the jobs are running, the processes are closed with their last job
+        pids.update(proc.pid for proc in pool._shared_procs.processes)
+
+    # 3 jobs per process at most
+    assert len(pids) >= 2
+
+    await _wait_for_elements(close_q, jobs_to_start)
+    assert statuses == [ipc.job_executor.JobStatus.SUCCESS] * jobs_to_start
+
+    await pool.aclose()
+
+    assert start_args.entrypoint_counter.value == jobs_to_start
+    assert start_args.shutdown_counter.value == jobs_to_start
+    # the jobs ran inside the processes started for the idle slots (3 jobs per process)
+    assert start_args.initialize_counter.value <= 2
+    for pid in pids:
+        assert not psutil.pid_exists(pid)
+
+
+async def _failing_job_entrypoint(job_ctx: JobContext) -> None:
+    job_ctx.shutdown("failing job")
+    raise RuntimeError("the job failed")
+
+
+async def test_shared_proc_job_failed():
+    mp_ctx = mp.get_context("spawn")
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_failing_job_entrypoint,
+        num_idle_processes=1,
+        job_executor_type=job.JobExecutorType.SHARED_PROCESS,
+        max_jobs_per_process=2,
+        initialize_timeout=20.0,
+        close_timeout=20.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=asyncio.get_running_loop(),
+    )
+
+    start_args = _new_start_args(mp_ctx)
+    close_q = asyncio.Queue()
+    statuses = []
+
+    @pool.on("process_created")
+    def _process_created(proc: ipc.job_shared_proc_executor.SharedProcJobExecutor):
+        proc.user_arguments = start_args
+
+    @pool.on("process_closed")
+    def _process_closed(proc: ipc.job_shared_proc_executor.SharedProcJobExecutor):
+        close_q.put_nowait(None)
+        statuses.append(proc.status)
+
+    await pool.start()
+    await pool.launch_job(_generate_fake_job())
+    await _wait_for_elements(close_q, 1)
+    await pool.aclose()
+
+    # the process outlives the job, the failure is reported by JobEnded
+    assert statuses == [ipc.job_executor.JobStatus.FAILED]
+
+
+def _wait_event(ev: mp.synchronize.Event) -> None:  # type: ignore
+    ev.wait()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="fork and smaps_rollup")
+def test_shared_resource_memory():
+    usage = utils.hw.memory.parse_smaps_rollup(
+        "Rss:  1324 kB\nPss:  349 kB\nShared_Clean:  1180 kB\nShared_Dirty:  0 kB\n"
+        "Private_Clean:  40 kB\nPrivate_Dirty:  104 kB\n"
+    )
+    assert usage == utils.hw.MemoryUsage(
+        rss=1324 * 1024, pss=349 * 1024, unique=144 * 1024, shared=1180 * 1024
+    )
+
+    size = 64 * 1024 * 1024
+    key = f"test_{uuid.uuid4()}"
+    resource = utils.shared_resource(
+        key, lambda: bytes(random.getrandbits(8) for _ in range(16)) * (size // 16)
+    )
+    assert utils.shared_resource(key, lambda: b"") is resource
+
+    # a process forked after the resource was loaded shares its pages
+    ctx = mp.get_context("fork")
+    ev = ctx.Event()
+    proc = ctx.Process(target=_wait_event, args=(ev,))
+    proc.start()
+    try:
+        assert proc.pid
+        child = utils.hw.get_memory_usage(proc.pid)
+        assert child.shared >= size
+        assert child.unique < size
+        assert child.pss < child.rss
+    finally:
+        ev.set()
+        proc.join()
+
+    with pytest.raises(psutil.NoSuchProcess):
+        utils.hw.get_memory_usage(proc.pid)
+
+
+def test_memory_usage_access_denied(monkeypatch: pytest.MonkeyPatch):
+    # e.g. macOS, the USS of a child process isn't readable but its RSS is
+    def _memory_full_info(self: psutil.Process) -> None:
+        raise psutil.AccessDenied(self.pid)
+
+    monkeypatch.setattr(utils.hw.memory.sys, "platform", "darwin")
+    monkeypatch.setattr(psutil.Process, "memory_full_info", _memory_full_info)
+    usage = utils.hw.get_memory_usage()
+    rss = psutil.Process().memory_info().rss
+    assert usage.rss == usage.pss == usage.unique
+    assert abs(usage.rss - rss) < 16 * 1024 * 1024
+    assert usage.shared == 0
@@ -0,0 +1,230 @@
+import asyncio
+
+import numpy as np
+
+from livekit.agents.voice.recorder_io.recorder_io import _RecorderTimeline
+
+SAMPLE_RATE = 1000
+DELAY = 100
+
+
+def _timeline() -> _RecorderTimeline:
+    return _RecorderTimeline(SAMPLE_RATE, delay=DELAY, max_buffered=SAMPLE_RATE * 5)
+
+
+def _run(timeline: _RecorderTimeline, input_samples: int, chunks: list[np.ndarray]) -> None:
+    for _ in range(input_samples // 10):
+        timeline.push_input(np.zeros(10, dtype=np.float32))
+        chunks.append(timeline.pop(20))
+
+
+def test_timeline_playback():
+    timeline = _timeline()
+    chunks: list[np.ndarray] = []
+    _run(timeline, 500, chunks)
+
+    # the output is captured ahead of its playback, which is interrupted after 300 samples
+    timeline.push_output(np.ones(1000, dtype=np.float32))
+    _run(timeline, 300, chunks)
+    timeline.playback_finished(300)
+    _run(timeline, 500, chunks)
+
+    chunks.append(timeline.flush(20))
+    stereo = np.concatenate(chunks, axis=1)
+    assert stereo.shape == (2, 1300)
+    assert all(c.shape[1] % 20 == 0 for c in chunks)
+    assert not stereo[0].any()
+    assert not stereo[1, :500].any()
+    assert (stereo[1, 500:800] == 1).all()
+    assert not stereo[1, 800:].any()
+
+
+def test_timeline_pause():
+    timeline = _timeline()
+    chunks: list[np.ndarray] = []
+    timeline.push_output(np.ones(400, dtype=np.float32))
+    _run(timeline, 100, chunks)
+    timeline.pause()
+    timeline.push_output(np.full(100, 2, dtype=np.float32))
+    _run(timeline, 200, chunks)
+    timeline.resume()
+    _run(timeline, 600, chunks)
+    timeline.playback_finished(500)
+
+    chunks.append(timeline.flush(20))
+    right = np.concatenate(chunks, axis=1)[1]
+    assert (right[:100] == 1).all()
+    assert not right[100:300].any()  # paused
+    assert (right[300:600] == 1).all()
+    assert (right[600:700] == 2).all()
+    assert not right[700:].any()
+
+
+def test_timeline_bounded_memory():
+    timeline = _timeline()
+    chunks: list[np.ndarray] = []
+    for _ in range(100):
+        # long playbacks, only the samples behind the clock are kept
+        timeline.push_output(np.ones(SAMPLE_RATE * 2, dtype=np.float32))
+        _run(timeline, SAMPLE_RATE * 2, chunks)
+        timeline.playback_finished(SAMPLE_RATE * 2)
+        assert len(timeline._right._buf) <= SAMPLE_RATE * 5 + DELAY
+        assert len(timeline._left._buf) <= SAMPLE_RATE * 5 + DELAY
+
+    stereo = np.concatenate(chunks, axis=1)
+    assert stereo.shape[1] == SAMPLE_RATE * 200 - DELAY
+    assert (stereo[1] == 1).all()
+
+
+def _frame(sample_rate: int, amplitude: int):  # type: ignore[no-untyped-def]
+    from livekit import rtc
+
+    # 400Hz, opus removes the DC
+    t = np.arange(sample_rate // 100) / sample_rate
+    data = (np.sin(2 * np.pi * 400 * t) * amplitude).astype(np.int16)
+    return rtc.AudioFrame(data.tobytes(), sample_rate, 1, len(data))
+
+
+def _decode(path: str) -> np.ndarray:
+    import av
+
+    with av.open(path) as container:
+        return np.concatenate([f.to_ndarray() for f in container.decode(audio=0)], axis=1)
+
+
+def test_encoder_int_playback_position(tmp_path):
+    from livekit.agents.voice.recorder_io.recorder_io import _RecordingEncoder
+
+    path = str(tmp_path / "recording.ogg")
+    encoder = _RecordingEncoder(path, 48000)
+    for _ in range(2):
+        # a playback interrupted before any playout ends at the int position 0
+        encoder.push(("output", _frame(24000, 2000)))
+        encoder.push(("playback_finished", 0))
+        for _ in range(50):
+            encoder.push(("input", _frame(48000, 1000)))
+    encoder.close()
+
+    samples = _decode(path)
+    assert abs(samples.shape[1] - 48000) < 960
+    assert np.abs(samples[1]).max() < 0.01  # the playback was interrupted at 0
+
+
+async def test_recorder_encode_thread_error(tmp_path):
+    from livekit.agents.voice.recorder_io.recorder_io import RecorderIO
+
+    recorder = RecorderIO(agent_session=None)  # type: ignore[arg-type]
+    recorder._in_record = recorder._out_record = object()  # type: ignore[assignment]
+    await recorder.start(output_path=str(tmp_path / "recording.ogg"))
+    # the encoding thread fails, the events pushed after that aren't buffered
+    recorder._push_event(("input", None))
+    await asyncio.wait_for(asyncio.shield(recorder._close_fut), 5.0)
+    for _ in range(100):
+        recorder._push_event(("input", _frame(48000, 1000)))
+    assert recorder._events.empty()
+    await recorder.aclose()
+
+
+def test_encoder_process_runner(tmp_path):
+    from livekit.agents.voice.recorder_io.encoder_process import (
+        _encode_request,
+        _RecorderEncoderRunner,
+    )
+
+    path = str(tmp_path / "recording.ogg")
+    runner = _RecorderEncoderRunner()
+    runner.run(_encode_request("open", "rec", output_path=path, sample_rate=48000))
+    for _ in range(10):
+        # 1s of input, half of it with the agent speaking
+        events = [("input", _frame(48000, 1000)) for _ in range(100)]
+        events[:0] = [("output", _frame(24000, 2000)) for _ in range(50)]
+        events.insert(60, ("playback_finished", 0.5))
+        runner.run(_encode_request("write", "rec", events=events))
+    runner.run(_encode_request("close", "rec", events=[]))
+    assert not runner._recordings
+
+    samples = _decode(path)
+    assert samples.shape[0] == 2
+    assert abs(samples.shape[1] - 48000 * 10) < 960
+    left = np.abs(samples[0, 4800:-4800]).mean()
+    right = np.abs(samples[1]).reshape(10, -1).mean(axis=1)
+    assert left > 0.01
+    assert (right > 0.01).all()
+
+
+def test_encoder_process_idle_recording(tmp_path):
+    import time
+
+    import pytest
+
+    from livekit.agents.voice.recorder_io.encoder_process import (
+        ENCODER_IDLE_TIMEOUT,
+        _encode_request,
+        _RecorderEncoderRunner,
+    )
+
+    path = str(tmp_path / "recording.ogg")
+    runner = _RecorderEncoderRunner()
+    runner.run(_encode_request("open", "rec", output_path=path, sample_rate=48000))
+    events = [("input", _frame(48000, 1000)) for _ in range(100)]
+    runner.run(_encode_request("write", "rec", events=events))
+
+    runner._close_idle(time.monotonic())
+    assert runner._recordings
+
+    # the job process is gone, the recording is closed and readable
+    runner._close_idle(time.monotonic() + ENCODER_IDLE_TIMEOUT)
+    assert not runner._recordings
+    assert abs(_decode(path).shape[1] - 48000) < 960
+
+    with pytest.raises(RuntimeError):
+        runner.run(_encode_request("write", "rec", events=events))
+
+
+async def test_remote_encoder_fallback(tmp_path, monkeypatch):
+    import time
+
+    from livekit.agents.voice.recorder_io import encoder_process
+    from livekit.agents.voice.recorder_io.encoder_process import (
+        ENCODER_IDLE_TIMEOUT,
+        _RecorderEncoderRunner,
+        _RemoteEncoder,
+    )
+
+    monkeypatch.setattr(encoder_process, "SEND_INTERVAL", 0.01)
+
+    class _LosingExecutor:
+        # the encoder process closes the recording as idle after the first write
+        def __init__(self) -> None:
+            self.runner = _RecorderEncoderRunner()
+            self.requests = 0
+
+        async def do_inference(self, method: str, data: bytes) -> bytes | None:
+            self.requests += 1
+            if self.requests == 3:
+                self.runner._close_idle(time.monotonic() + ENCODER_IDLE_TIMEOUT)
+            return self.runner.run(data)
+
+    path = str(tmp_path / "recording.ogg")
+    (tmp_path / "recording.1.ogg").write_bytes(b"previous recording")
+    executor = _LosingExecutor()
+    remote = _RemoteEncoder(executor, output_path=path, sample_rate=48000)  # type: ignore[arg-type]
+    await remote._request("open", output_path=path, sample_rate=48000)
+    remote._send_atask = asyncio.create_task(remote._send_task())
+
+    for _ in range(3):
+        for _ in range(100):
+            remote.push(("input", _frame(48000, 1000)))
+        await asyncio.sleep(0.05)
+    await remote.aclose()
+
+    assert remote._local is not None
+    assert not executor.runner._recordings
+    # the audio encoded before the fallback is kept, the rest is in a continuation file
+    # that doesn't overwrite the existing files
+    assert remote._local_path == str(tmp_path / "recording.2.ogg")
+    assert (tmp_path / "recording.1.ogg").read_bytes() == b"previous recording"
+    before = _decode(path).shape[1]
+    after = _decode(remote._local_path).shape[1]
+    assert before > 0 and after > 0
+    assert abs(before + after - 48000 * 3) < 960 * 2
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+from livekit import rtc
+from livekit.agents.voice.io import PlaybackFinishedEvent
+from livekit.agents.voice.room_io._output import _ParticipantAudioOutput
+
+SAMPLE_RATE = 24000
+
+
+def _frame(duration: float) -> rtc.AudioFrame:
+    samples = int(duration * SAMPLE_RATE)
+    return rtc.AudioFrame(
+        data=b"\x01\x00" * samples,
+        sample_rate=SAMPLE_RATE,
+        num_channels=1,
+        samples_per_channel=samples,
+    )
+
+
+async def _start_output() -> tuple[_ParticipantAudioOutput, list[float]]:
+    output = _ParticipantAudioOutput(
+        MagicMock(),
+        sample_rate=SAMPLE_RATE,
+        num_channels=1,
+        track_publish_options=rtc.TrackPublishOptions(),
+        queue_size_ms=200,
+    )
+    output._subscribed_fut.set_result(None)
+    output._forwarding_task = asyncio.create_task(output._forward_audio())
+
+    captures: list[float] = []
+    capture_frame = output._audio_source.capture_frame
+
+    async def _capture_frame(frame: rtc.AudioFrame) -> None:
+        # the source must always have room for the batch
+        assert output._audio_source.queued_duration + frame.duration <= 0.2 + 1e-3
+        captures.append(frame.duration)
+        await capture_frame(frame)
+
+    output._audio_source.capture_frame = _capture_frame  # type: ignore[method-assign]
+    return output, captures
+
+
+async def test_audio_output_batches():
+    output, captures = await _start_output()
+    finished = asyncio.Future[PlaybackFinishedEvent]()
+    output.on("playback_finished", finished.set_result)
+
+    start = time.monotonic()
+    for _ in range(50):
+        await output.capture_frame(_frame(0.02))  # 1s of audio in the TTS chunks
+    output.flush()
+    ev = await asyncio.wait_for(finished, timeout=5)
+
+    assert not ev.interrupted and abs(ev.playback_position - 1.0) < 1e-3
+    assert abs(sum(captures) - 1.0) < 1e-3
+    assert time.monotonic() - start >= 0.95
+    # batches of up to half the queue instead of one capture per 50ms chunk
+    assert len(captures) <= 12
+    await output.aclose()
+
+
+async def test_audio_output_interrupt():
+    output, captures = await _start_output()
+    finished = asyncio.Future[PlaybackFinishedEvent]()
+    output.on("playback_finished", finished.set_result)
+
+    await output.capture_frame(_frame(2.0))
+    output.flush()
+    await asyncio.sleep(0.5)
+    output.clear_buffer()
+    ev = await asyncio.wait_for(finished, timeout=1)
+
+    assert ev.interrupted
+    # at most the queue of the source was played after the interruption was requested
+    assert 0.3 < ev.playback_position < 0.7
+    assert sum(captures) < 0.8
+    assert output._audio_source.queued_duration == 0
+    await output.aclose()
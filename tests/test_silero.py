@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+import pytest
+
+onnx_model = pytest.importorskip("livekit.plugins.silero.onnx_model")
+
+N_MODELS = 4
+N_WINDOWS = 8
+
+
+class _FakeSession:
+    """a deterministic stand-in of the silero session, the output depends on the input window
+    and on the RNN state, and the returned state accumulates the inputs"""
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def run(self, output_names, inputs):  # type: ignore[no-untyped-def]
+        x = inputs["input"]
+        self.batch_sizes.append(x.shape[0])
+        state = inputs["state"]
+        assert state.shape == (2, x.shape[0], 128)
+        mean = x.mean(axis=1)
+        out = 1.0 / (1.0 + np.exp(-(mean + state[0, :, 0])))
+        return out[:, None].astype(np.float32), (state * 0.9 + mean[None, :, None]).astype(
+            np.float32
+        )
+
+
+def _sessions():  # type: ignore[no-untyped-def]
+    yield _FakeSession()
+    try:
+        yield onnx_model.new_inference_session(force_cpu=True)
+    except Exception:
+        pass  # the model file isn't available (e.g. git-lfs not pulled)
+
+
+@pytest.mark.parametrize("sample_rate", onnx_model.SUPPORTED_SAMPLE_RATES)
+def test_run_batch(sample_rate: int) -> None:
+    rng = np.random.default_rng(0)
+    for session in _sessions():
+        single = [
+            onnx_model.OnnxModel(onnx_session=session, sample_rate=sample_rate)
+            for _ in range(N_MODELS)
+        ]
+        batched = [
+            onnx_model.OnnxModel(onnx_session=session, sample_rate=sample_rate)
+            for _ in range(N_MODELS)
+        ]
+        window_size = single[0].window_size_samples
+
+        for _ in range(N_WINDOWS):
+            windows = [
+                rng.uniform(-0.5, 0.5, window_size).astype(np.float32) for _ in range(N_MODELS)
+            ]
+            expected = [model(x) for model, x in zip(single, windows)]
+            probs = onnx_model.OnnxModel.run_batch(batched, windows)
+            np.testing.assert_allclose(probs, expected, rtol=1e-4, atol=1e-5)
+
+            for a, b in zip(single, batched):
+                np.testing.assert_allclose(a._rnn_state, b._rnn_state, rtol=1e-4, atol=1e-5)
+                np.testing.assert_array_equal(a._context, b._context)
+
+        # the RNN state is carried between the windows
+        for model in single + batched:
+            assert np.any(model._rnn_state != 0)
+
+        # with the same context, a model without state gives another probability
+        fresh = onnx_model.OnnxModel(onnx_session=session, sample_rate=sample_rate)
+        fresh._context = single[0]._context.copy()
+        assert fresh(windows[0]) != pytest.approx(single[0](windows[0]), abs=1e-6)
+
+
+async def test_inference_engine_batching():
+    from livekit.plugins.silero.vad import _InferenceEngine
+
+    rng = np.random.default_rng(0)
+    session = _FakeSession()
+    models = [
+        onnx_model.OnnxModel(onnx_session=session, sample_rate=16000) for _ in range(N_MODELS)
+    ]
+    windows = [
+        [rng.uniform(-0.5, 0.5, 512).astype(np.float32) for _ in range(N_WINDOWS)]
+        for _ in range(N_MODELS)
+    ]
+
+    expected = []
+    for stream_windows in windows:
+        model = onnx_model.OnnxModel(onnx_session=_FakeSession(), sample_rate=16000)
+        expected.append([model(x) for x in stream_windows])
+
+    engine = _InferenceEngine()
+    for _ in models:
+        engine.acquire()
+
+    async def _stream(model: onnx_model.OnnxModel, stream_windows: list[np.ndarray]) -> list[float]:
+        return [await engine.infer(model, x) for x in stream_windows]
+
+    try:
+        results = await asyncio.gather(*[_stream(m, w) for m, w in zip(models, windows)])
+    finally:
+        for _ in models:
+            engine.release()
+
+    # the streams of the same loop share a session call per window, with the same results
+    # as running them individually
+    assert session.batch_sizes == [N_MODELS] * N_WINDOWS
+    for probs, expected_probs in zip(results, expected):
+        np.testing.assert_allclose(probs, expected_probs, rtol=1e-4, atol=1e-5)
+
+
+def test_sample_buffer_compaction():
+    from livekit.plugins.silero.vad import _SampleBuffer
+
+    buf = _SampleBuffer(100)
+    array = buf._buf
+    expected = np.arange(10, dtype=np.int16)
+    buf.write(expected)
+    compactions = 0
+    for i in range(50):
+        chunk = np.arange(10 + i * 30, 40 + i * 30, dtype=np.int16)
+        write = buf._write
+        buf.write(chunk)
+        compactions += buf._write < write + len(chunk)
+        expected = np.concatenate([expected, chunk])
+
+        # the buffer is never emptied, the unread samples are moved back to the start
+        n = 25 if i % 2 else 35
+        np.testing.assert_array_equal(buf.peek(n), expected[:n])
+        buf.consume(n)
+        expected = expected[n:]
+        assert len(buf) == len(expected)
+
+    assert compactions > 0
+    assert buf._buf is array, "the buffer is compacted instead of reallocated"
+    np.testing.assert_array_equal(buf.peek(len(buf) + 10), expected)
+
+    buf.consume(len(buf) + 10)
+    assert len(buf) == 0 and buf._read == buf._write == 0
+
+
+def test_sample_buffer_growth():
+    from livekit.plugins.silero.vad import _SampleBuffer
+
+    buf = _SampleBuffer(64)
+    buf.write(np.arange(40, dtype=np.int16))
+    buf.consume(10)
+
+    # a write larger than the free capacity grows the array and keeps the unread samples
+    buf.write(np.arange(40, 140, dtype=np.int16))
+    assert len(buf._buf) >= 130
+    assert len(buf) == 130
+    np.testing.assert_array_equal(buf.peek(200), np.arange(10, 140, dtype=np.int16))
+
+    buf.write(np.arange(140, 1140, dtype=np.int16))
+    np.testing.assert_array_equal(buf.peek(2000), np.arange(10, 1140, dtype=np.int16))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from livekit import rtc
+from livekit.agents.voice.transcription._speaking_rate import (
+    SpeakingRateDetector,
+    _spectral_flux,
+)
+
+
+def _speech_like(sample_rate: int, duration: float) -> np.ndarray:
+    # noise modulated at a syllable rate, with a pause in the middle
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    envelope[(t > 1.2) & (t < 1.8)] = 0
+    return (rng.standard_normal(len(t)) * envelope * 4000).astype(np.int16)
+
+
+@pytest.mark.parametrize("sample_rate", [24000, 44100])
+async def test_speaking_rate_sliding_windows(sample_rate: int):
+    pcm = _speech_like(sample_rate, 3.3)
+    stream = SpeakingRateDetector().stream()
+    chunk = sample_rate // 50
+    for i in range(0, len(pcm), chunk):
+        data = pcm[i : i + chunk].tobytes()
+        stream.push_frame(
+            rtc.AudioFrame(
+                data=data,
+                sample_rate=sample_rate,
+                num_channels=1,
+                samples_per_channel=len(data) // 2,
+            )
+        )
+    stream.end_input()
+    events = [ev async for ev in stream]
+
+    # the rate of each window, computed from scratch
+    audio = pcm.astype(np.float32) / np.iinfo(np.int16).max
+    window, step = sample_rate, sample_rate // 10
+    starts = range(0, len(audio) - window + 1, step)
+    expected = [stream._compute_speaking_rate(audio[s : s + window], sample_rate) for s in starts]
+    last = audio[starts[-1] + step :]
+    expected.append(_spectral_flux(last, sample_rate))
+
+    assert len(events) == len(expected)
+    assert any(not ev.speaking for ev in events) and any(ev.speaking for ev in events)
+    for ev, rate in zip(events, expected):
+        assert ev.speaking_rate == pytest.approx(rate, rel=1e-6, abs=1e-9)
@@ -0,0 +1,79 @@
+import pytest
+
+from livekit.agents import tokenize
+from livekit.agents.voice.transcription.synchronizer import _TextData
+
+TEXT = (
+    "Hello, this is a synchronized transcript. It has punctuation... and numbers like 3.14!\n"
+    "Some words are longer: communication, hyphenation, extraordinarily. 你好世界 ok."
+)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, len(TEXT)])
+def test_text_data_hyphens(chunk_size: int):
+    word_tokenizer = tokenize.basic.WordTokenizer(
+        retain_format=True, ignore_punctuation=False, split_character=True
+    )
+
+    def hyphen_count(word: str) -> int:
+        return len(tokenize.basic.hyphenate_word(word))
+
+    text_data = _TextData(
+        word_stream=word_tokenizer.stream(),
+        word_tokenizer=word_tokenizer,
+        hyphen_count=hyphen_count,
+    )
+    for i in range(0, len(TEXT), chunk_size):
+        text_data.push_text(TEXT[i : i + chunk_size])
+
+    words = word_tokenizer.tokenize(TEXT)
+    assert "".join(words) == TEXT
+    assert len(text_data.pushed_hyphens) == len(TEXT) + 1
+
+    # the counts between the word boundaries are the ones of the words
+    bounds = [0]
+    counts = [0]
+    for word in words:
+        bounds.append(bounds[-1] + len(word))
+        counts.append(counts[-1] + hyphen_count(word))
+    for i, start in enumerate(bounds):
+        for j, end in enumerate(bounds):
+            assert text_data.count_hyphens(start, end) == counts[j] - counts[i]
+
+    # a part of a word counts for one hyphen at least
+    assert text_data.count_hyphens(0, 1) == 1
+    assert text_data.count_hyphens(0, len(TEXT) + 10) == counts[-1]
+
+
+@pytest.mark.parametrize("ignore_punctuation", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 4, len(TEXT)])
+def test_text_data_hyphens_not_retaining_format(ignore_punctuation: bool, chunk_size: int):
+    # the tokens don't cover the whitespaces (and the punctuations)
+    word_tokenizer = tokenize.basic.WordTokenizer(
+        ignore_punctuation=ignore_punctuation, split_character=True
+    )
+
+    def hyphen_count(word: str) -> int:
+        return len(tokenize.basic.hyphenate_word(word))
+
+    text_data = _TextData(
+        word_stream=word_tokenizer.stream(),
+        word_tokenizer=word_tokenizer,
+        hyphen_count=hyphen_count,
+    )
+    for i in range(0, len(TEXT), chunk_size):
+        text_data.push_text(TEXT[i : i + chunk_size])
+
+    assert len(text_data.pushed_hyphens) == len(TEXT) + 1
+
+    # the counts after each word are the ones of the words up to it, the words that are not in
+    # the text as is ("3.14" -> "314" without punctuations) are counted where they start
+    pos = 0
+    count = 0
+    for word in word_tokenizer.tokenize(TEXT):
+        count += hyphen_count(word)
+        if (start := TEXT.find(word, pos)) != -1:
+            pos = start + len(word)
+            assert text_data.count_hyphens(0, pos) == count
+
+    assert text_data.pushed_hyphens[-1] == count
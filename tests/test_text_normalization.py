@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from livekit.agents import tokenize
+from livekit.agents.tts import SentenceStreamPacer
+from livekit.agents.voice.transcription.normalization import (
+    NormalizationRule,
+    TextNormalizer,
+    default_rules,
+)
+
+
+@pytest.mark.parametrize(
+    "language, text, expected",
+    [
+        (
+            "en",
+            "Read https://www.livekit.io/docs/agents?ref=1. It costs $1,000,000!!!",
+            "Read livekit.io. It costs $1000000!",
+        ),
+        (
+            "en-US",
+            "See www.example.com/a/b, then  wait.....\n\nOk?!",
+            "See example.com, then wait... Ok?",
+        ),
+        ("en", "Version 1.2.3 costs 1,23 or 12,345.50", "Version 1.2.3 costs 1,23 or 12345.50"),
+        (
+            "de-DE",
+            "Es kostet 1.000.000 Euro, also 3,5 Prozent.",
+            "Es kostet 1000000 Euro, also 3,5 Prozent.",
+        ),
+        ("fr", "Il coûte 1 000 000 euros", "Il coûte 1000000 euros"),
+        ("xx", "Unknown 1,000   language", "Unknown 1,000 language"),
+    ],
+)
+def test_text_normalizer(language: str, text: str, expected: str):
+    assert TextNormalizer(language=language).normalize(text) == expected
+
+
+def test_text_normalizer_rules():
+    normalizer = TextNormalizer(
+        rules=[NormalizationRule(r"\bASAP\b", "as soon as possible"), *default_rules("en")]
+    )
+    assert normalizer.normalize("Call me  ASAP!!") == "Call me as soon as possible!"
+    assert normalizer.normalize("Call me  ASAP!!") is normalizer.normalize("Call me  ASAP!!")
+
+
+class _AudioEmitter:
+    def pushed_duration(self) -> float:
+        return 0.0
+
+
+async def test_stream_pacer_expanding_rule():
+    pacer = SentenceStreamPacer(
+        text_normalizer=TextNormalizer(
+            rules=[NormalizationRule(r"\bASAP\b", "as soon as possible")]
+        )
+    )
+    stream = pacer.wrap(
+        sent_stream=tokenize.blingfire.SentenceTokenizer().stream(),
+        audio_emitter=_AudioEmitter(),  # type: ignore[arg-type]
+    )
+    stream.push_text("Call me ASAP.")
+    stream.flush()
+
+    ev = await asyncio.wait_for(stream.__anext__(), timeout=5)
+    assert ev.token == "Call me as soon as possible."
+    assert stream.characters_saved == 0
+    assert stream.characters_added == len("as soon as possible") - len("ASAP")
+    await stream.aclose()
+
+
+async def test_stream_pacer_normalization():
+    pacer = SentenceStreamPacer(text_normalizer=TextNormalizer())
+    stream = pacer.wrap(
+        sent_stream=tokenize.blingfire.SentenceTokenizer().stream(),
+        audio_emitter=_AudioEmitter(),  # type: ignore[arg-type]
+    )
+    text = "Hello there, the docs are at https://docs.livekit.io/agents/start/ today!!! "
+    stream.push_text(text)
+    stream.flush()
+
+    ev = await asyncio.wait_for(stream.__anext__(), timeout=5)
+    assert ev.token == "Hello there, the docs are at docs.livekit.io today!"
+    assert stream.characters_saved == len(text.strip()) - len(ev.token)
+    assert stream.characters_added == 0
+    await stream.aclose()
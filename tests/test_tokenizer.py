@@ -1,7 +1,11 @@
+import os
+import random
+import re
+
 import pytest
 
 from livekit.agents import tokenize
-from livekit.agents.tokenize import basic, blingfire
+from livekit.agents.tokenize import _basic_hyphenator, _basic_sent, basic, blingfire
 from livekit.agents.tokenize._basic_paragraph import split_paragraphs
 from livekit.plugins import nltk
 
@@ -118,6 +122,110 @@ async def test_streamed_sent_tokenizer(tokenizer: tokenize.SentenceTokenizer, ex
         assert ev.token == expected[i]
 
 
+@pytest.mark.parametrize(
+    "tokenizer", [basic.SentenceTokenizer(), basic.SentenceTokenizer(retain_format=True)]
+)
+async def test_streamed_sent_tokenizer_boundaries(tokenizer: tokenize.SentenceTokenizer):
+    text = TEXT + " and a run-on sentence that goes on" * 20 + ". The end."
+    chunks = [text[i : i + 3] for i in range(0, len(text), 3)]
+
+    async def _tokenize(boundary_chars: str | None) -> tuple[list[str], int]:
+        calls = 0
+        tokenize_fnc = tokenizer.stream()._tokenize_fnc
+
+        def _counting_tokenize(text: str) -> list[tuple[str, int, int]]:
+            nonlocal calls
+            calls += 1
+            return tokenize_fnc(text)
+
+        stream = tokenize.BufferedSentenceStream(
+            tokenizer=_counting_tokenize,
+            min_token_len=20,
+            min_ctx_len=10,
+            boundary_chars=boundary_chars,
+        )
+        for chunk in chunks:
+            stream.push_text(chunk)
+        stream.end_input()
+        return [ev.token async for ev in stream], calls
+
+    tokens, calls = await _tokenize(tokenize.token_stream.SENTENCE_END_CHARS)
+    expected, expected_calls = await _tokenize(None)  # tokenized again on every push
+    assert tokens == expected
+    assert calls < expected_calls / 3
+
+
+async def test_streamed_custom_tokenizer_boundaries():
+    # a tokenizer ending the sentences on other chars isn't held by the built-in boundaries
+    def _split(text: str) -> list[str]:
+        return [s for s in text.split(";") if s]
+
+    stream = tokenize.BufferedSentenceStream(tokenizer=_split, min_token_len=5, min_ctx_len=5)
+    for chunk in ["first part of it; second", " part of it; third part"]:
+        stream.push_text(chunk)
+
+    assert (await stream.__anext__()).token == "first part of it"
+    stream.end_input()
+    assert [ev.token async for ev in stream] == [" second part of it", " third part"]
+
+
+def _split_sentences_reference(
+    text: str, min_sentence_len: int, retain_format: bool
+) -> list[tuple[str, int, int]]:
+    # the rules applied one after the other to the whole text
+    if retain_format:
+        text = text.replace("\n", "<nel><stop>")
+    else:
+        text = text.replace("\n", " ")
+    for pattern, repl in _basic_sent._RULES:
+        text = pattern.sub(repl, text)
+    text = re.sub(r"([.!?。！？])([\"”])", "\\1\\2<stop>", text)
+    text = re.sub(r"([.!?。！？])(?![\"”])", "\\1<stop>", text)
+    text = text.replace("<prd>", ".").replace("<nel>", "\n")
+    splitted_sentences = text.split("<stop>")
+    text = text.replace("<stop>", "")
+
+    sentences = []
+    buff = ""
+    start_pos = end_pos = 0
+    pre_pad = "" if retain_format else " "
+    for match in splitted_sentences:
+        sentence = match if retain_format else match.strip()
+        if not sentence:
+            continue
+        buff += pre_pad + sentence
+        end_pos += len(match)
+        if len(buff) > min_sentence_len:
+            sentences.append((buff[len(pre_pad) :], start_pos, end_pos))
+            start_pos = end_pos
+            buff = ""
+    if buff:
+        sentences.append((buff[len(pre_pad) :], start_pos, len(text) - 1))
+    return sentences
+
+
+FUZZ_FRAGMENTS = [
+    *("Mr", "Mrs", "Ms", "Dr", "St", "Prof", "Ph", "D", "Inc", "Ltd", "Jr", "Co"),
+    *("He", "It", "They", "However", "Wherever", "com", "io", "me", "U", "S", "A", "e", "g"),
+    *("1", "42", "2.54", ".", ".", ".", "..", "...", " ", " ", " ", "\t", "\n", "\u00a0"),
+    *("!", "?", "。", "！", '"', "”", "hello", "world", "the", "end", "你好"),
+]
+
+
+@pytest.mark.parametrize("retain_format", [False, True])
+def test_split_sentences_rules(retain_format: bool):
+    rng = random.Random(42)
+    texts = [
+        TEXT,
+        *("".join(rng.choices(FUZZ_FRAGMENTS, k=rng.randint(1, 80))) for _ in range(5000)),
+    ]
+    for text in texts:
+        for min_sentence_len in (0, 20):
+            assert _basic_sent.split_sentences(
+                text, min_sentence_len=min_sentence_len, retain_format=retain_format
+            ) == _split_sentences_reference(text, min_sentence_len, retain_format), repr(text)
+
+
 WORDS_TEXT = "This is a test. Blabla another test! multiple consecutive spaces:     done"
 WORDS_EXPECTED = [
     "This",
@@ -271,6 +379,35 @@ def test_hyphenate_word():
         assert hyphenated == HYPHENATOR_EXPECTED[i]
 
 
+def test_hyphenate_word_patterns():
+    # the points of every pattern matching the word, looked up from each char
+    patterns = {}
+    for pattern in _basic_hyphenator.PATTERNS.split():
+        points = [int(d or 0) for d in re.split("[.a-z]", pattern)]
+        patterns[re.sub("[0-9]", "", pattern)] = points
+
+    hyphenator = _basic_hyphenator.Hyphenator(_basic_hyphenator.PATTERNS)
+    with open(os.path.join(os.path.dirname(__file__), "long_transcript.txt")) as f:
+        words = re.findall(r"\s*\S+", f.read())
+    rng = random.Random(42)
+    words += ["".join(rng.choices("abcdefghij.- ", k=rng.randint(5, 20))) for _ in range(500)]
+    for word in words:
+        work = "." + word.lower() + "."
+        points = [0] * (len(work) + 1)
+        for i in range(len(work)):
+            for j in range(i + 1, len(work) + 1):
+                for k, p in enumerate(patterns.get(work[i:j], ())):
+                    points[i + k] = max(points[i + k], p)
+        points[1] = points[2] = points[-2] = points[-3] = 0
+
+        pieces = [""]
+        for c, p in zip(word, points[2:]):
+            pieces[-1] += c
+            if p % 2:
+                pieces.append("")
+        assert hyphenator.hyphenate_word(word) == (pieces if len(word) > 4 else [word])
+
+
 REPLACE_TEXT = (
     "This is a test. Hello world, I'm creating this agents..     framework. Once again "
     "framework.  A.B.C"
@@ -1,6 +1,11 @@
 import pytest
 
-from livekit.agents.voice.transcription.filters import filter_emoji, filter_markdown
+from livekit.agents.voice.transcription.filters import (
+    MAX_LOOKAHEAD,
+    apply_text_transforms,
+    filter_emoji,
+    filter_markdown,
+)
 
 MARKDOWN_INPUT = """# Mathematics and Markdown Guide
 
@@ -240,3 +245,57 @@ async def test_emoji_filter(chunk_size: int):
     assert result == EMOJI_EXPECTED_OUTPUT
 
     print("\n=== EMOJI TEST COMPLETE ===")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 50])
+async def test_apply_text_transforms(chunk_size: int):
+    """The fused transforms give the same text as the filters chained one after the other."""
+    text = MARKDOWN_INPUT + "\n" + EMOJI_INPUT + "\n**bold 🎉** and `code` 😀"
+
+    async def stream_text():
+        for i in range(0, len(text), chunk_size):
+            yield text[i : i + chunk_size]
+
+    expected = "".join([chunk async for chunk in filter_emoji(filter_markdown(stream_text()))])
+    result = "".join(
+        [
+            chunk
+            async for chunk in apply_text_transforms(
+                stream_text(), ["filter_markdown", "filter_emoji"]
+            )
+        ]
+    )
+    assert result == expected
+
+    expected = "".join([chunk async for chunk in filter_markdown(filter_emoji(stream_text()))])
+    result = "".join(
+        [
+            chunk
+            async for chunk in apply_text_transforms(
+                stream_text(), ["filter_emoji", "filter_markdown"]
+            )
+        ]
+    )
+    assert result == expected
+
+    with pytest.raises(ValueError):
+        apply_text_transforms(stream_text(), ["filter_html"])  # type: ignore[list-item]
+
+
+async def test_markdown_filter_lookahead():
+    """An incomplete pattern doesn't hold the rest of the line."""
+    words = ["Multiplication:", " 3", " *", " 7", " =", " 21"] + [" and", " more"] * 100
+    pushed = 0
+
+    async def stream_text():
+        nonlocal pushed
+        for word in words:
+            pushed += len(word)
+            yield word
+
+    outputs = []
+    async for chunk in filter_markdown(stream_text()):
+        outputs.append((pushed, chunk))
+
+    assert "".join(chunk for _, chunk in outputs) == "".join(words)
+    assert outputs[0][0] <= MAX_LOOKAHEAD + 10
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("livekit.plugins.turn_detector")
+tokenizers = pytest.importorskip("tokenizers")
+transformers = pytest.importorskip("transformers")
+
+from livekit.plugins.turn_detector.base import MAX_HISTORY_TOKENS  # noqa: E402
+from livekit.plugins.turn_detector.english import _EUORunnerEn  # noqa: E402
+
+TEXT_PATH = os.path.join(os.path.dirname(__file__), "long_transcript.txt")
+CHAT_TEMPLATE = (
+    "{% for message in messages %}"
+    "{{ '<|im_start|>' + message['role'] + '\\n' + message['content'] + '<|im_end|>\\n' }}"
+    "{% endfor %}"
+)
+
+
+def _tokenizer():  # type: ignore[no-untyped-def]
+    # a byte-level BPE with the special tokens of the model, trained on the fly since the
+    # model files aren't downloaded by the tests
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.BPE())
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = tokenizers.decoders.ByteLevel()
+    trainer = tokenizers.trainers.BpeTrainer(
+        vocab_size=2000,
+        special_tokens=["<|endoftext|>", "<|im_start|>", "<|im_end|>"],
+        initial_alphabet=tokenizers.pre_tokenizers.ByteLevel.alphabet(),
+    )
+    with open(TEXT_PATH) as f:
+        tokenizer.train_from_iterator(f.read().splitlines(), trainer=trainer)
+
+    fast = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        pad_token="<|endoftext|>",
+        additional_special_tokens=["<|im_start|>", "<|im_end|>"],
+    )
+    fast.chat_template = CHAT_TEMPLATE
+    return fast
+
+
+def _runner() -> _EUORunnerEn:
+    runner = _EUORunnerEn()
+    runner._tokenizer = _tokenizer()
+    return runner
+
+
+def _chat_ctx(n: int) -> list[dict[str, str]]:
+    with open(TEXT_PATH) as f:
+        sentences = [s.strip() for s in f.read().split(".") if s.strip()]
+    return [
+        {"role": ("user", "assistant")[i % 2], "content": sentences[i % len(sentences)] + "."}
+        for i in range(n)
+    ]
+
+
+def test_tokenize_turn_by_turn():
+    runner = _runner()
+    tokenizer = runner._tokenizer
+
+    for n in range(1, 8):
+        # the history is tokenized from the cache, only the new turns are tokenized
+        for _ in range(2):
+            chat_ctx = _chat_ctx(n)
+            input_ids, text = runner._prepare_inputs(json.dumps({"chat_ctx": chat_ctx}).encode())
+            expected = tokenizer(text, add_special_tokens=False)["input_ids"]
+            assert input_ids == expected[-MAX_HISTORY_TOKENS:]
+
+    # adjacent turns of the same role are merged
+    chat_ctx = _chat_ctx(4)
+    chat_ctx[2]["role"] = "assistant"
+    input_ids, text = runner._prepare_inputs(json.dumps({"chat_ctx": chat_ctx}).encode())
+    assert text.count("<|im_start|>") == 2
+    assert input_ids == tokenizer(text, add_special_tokens=False)["input_ids"][-MAX_HISTORY_TOKENS:]
+
+
+def test_tokenize_concurrent():
+    runner = _runner()
+    runner._normalize_cache.maxsize = runner._tokenize_cache.maxsize = 4
+    requests = [json.dumps({"chat_ctx": _chat_ctx(n)}).encode() for n in range(1, 16)] * 20
+
+    expected = [runner._prepare_inputs(data) for data in requests[:15]] * 20
+    # the small caches are evicted and updated by the threads concurrently
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(runner._prepare_inputs, requests)) == expected